@@ -8,8 +8,10 @@ import traceback
 import sqlite3
 import os
 
-from routers import clients, payments, files
+from routers import clients, payments, files, search, changes
 from database.connection import test_connection
+from middleware import CompressionMiddleware
+from services import watcher_service, preview_service, content_index_service, change_service
 
 # Create FastAPI application
 app = FastAPI(
@@ -27,10 +29,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON responses (payment history, directory scans)
+# Set COMPRESSION_MIN_SIZE to change the threshold in bytes
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get("COMPRESSION_MIN_SIZE", "1024")),
+)
+
 # Include routers
 app.include_router(clients.router)
 app.include_router(payments.router)
 app.include_router(files.router)
+app.include_router(search.router)
+app.include_router(changes.router)
 
 # Exception handlers
 @app.exception_handler(sqlite3.Error)
@@ -64,6 +75,32 @@ async def startup_event():
     # Test database connection
     if not test_connection():
         print("WARNING: Could not connect to database!")
+    
+    # Optionally keep client_files in sync with the shared folder
+    # FILE_WATCHER=events (native notifications, polling if unavailable) or FILE_WATCHER=polling
+    watcher_mode = os.environ.get("FILE_WATCHER", "").lower()
+    if watcher_mode in ("events", "polling"):
+        watcher_service.start_watcher(
+            use_events=watcher_mode == "events",
+            poll_interval=float(os.environ.get("FILE_WATCHER_POLL_INTERVAL", watcher_service.DEFAULT_POLL_INTERVAL))
+        )
+    
+    # Have previews ready for documents linked to recent payments
+    if os.environ.get("PREVIEW_PREWARM", "1") == "1":
+        preview_service.warm_recent_payment_previews()
+    
+    # Drop change log entries past the retention period
+    change_service.prune_changes()
+    
+    # Extract text from documents added or changed since the last run (CONTENT_INDEX=0 to disable)
+    content_index_service.queue_indexing()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Run shutdown tasks"""
+    watcher_service.stop_watcher()
+    content_index_service.stop_indexing(timeout=30)
+    preview_service.stop_previews()
 
 @app.get("/")
 async def root():
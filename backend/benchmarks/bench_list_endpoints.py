@@ -0,0 +1,60 @@
+"""
+Benchmark per-request latency of the list endpoints with and without the
+fast JSON response path.
+Run from the backend folder with: python -m benchmarks.bench_list_endpoints
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+
+from app import app
+from database.queries import clients as client_queries
+from responses import orjson
+
+ITERATIONS = 200
+
+def time_requests(client: TestClient, url: str, iterations: int = ITERATIONS) -> list:
+    """Return per-request latencies in milliseconds."""
+    # Warm up caches and the database connection path
+    for _ in range(5):
+        client.get(url)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return timings
+
+def main():
+    client = TestClient(app)
+
+    clients = client_queries.get_all_clients()
+    if not clients:
+        print("No clients in database - nothing to benchmark")
+        return
+    client_id = clients[0]['client_id']
+
+    endpoints = [
+        ("clients", "/clients/"),
+        ("payments", f"/payments/client/{client_id}?page_size=100"),
+        ("files", f"/files/{client_id}"),
+    ]
+
+    print(f"Encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    print(f"{'endpoint':<10} {'path':<9} {'median ms':>10} {'p95 ms':>10}")
+    for name, url in endpoints:
+        separator = '&' if '?' in url else '?'
+        for label, path in (("standard", url), ("fast", f"{url}{separator}fast=true")):
+            timings = sorted(time_requests(client, path))
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{name:<10} {label:<9} {statistics.median(timings):>10.3f} {p95:>10.3f}")
+
+if __name__ == "__main__":
+    main()
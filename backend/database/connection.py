@@ -7,9 +7,14 @@ import os
 from contextlib import contextmanager
 from typing import Optional, Generator, Any
 
+from database.migrations import apply_migrations
+
 # Path to SQLite database file
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db', '401KDB.db')
 
+# Database files already brought up to the latest schema in this process
+_migrated_paths = set()
+
 def get_db_connection() -> sqlite3.Connection:
     """
     Creates and returns a new SQLite database connection.
@@ -20,6 +25,10 @@ def get_db_connection() -> sqlite3.Connection:
         conn.row_factory = sqlite3.Row
         # Enable foreign keys support
         conn.execute("PRAGMA foreign_keys = ON")
+        # Upgrade the schema once per process, on first use
+        if DB_PATH not in _migrated_paths:
+            apply_migrations(conn)
+            _migrated_paths.add(DB_PATH)
         return conn
     except sqlite3.Error as e:
         # Log the error (would be better with a proper logging setup)
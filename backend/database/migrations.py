@@ -0,0 +1,544 @@
+# backend/database/migrations.py
+# Versioned schema upgrades, tracked with PRAGMA user_version
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+def _add_cents_column(conn: sqlite3.Connection, table: str, column: str) -> None:
+    """
+    Add an INTEGER <column>_cents column and backfill it from the REAL dollar column.
+    """
+    conn.execute(f'ALTER TABLE {table} ADD COLUMN "{column}_cents" INTEGER')
+    conn.execute(f'''
+        UPDATE {table}
+        SET "{column}_cents" = CAST(ROUND("{column}" * 100) AS INTEGER)
+        WHERE "{column}" IS NOT NULL
+    ''')
+
+def _money_to_integer_cents(conn: sqlite3.Connection) -> None:
+    """
+    Store every money column as integer cents so sums and averages are exact.
+    Assets (total_assets, last_recorded_assets) stay in whole dollars.
+    """
+    money_columns = [
+        ('payments', 'expected_fee'),
+        ('payments', 'actual_fee'),
+        ('contracts', 'flat_rate'),
+        ('quarterly_summaries', 'total_payments'),
+        ('quarterly_summaries', 'avg_payment'),
+        ('quarterly_summaries', 'expected_total'),
+        ('yearly_summaries', 'total_payments'),
+        ('yearly_summaries', 'avg_payment'),
+        ('client_metrics', 'last_payment_amount'),
+        ('client_metrics', 'total_ytd_payments'),
+        ('client_metrics', 'avg_quarterly_payment'),
+    ]
+
+    # Summary triggers reference the REAL columns, so they go first
+    conn.execute("DROP TRIGGER IF EXISTS update_quarterly_after_payment")
+    conn.execute("DROP TRIGGER IF EXISTS update_yearly_after_quarterly")
+
+    for table, column in money_columns:
+        _add_cents_column(conn, table, column)
+
+    conn.execute("""
+        CREATE TRIGGER update_quarterly_after_payment
+        AFTER INSERT ON payments
+        BEGIN
+            INSERT OR REPLACE INTO quarterly_summaries
+            (client_id, year, quarter, total_payments_cents, total_assets, payment_count,
+             avg_payment_cents, expected_total_cents, last_updated)
+            SELECT
+                client_id,
+                applied_start_quarter_year,
+                applied_start_quarter,
+                SUM(actual_fee_cents),
+                AVG(total_assets),
+                COUNT(*),
+                CAST(ROUND(AVG(actual_fee_cents)) AS INTEGER),
+                MAX(expected_fee_cents),
+                datetime('now')
+            FROM payments
+            WHERE client_id = NEW.client_id
+              AND applied_start_quarter_year = NEW.applied_start_quarter_year
+              AND applied_start_quarter = NEW.applied_start_quarter
+            GROUP BY client_id, applied_start_quarter_year, applied_start_quarter;
+        END
+    """)
+
+    conn.execute("""
+        CREATE TRIGGER update_yearly_after_quarterly
+        AFTER INSERT ON quarterly_summaries
+        BEGIN
+            INSERT OR REPLACE INTO yearly_summaries
+            (client_id, year, total_payments_cents, total_assets, payment_count,
+             avg_payment_cents, yoy_growth, last_updated)
+            SELECT
+                client_id,
+                year,
+                SUM(total_payments_cents),
+                AVG(total_assets),
+                SUM(payment_count),
+                CAST(ROUND(AVG(avg_payment_cents)) AS INTEGER),
+                NULL,
+                datetime('now')
+            FROM quarterly_summaries
+            WHERE client_id = NEW.client_id
+                AND year = NEW.year
+            GROUP BY client_id, year;
+        END
+    """)
+
+    # DROP COLUMN needs SQLite 3.35+; older builds simply keep the unused REAL columns
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        for table, column in money_columns:
+            conn.execute(f'ALTER TABLE {table} DROP COLUMN "{column}"')
+
+def _client_files_fts(conn: sqlite3.Connection) -> None:
+    """
+    Full-text index over client_files: file name, path segments and the
+    owning client's display name. rowid is the file_id. Triggers keep it in
+    sync with every insert, update and delete on client_files, and with
+    client renames.
+    """
+    conn.execute("""
+        CREATE VIRTUAL TABLE client_files_fts USING fts5(
+            file_name,
+            path_segments,
+            client_name,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+
+    # Path separators become spaces so each folder name is its own token
+    path_segments = "replace(replace({0}.onedrive_path, '\\', ' '), '/', ' ')"
+    client_name = "(SELECT display_name FROM clients WHERE client_id = {0}.client_id)"
+
+    conn.execute(f"""
+        INSERT INTO client_files_fts (rowid, file_name, path_segments, client_name)
+        SELECT f.file_id, f.file_name, {path_segments.format('f')}, {client_name.format('f')}
+        FROM client_files f
+    """)
+
+    conn.execute(f"""
+        CREATE TRIGGER client_files_fts_insert
+        AFTER INSERT ON client_files
+        BEGIN
+            INSERT INTO client_files_fts (rowid, file_name, path_segments, client_name)
+            VALUES (NEW.file_id, NEW.file_name, {path_segments.format('NEW')}, {client_name.format('NEW')});
+        END
+    """)
+
+    conn.execute("""
+        CREATE TRIGGER client_files_fts_delete
+        AFTER DELETE ON client_files
+        BEGIN
+            DELETE FROM client_files_fts WHERE rowid = OLD.file_id;
+        END
+    """)
+
+    conn.execute(f"""
+        CREATE TRIGGER client_files_fts_update
+        AFTER UPDATE OF file_name, onedrive_path, client_id ON client_files
+        BEGIN
+            UPDATE client_files_fts
+            SET file_name = NEW.file_name,
+                path_segments = {path_segments.format('NEW')},
+                client_name = {client_name.format('NEW')}
+            WHERE rowid = NEW.file_id;
+        END
+    """)
+
+    conn.execute("""
+        CREATE TRIGGER client_files_fts_client_rename
+        AFTER UPDATE OF display_name ON clients
+        BEGIN
+            UPDATE client_files_fts
+            SET client_name = NEW.display_name
+            WHERE rowid IN (SELECT file_id FROM client_files WHERE client_id = NEW.client_id);
+        END
+    """)
+
+# Entities in the global search index: type code (low bits of the rowid),
+# table, id column, and the columns that make up the title and body text
+SEARCH_ENTITIES = {
+    'client': (0, 'clients', 'client_id', ['display_name'], ['full_name']),
+    'contact': (1, 'contacts', 'contact_id', ['contact_name'],
+                ['contact_type', 'email', 'phone', 'physical_address', 'mailing_address']),
+    'contract': (2, 'contracts', 'contract_id', ['provider_name', 'contract_number'], ['notes']),
+    'payment': (3, 'payments', 'payment_id', ['method'], ['notes']),
+}
+
+def _search_text(row: str, columns: List[str]) -> str:
+    """
+    SQL expression joining the given columns of a row with spaces, skipping NULLs.
+    """
+    return " || ' ' || ".join(f"coalesce({row}.{column}, '')" for column in columns)
+
+def _global_search_fts(conn: sqlite3.Connection) -> None:
+    """
+    One FTS5 index over clients, contacts, contracts and payment notes so a
+    single ranked query can search them all. rowid = entity_id * 4 + type code,
+    which lets the triggers replace an entity's entry by rowid. Soft-deleted
+    rows (valid_to set) are kept out of the index.
+    """
+    conn.execute("""
+        CREATE VIRTUAL TABLE search_index USING fts5(
+            entity_type UNINDEXED,
+            entity_id UNINDEXED,
+            client_id UNINDEXED,
+            title,
+            body,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+
+    for entity_type, (code, table, id_column, title_columns, body_columns) in SEARCH_ENTITIES.items():
+        def values(row: str) -> str:
+            return (f"{row}.{id_column} * 4 + {code}, '{entity_type}', {row}.{id_column}, {row}.client_id, "
+                    f"{_search_text(row, title_columns)}, {_search_text(row, body_columns)}")
+
+        # Payments without notes only match on method, which is not worth indexing
+        only_notes = " AND {0}.notes IS NOT NULL" if entity_type == 'payment' else ""
+
+        conn.execute(f"""
+            INSERT INTO search_index (rowid, entity_type, entity_id, client_id, title, body)
+            SELECT {values('t')} FROM {table} t
+            WHERE t.valid_to IS NULL{only_notes.format('t')}
+        """)
+
+        conn.execute(f"""
+            CREATE TRIGGER search_index_{table}_insert
+            AFTER INSERT ON {table}
+            WHEN NEW.valid_to IS NULL{only_notes.format('NEW')}
+            BEGIN
+                INSERT INTO search_index (rowid, entity_type, entity_id, client_id, title, body)
+                VALUES ({values('NEW')});
+            END
+        """)
+
+        conn.execute(f"""
+            CREATE TRIGGER search_index_{table}_update
+            AFTER UPDATE ON {table}
+            BEGIN
+                DELETE FROM search_index WHERE rowid = OLD.{id_column} * 4 + {code};
+                INSERT INTO search_index (rowid, entity_type, entity_id, client_id, title, body)
+                SELECT {values('NEW')}
+                WHERE NEW.valid_to IS NULL{only_notes.format('NEW')};
+            END
+        """)
+
+        conn.execute(f"""
+            CREATE TRIGGER search_index_{table}_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                DELETE FROM search_index WHERE rowid = OLD.{id_column} * 4 + {code};
+            END
+        """)
+
+def _file_manifest(conn: sqlite3.Connection) -> None:
+    """
+    Persisted stat data for every file and folder seen under a client's
+    folder, so rescans only need to look at what changed.
+    """
+    conn.execute("""
+        CREATE TABLE file_manifest (
+            client_id INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            is_dir INTEGER NOT NULL DEFAULT 0,
+            size INTEGER,
+            mtime_ns INTEGER,
+            inode INTEGER,
+            scanned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (client_id, path),
+            FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE
+        )
+    """)
+
+def _client_files_missing(conn: sqlite3.Connection) -> None:
+    """
+    Flag registered files whose document disappeared from disk instead of
+    deleting them, so payment links survive until someone reviews them.
+    """
+    conn.execute("ALTER TABLE client_files ADD COLUMN missing_since DATETIME")
+
+def _client_files_content(conn: sqlite3.Connection) -> None:
+    """
+    Size and SHA-256 of uploaded documents, computed while they are written.
+    NULL for files registered from disk until something hashes them.
+    """
+    conn.execute("ALTER TABLE client_files ADD COLUMN size_bytes INTEGER")
+    conn.execute("ALTER TABLE client_files ADD COLUMN sha256 TEXT")
+
+def _client_files_hash_index(conn: sqlite3.Connection) -> None:
+    """
+    Look up a client's documents by content hash, so re-uploads of the same
+    statement can reuse the existing file.
+    """
+    conn.execute("""
+        CREATE INDEX idx_client_files_client_sha256
+        ON client_files (client_id, sha256)
+        WHERE sha256 IS NOT NULL
+    """)
+
+def _file_content_index(conn: sqlite3.Connection) -> None:
+    """
+    Extracted document text for content search. file_content records which
+    content hash each file's text came from, so files are only re-extracted
+    when their hash changes; file_content_fts holds the text, rowid = file_id.
+    """
+    conn.execute("""
+        CREATE TABLE file_content (
+            file_id INTEGER PRIMARY KEY,
+            sha256 TEXT,
+            chars INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            extracted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (file_id) REFERENCES client_files(file_id) ON DELETE CASCADE
+        )
+    """)
+
+    conn.execute("""
+        CREATE VIRTUAL TABLE file_content_fts USING fts5(
+            content,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+
+    conn.execute("""
+        CREATE TRIGGER file_content_fts_delete
+        AFTER DELETE ON client_files
+        BEGIN
+            DELETE FROM file_content_fts WHERE rowid = OLD.file_id;
+        END
+    """)
+
+def _file_usage_indexes(conn: sqlite3.Connection) -> None:
+    """
+    payment_files' primary key leads on payment_id, so finding the payments
+    that use a file scanned the whole table. Index it from the file side,
+    and index client_files by client for per-client usage counts.
+    """
+    conn.execute("CREATE INDEX idx_payment_files_file_id ON payment_files (file_id, payment_id)")
+    conn.execute("CREATE INDEX idx_client_files_client_id ON client_files (client_id)")
+
+def _active_row_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Nearly every lookup filters on valid_to IS NULL, which the existing
+    indexes do not cover, so they also visit soft-deleted rows. Partial
+    indexes over the current rows serve the hot lookups instead: clients
+    by name, and contracts and payments by client in their listed order.
+    """
+    conn.execute("CREATE INDEX idx_clients_active_name ON clients (display_name) WHERE valid_to IS NULL")
+    conn.execute(
+        "CREATE INDEX idx_contracts_active_client ON contracts (client_id, contract_start_date DESC) "
+        "WHERE valid_to IS NULL"
+    )
+    conn.execute(
+        "CREATE INDEX idx_payments_active_client_date ON payments (client_id, received_date DESC) "
+        "WHERE valid_to IS NULL"
+    )
+
+def _history_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Index each client's contracts, payments and contacts with their
+    valid_from/valid_to, so as-of lookups filter on the index before
+    reading rows. Each index also leads with the column its rows are listed
+    by, so the payments and contacts ones supersede idx_payments_date and
+    idx_contacts_type.
+    """
+    conn.execute(
+        "CREATE INDEX idx_contracts_history ON contracts "
+        "(client_id, contract_start_date DESC, valid_from, valid_to)"
+    )
+    conn.execute(
+        "CREATE INDEX idx_payments_history ON payments "
+        "(client_id, received_date DESC, valid_from, valid_to)"
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_payments_date")
+    conn.execute("CREATE INDEX idx_contacts_history ON contacts (client_id, contact_type, valid_from, valid_to)")
+    conn.execute("DROP INDEX IF EXISTS idx_contacts_type")
+
+# Entities in the change log: table and id column. Tables with valid_to
+# log soft deletes and restores as delete and insert.
+CHANGE_ENTITIES = {
+    'client': ('clients', 'client_id'),
+    'contact': ('contacts', 'contact_id'),
+    'contract': ('contracts', 'contract_id'),
+    'payment': ('payments', 'payment_id'),
+    'file': ('client_files', 'file_id'),
+}
+
+def _change_log(conn: sqlite3.Connection) -> None:
+    """
+    Append-only log of changes to clients, contacts, contracts, payments
+    and files, one row per changed entity, for incremental sync. Triggers
+    write it, so every change is logged in the transaction that made it,
+    whichever code path made it. Linking or unlinking a document logs an
+    update of both the payment and the file.
+    """
+    conn.execute("""
+        CREATE TABLE change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity_type TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            client_id INTEGER,
+            op TEXT NOT NULL,
+            changed_at DATETIME NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+    conn.execute("CREATE INDEX idx_change_log_client ON change_log (client_id, seq)")
+
+    for entity_type, (table, id_column) in CHANGE_ENTITIES.items():
+        def log(row: str, op: str) -> str:
+            return (f"INSERT INTO change_log (entity_type, entity_id, client_id, op) "
+                    f"VALUES ('{entity_type}', {row}.{id_column}, {row}.client_id, {op});")
+
+        update_op = "'update'"
+        if entity_type != 'file':
+            update_op = """CASE
+                WHEN NEW.valid_to IS NOT NULL AND OLD.valid_to IS NULL THEN 'delete'
+                WHEN NEW.valid_to IS NULL AND OLD.valid_to IS NOT NULL THEN 'insert'
+                ELSE 'update'
+            END"""
+
+        conn.execute(f"""
+            CREATE TRIGGER change_log_{table}_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                {log('NEW', "'insert'")}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER change_log_{table}_update
+            AFTER UPDATE ON {table}
+            BEGIN
+                {log('NEW', update_op)}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER change_log_{table}_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                {log('OLD', "'delete'")}
+            END
+        """)
+
+    for event, row in (("INSERT", "NEW"), ("DELETE", "OLD")):
+        conn.execute(f"""
+            CREATE TRIGGER change_log_payment_files_{event.lower()}
+            AFTER {event} ON payment_files
+            BEGIN
+                INSERT INTO change_log (entity_type, entity_id, client_id, op)
+                SELECT 'payment', payment_id, client_id, 'update' FROM payments WHERE payment_id = {row}.payment_id;
+                INSERT INTO change_log (entity_type, entity_id, client_id, op)
+                SELECT 'file', file_id, client_id, 'update' FROM client_files WHERE file_id = {row}.file_id;
+            END
+        """)
+
+def _file_content_source_stat(conn: sqlite3.Connection) -> None:
+    """
+    Record the size and mtime each file's text was extracted from, so a
+    file edited on disk is rehashed and extracted again once a scan puts
+    its new stat in the manifest. Existing extractions take the current
+    manifest stat, as they were made from the files now on disk.
+    """
+    conn.execute("ALTER TABLE file_content ADD COLUMN size INTEGER")
+    conn.execute("ALTER TABLE file_content ADD COLUMN mtime_ns INTEGER")
+    conn.execute("""
+        UPDATE file_content SET (size, mtime_ns) = (
+            SELECT m.size, m.mtime_ns
+            FROM client_files f
+            JOIN file_manifest m ON m.client_id = f.client_id AND m.path = replace(f.onedrive_path, '\\', '/')
+            WHERE f.file_id = file_content.file_id
+        )
+    """)
+
+def _change_log_file_columns(conn: sqlite3.Connection) -> None:
+    """
+    Only log file updates that change what users see (client, name, path,
+    upload time, missing_since). Size and hash backfills from the indexer
+    and previews would otherwise flood the log with updates no dashboard
+    needs to refetch.
+    """
+    conn.execute("DROP TRIGGER change_log_client_files_update")
+    conn.execute("""
+        CREATE TRIGGER change_log_client_files_update
+        AFTER UPDATE ON client_files
+        WHEN NEW.client_id IS NOT OLD.client_id
+            OR NEW.file_name IS NOT OLD.file_name
+            OR NEW.onedrive_path IS NOT OLD.onedrive_path
+            OR NEW.uploaded_at IS NOT OLD.uploaded_at
+            OR NEW.missing_since IS NOT OLD.missing_since
+        BEGIN
+            INSERT INTO change_log (entity_type, entity_id, client_id, op)
+            VALUES ('file', NEW.file_id, NEW.client_id, 'update');
+        END
+    """)
+
+# Ordered list of (version, name, upgrade function). Append only - never renumber.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "money_to_integer_cents", _money_to_integer_cents),
+    (2, "client_files_fts", _client_files_fts),
+    (3, "global_search_fts", _global_search_fts),
+    (4, "file_manifest", _file_manifest),
+    (5, "client_files_missing", _client_files_missing),
+    (6, "client_files_content", _client_files_content),
+    (7, "client_files_hash_index", _client_files_hash_index),
+    (8, "file_content_index", _file_content_index),
+    (9, "file_usage_indexes", _file_usage_indexes),
+    (10, "active_row_indexes", _active_row_indexes),
+    (11, "history_indexes", _history_indexes),
+    (12, "change_log", _change_log),
+    (13, "file_content_source_stat", _file_content_source_stat),
+    (14, "change_log_file_columns", _change_log_file_columns),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """
+    Get the schema version recorded in the database file.
+
+    Args:
+        conn: Open database connection
+
+    Returns:
+        Current schema version (0 for the original schema)
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Apply all pending migrations, each in its own transaction.
+
+    Args:
+        conn: Open database connection
+
+    Returns:
+        Schema version after upgrading
+    """
+    version = get_schema_version(conn)
+
+    for target, name, upgrade in MIGRATIONS:
+        if target <= version:
+            continue
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Another process may have upgraded while we waited for the lock
+            if get_schema_version(conn) >= target:
+                conn.rollback()
+                version = target
+                continue
+            upgrade(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Migration {target} ({name}) failed: {e}")
+            raise
+
+        version = target
+
+    return version
@@ -8,7 +8,9 @@ from .payments import calculate_expected_fee, get_payment_files
 
 from .files import get_client_files, get_file_by_id, create_file, delete_file
 from .files import link_file_to_payment, unlink_file_from_payment, get_payment_count_for_file
-from .files import get_file_exists, search_client_files
+from .files import get_file_exists, search_client_files, search_files
+
+from .search import global_search
 
 # Import new functions
 from .clients import validate_client_contract, get_client_contracts
\ No newline at end of file
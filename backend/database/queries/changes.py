@@ -0,0 +1,88 @@
+# backend/database/queries/changes.py
+# Change log queries (rows written by the change_log triggers)
+
+from database.connection import execute_query, execute_single_query, execute_delete
+from database.migrations import CHANGE_ENTITIES
+from typing import List, Dict, Any, Optional, Iterable
+
+def get_changes(since: int, limit: int, client_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Get logged changes after a sequence number, oldest first.
+
+    Args:
+        since: Last sequence number already seen
+        limit: Maximum number of changes
+        client_ids: Only changes to these clients' entities
+
+    Returns:
+        List of dictionaries with seq, entity_type, entity_id, client_id, op and changed_at
+    """
+    query = """
+    SELECT seq, entity_type, entity_id, client_id, op, changed_at
+    FROM change_log
+    WHERE seq > ?
+    """
+    params = [since]
+    if client_ids is not None:
+        client_ids = list(client_ids)
+        query += f" AND client_id IN ({','.join('?' * len(client_ids))})"
+        params.extend(client_ids)
+    query += " ORDER BY seq LIMIT ?"
+    params.append(limit)
+    return execute_query(query, tuple(params))
+
+def get_latest_seq() -> int:
+    """
+    Get the sequence number of the latest change, 0 if nothing was logged.
+    """
+    row = execute_single_query("SELECT coalesce(max(seq), 0) AS seq FROM change_log")
+    return row['seq']
+
+def get_oldest_seq() -> Optional[int]:
+    """
+    Get the sequence number of the oldest change still in the log, None if
+    it is empty. Changes before it were pruned.
+    """
+    row = execute_single_query("SELECT min(seq) AS seq FROM change_log")
+    return row['seq']
+
+def prune_changes(before: str) -> int:
+    """
+    Delete changes logged before a time, always keeping the latest so the
+    log still shows where it continues.
+
+    Args:
+        before: UTC datetime ('YYYY-MM-DD HH:MM:SS')
+
+    Returns:
+        Number of changes deleted
+    """
+    # Sequence numbers and times increase together, so this reads only the pruned rows
+    first_kept = execute_single_query(
+        "SELECT seq FROM change_log WHERE changed_at >= ? ORDER BY seq LIMIT 1", (before,)
+    )
+    if first_kept is None:
+        query = "DELETE FROM change_log WHERE seq < (SELECT max(seq) FROM change_log)"
+        return execute_delete(query, ())
+    return execute_delete("DELETE FROM change_log WHERE seq < ?", (first_kept['seq'],))
+
+def get_entities(entity_type: str, entity_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Get the current rows of changed entities, including soft-deleted ones.
+
+    Args:
+        entity_type: Entity type in the change log (client, contact, contract, payment, file)
+        entity_ids: IDs to fetch
+
+    Returns:
+        Dictionary of entity ID -> row; IDs whose row is gone are left out
+    """
+    table, id_column = CHANGE_ENTITIES[entity_type]
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return {}
+    query = f"""
+    SELECT * FROM {table}
+    WHERE {id_column} IN ({','.join('?' * len(entity_ids))})
+    """
+    return {row[id_column]: row for row in execute_query(query, tuple(entity_ids))}
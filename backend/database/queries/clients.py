@@ -32,7 +32,7 @@ def get_client_with_contracts(client_id: int) -> Optional[Dict[str, Any]]:
     query = """
         SELECT 
             contract_id, client_id, contract_number, provider_name,
-            contract_start_date, fee_type, percent_rate, flat_rate,
+            contract_start_date, fee_type, percent_rate, flat_rate_cents,
             payment_schedule, num_people, notes
         FROM contracts
         WHERE client_id = ? AND valid_to IS NULL
@@ -61,9 +61,9 @@ def get_clients_by_provider() -> List[Dict[str, Any]]:
 def get_client_metrics(client_id: int) -> Optional[Dict[str, Any]]:
     query = """
         SELECT 
-            client_id, last_payment_date, last_payment_amount,
-            last_payment_quarter, last_payment_year, total_ytd_payments,
-            avg_quarterly_payment, last_recorded_assets
+            client_id, last_payment_date, last_payment_amount_cents,
+            last_payment_quarter, last_payment_year, total_ytd_payments_cents,
+            avg_quarterly_payment_cents, last_recorded_assets
         FROM client_metrics
         WHERE client_id = ?
     """
@@ -154,9 +154,9 @@ def get_client_compliance_status(client_id: int) -> Dict[str, str]:
 def get_quarterly_summary(client_id: int, year: int, quarter: int) -> Optional[Dict[str, Any]]:
     query = """
         SELECT 
-            id, client_id, year, quarter, total_payments, 
-            total_assets, payment_count, avg_payment, 
-            expected_total, last_updated
+            id, client_id, year, quarter, total_payments_cents, 
+            total_assets, payment_count, avg_payment_cents, 
+            expected_total_cents, last_updated
         FROM quarterly_summaries
         WHERE client_id = ? AND year = ? AND quarter = ?
     """
@@ -165,8 +165,8 @@ def get_quarterly_summary(client_id: int, year: int, quarter: int) -> Optional[D
 def get_yearly_summary(client_id: int, year: int) -> Optional[Dict[str, Any]]:
     query = """
         SELECT 
-            id, client_id, year, total_payments, total_assets, 
-            payment_count, avg_payment, yoy_growth, last_updated
+            id, client_id, year, total_payments_cents, total_assets, 
+            payment_count, avg_payment_cents, yoy_growth, last_updated
         FROM yearly_summaries
         WHERE client_id = ? AND year = ?
     """
@@ -219,7 +219,7 @@ def get_client_contracts(client_id: int) -> List[Dict[str, Any]]:
     query = """
     SELECT 
         contract_id, client_id, contract_number, provider_name,
-        contract_start_date, fee_type, percent_rate, flat_rate,
+        contract_start_date, fee_type, percent_rate, flat_rate_cents,
         payment_schedule, num_people, notes
     FROM contracts
     WHERE client_id = ? AND valid_to IS NULL
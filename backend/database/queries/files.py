@@ -1,8 +1,9 @@
 # backend/database/queries/files.py
 # Document/file-related queries
 
-from database.connection import execute_query, execute_single_query, execute_insert, execute_update, execute_delete
-from typing import List, Dict, Any, Optional
+from database.connection import execute_query, execute_single_query, execute_insert, execute_update, execute_delete, get_db_cursor
+from database.queries.search import build_fts_query
+from typing import List, Dict, Any, Optional, Set, Tuple
 
 def get_client_files(client_id: int) -> List[Dict[str, Any]]:
 
@@ -12,7 +13,10 @@ def get_client_files(client_id: int) -> List[Dict[str, Any]]:
         client_id,
         file_name,
         onedrive_path,
-        uploaded_at
+        uploaded_at,
+        missing_since,
+        size_bytes,
+        sha256
     FROM 
         client_files
     WHERE 
@@ -31,7 +35,10 @@ def get_file_by_id(file_id: int) -> Optional[Dict[str, Any]]:
         client_id,
         file_name,
         onedrive_path,
-        uploaded_at
+        uploaded_at,
+        missing_since,
+        size_bytes,
+        sha256
     FROM 
         client_files
     WHERE 
@@ -40,8 +47,114 @@ def get_file_by_id(file_id: int) -> Optional[Dict[str, Any]]:
     
     return execute_single_query(query, (file_id,))
 
-def create_file(client_id: int, file_name: str, onedrive_path: str) -> int:
+def get_file_by_hash(client_id: int, sha256: str) -> Optional[Dict[str, Any]]:
+    """
+    Find a client's file with the given content hash that is still on disk.
+    
+    Args:
+        client_id: Client ID
+        sha256: Hex SHA-256 digest
+        
+    Returns:
+        File dictionary or None if not found
+    """
+    query = """
+    SELECT 
+        file_id,
+        client_id,
+        file_name,
+        onedrive_path,
+        uploaded_at,
+        size_bytes,
+        sha256
+    FROM 
+        client_files
+    WHERE 
+        client_id = ? AND
+        sha256 = ? AND
+        missing_since IS NULL
+    ORDER BY 
+        file_id
+    LIMIT 1
+    """
+    
+    return execute_single_query(query, (client_id, sha256))
+
+def get_file_ids_by_path(client_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Get the file_id of registered files keyed by normalized path.
+    
+    Args:
+        client_id: Only this client's files (all clients if None)
+        
+    Returns:
+        Dictionary of onedrive_path (forward slashes) -> file_id
+    """
+    if client_id is None:
+        rows = execute_query("SELECT file_id, onedrive_path FROM client_files")
+    else:
+        rows = execute_query("SELECT file_id, onedrive_path FROM client_files WHERE client_id = ?", (client_id,))
+    return {row['onedrive_path'].replace('\\', '/'): row['file_id'] for row in rows}
+
+def get_file_ids_for_paths(client_id: int, paths: List[str], chunk_size: int = 500) -> Dict[str, int]:
+    """
+    Get the file_id of a client's registered files among the given paths.
+    
+    Args:
+        client_id: Client ID
+        paths: Normalized paths (forward slashes) to look up
+        chunk_size: Paths per query, to stay under SQLite's variable limit
+        
+    Returns:
+        Dictionary of onedrive_path (forward slashes) -> file_id for the paths that are registered
+    """
+    file_ids = {}
+    for start in range(0, len(paths), chunk_size):
+        chunk = paths[start:start + chunk_size]
+        # Rows written on Windows may still hold backslashes
+        candidates = chunk + [path.replace('/', '\\') for path in chunk]
+        rows = execute_query(
+            f"SELECT file_id, onedrive_path FROM client_files "
+            f"WHERE client_id = ? AND onedrive_path IN ({','.join('?' * len(candidates))})",
+            (client_id, *candidates)
+        )
+        file_ids.update({row['onedrive_path'].replace('\\', '/'): row['file_id'] for row in rows})
+    return file_ids
+
+def create_file(
+    client_id: int,
+    file_name: str,
+    onedrive_path: str,
+    size_bytes: Optional[int] = None,
+    sha256: Optional[str] = None
+) -> int:
 
+    query = """
+    INSERT INTO client_files (
+        client_id,
+        file_name,
+        onedrive_path,
+        size_bytes,
+        sha256
+    ) VALUES (?, ?, ?, ?, ?)
+    """
+    
+    return execute_insert(query, (client_id, file_name, onedrive_path, size_bytes, sha256))
+
+def create_files(client_id: int, files: List[Tuple[str, str]]) -> int:
+    """
+    Register many files for a client in one transaction.
+    
+    Args:
+        client_id: Client ID
+        files: List of (file_name, onedrive_path) tuples
+        
+    Returns:
+        Number of rows inserted
+    """
+    if not files:
+        return 0
+    
     query = """
     INSERT INTO client_files (
         client_id,
@@ -50,7 +163,138 @@ def create_file(client_id: int, file_name: str, onedrive_path: str) -> int:
     ) VALUES (?, ?, ?)
     """
     
-    return execute_insert(query, (client_id, file_name, onedrive_path))
+    with get_db_cursor() as cursor:
+        cursor.executemany(query, [(client_id, file_name, path) for file_name, path in files])
+        return cursor.rowcount
+
+def get_registered_paths(client_id: int) -> Set[str]:
+    """
+    Get the normalized onedrive_path of every file registered for a client.
+    
+    Args:
+        client_id: Client ID
+        
+    Returns:
+        Set of paths with forward slashes
+    """
+    query = """
+    SELECT onedrive_path FROM client_files WHERE client_id = ?
+    """
+    return {row['onedrive_path'].replace('\\', '/') for row in execute_query(query, (client_id,))}
+
+def get_files_for_reconciliation(client_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Get every registered file with its normalized path, in the same order as
+    the manifest, for a sorted merge against it.
+    
+    Args:
+        client_id: Only this client's files (None for every client)
+    
+    Returns:
+        List of file dictionaries (path has forward slashes) ordered by
+        client_id, then path
+    """
+    query = """
+    SELECT 
+        file_id,
+        client_id,
+        file_name,
+        replace(onedrive_path, '\\', '/') AS path,
+        missing_since,
+        size_bytes,
+        sha256
+    FROM 
+        client_files
+    {}
+    ORDER BY 
+        client_id, path
+    """
+    if client_id is not None:
+        return execute_query(query.format("WHERE client_id = ?"), (client_id,))
+    return execute_query(query.format(""))
+
+def apply_reconciliation(
+    added: List[Tuple[int, str, str]],
+    moved: List[Tuple[int, str]],
+    restored: List[int],
+    missing: List[int]
+) -> Dict[str, int]:
+    """
+    Apply reconciliation fixes for all clients in one transaction.
+    
+    Args:
+        added: (client_id, file_name, onedrive_path) of unregistered files to register
+        moved: (file_id, new_path) of files found at another path
+        restored: IDs of files flagged missing that are on disk again
+        missing: IDs of files no longer on disk, to flag with missing_since
+        
+    Returns:
+        Dictionary with registered, moved, restored and missing row counts
+    """
+    counts = {"registered": 0, "moved": 0, "restored": 0, "missing": 0}
+    with get_db_cursor() as cursor:
+        cursor.executemany("""
+        INSERT INTO client_files (client_id, file_name, onedrive_path) VALUES (?, ?, ?)
+        """, added)
+        counts["registered"] = max(cursor.rowcount, 0)
+        
+        cursor.executemany("""
+        UPDATE client_files SET onedrive_path = ?, file_name = ?, missing_since = NULL
+        WHERE file_id = ?
+        """, [(path, path.rsplit('/', 1)[-1], file_id) for file_id, path in moved])
+        counts["moved"] = max(cursor.rowcount, 0)
+        
+        cursor.executemany("""
+        UPDATE client_files SET missing_since = NULL
+        WHERE file_id = ? AND missing_since IS NOT NULL
+        """, [(file_id,) for file_id in restored])
+        counts["restored"] = max(cursor.rowcount, 0)
+        
+        cursor.executemany("""
+        UPDATE client_files SET missing_since = datetime('now')
+        WHERE file_id = ? AND missing_since IS NULL
+        """, [(file_id,) for file_id in missing])
+        counts["missing"] = max(cursor.rowcount, 0)
+    
+    return counts
+
+def set_file_content_hash(file_id: int, size_bytes: int, sha256: str) -> bool:
+    """
+    Record the size and content hash of a file registered without them.
+    
+    Args:
+        file_id: File ID
+        size_bytes: Size in bytes
+        sha256: Hex SHA-256 digest
+        
+    Returns:
+        Success status
+    """
+    query = """
+    UPDATE client_files SET size_bytes = ?, sha256 = ? WHERE file_id = ?
+    """
+    return execute_update(query, (size_bytes, sha256, file_id)) > 0
+
+def get_recent_payment_file_ids(limit: int = 100) -> List[int]:
+    """
+    Get files linked to the most recently received payments.
+    
+    Args:
+        limit: Maximum number of files
+        
+    Returns:
+        List of file IDs, most recent payment first
+    """
+    query = """
+    SELECT pf.file_id
+    FROM payment_files pf
+    JOIN payments p ON p.payment_id = pf.payment_id
+    WHERE p.valid_to IS NULL
+    GROUP BY pf.file_id
+    ORDER BY max(p.received_date) DESC
+    LIMIT ?
+    """
+    return [row['file_id'] for row in execute_query(query, (limit,))]
 
 def delete_file(file_id: int) -> bool:
 
@@ -87,6 +331,78 @@ def unlink_file_from_payment(payment_id: int, file_id: int) -> bool:
     rows_deleted = execute_delete(query, (payment_id, file_id))
     return rows_deleted > 0
 
+def get_link_owners(payment_ids: List[int], file_ids: List[int]) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """
+    Look up the owning client of active payments and of files in one query.
+    
+    Args:
+        payment_ids: Payment IDs
+        file_ids: File IDs
+        
+    Returns:
+        Tuple of (payment_id -> client_id, file_id -> client_id); IDs that
+        don't exist (or are soft-deleted payments) are absent
+    """
+    query = f"""
+    SELECT 'payment' AS kind, payment_id AS id, client_id
+    FROM payments
+    WHERE valid_to IS NULL AND payment_id IN ({','.join('?' * len(payment_ids)) or 'NULL'})
+    UNION ALL
+    SELECT 'file' AS kind, file_id AS id, client_id
+    FROM client_files
+    WHERE file_id IN ({','.join('?' * len(file_ids)) or 'NULL'})
+    """
+    payments, files = {}, {}
+    for row in execute_query(query, tuple(payment_ids) + tuple(file_ids)):
+        (payments if row['kind'] == 'payment' else files)[row['id']] = row['client_id']
+    return payments, files
+
+def _existing_links(cursor, pairs: List[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+    payment_ids = sorted({payment_id for payment_id, _ in pairs})
+    cursor.execute(f"""
+    SELECT payment_id, file_id FROM payment_files
+    WHERE payment_id IN ({','.join('?' * len(payment_ids))})
+    """, payment_ids)
+    return {(row['payment_id'], row['file_id']) for row in cursor.fetchall()} & set(pairs)
+
+def link_files_to_payments(pairs: List[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+    """
+    Link many files to payments in one transaction.
+    
+    Args:
+        pairs: (payment_id, file_id) pairs
+        
+    Returns:
+        Pairs that were already linked before this call
+    """
+    if not pairs:
+        return set()
+    with get_db_cursor() as cursor:
+        existing = _existing_links(cursor, pairs)
+        cursor.executemany("""
+        INSERT OR IGNORE INTO payment_files (payment_id, file_id) VALUES (?, ?)
+        """, [pair for pair in pairs if pair not in existing])
+    return existing
+
+def unlink_files_from_payments(pairs: List[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+    """
+    Unlink many files from payments in one transaction.
+    
+    Args:
+        pairs: (payment_id, file_id) pairs
+        
+    Returns:
+        Pairs that were linked (and are now removed)
+    """
+    if not pairs:
+        return set()
+    with get_db_cursor() as cursor:
+        existing = _existing_links(cursor, pairs)
+        cursor.executemany("""
+        DELETE FROM payment_files WHERE payment_id = ? AND file_id = ?
+        """, list(existing))
+    return existing
+
 def get_payment_count_for_file(file_id: int) -> int:
 
     query = """
@@ -98,6 +414,76 @@ def get_payment_count_for_file(file_id: int) -> int:
     result = execute_single_query(query, (file_id,))
     return result['count'] if result else 0
 
+def get_file_payments(file_id: int) -> List[Dict[str, Any]]:
+    """
+    Get the active payments a file is linked to.
+    
+    Args:
+        file_id: File ID
+        
+    Returns:
+        List of payment dictionaries with applied period, provider and linked_at,
+        most recently received first
+    """
+    query = """
+    SELECT 
+        p.payment_id,
+        p.contract_id,
+        p.received_date,
+        p.actual_fee_cents,
+        p.applied_start_month,
+        p.applied_start_month_year,
+        p.applied_end_month,
+        p.applied_end_month_year,
+        p.applied_start_quarter,
+        p.applied_start_quarter_year,
+        p.applied_end_quarter,
+        p.applied_end_quarter_year,
+        co.provider_name,
+        pf.linked_at
+    FROM 
+        payment_files pf
+    JOIN 
+        payments p ON p.payment_id = pf.payment_id
+    LEFT JOIN 
+        contracts co ON co.contract_id = p.contract_id
+    WHERE 
+        pf.file_id = ? AND
+        p.valid_to IS NULL
+    ORDER BY 
+        p.received_date DESC
+    """
+    return execute_query(query, (file_id,))
+
+def get_file_usage_counts(client_id: int) -> List[Dict[str, Any]]:
+    """
+    Count the active payments linked to each of a client's files.
+    
+    Args:
+        client_id: Client ID
+        
+    Returns:
+        List of dictionaries with file_id, payment_count and last_received_date;
+        files without links are not included
+    """
+    query = """
+    SELECT 
+        f.file_id,
+        COUNT(*) AS payment_count,
+        MAX(p.received_date) AS last_received_date
+    FROM 
+        client_files f
+    JOIN 
+        payment_files pf ON pf.file_id = f.file_id
+    JOIN 
+        payments p ON p.payment_id = pf.payment_id AND p.valid_to IS NULL
+    WHERE 
+        f.client_id = ?
+    GROUP BY 
+        f.file_id
+    """
+    return execute_query(query, (client_id,))
+
 def get_file_exists(client_id: int, file_name: str) -> bool:
 
     query = """
@@ -130,23 +516,219 @@ def find_file_by_path(client_id: int, onedrive_path: str) -> Optional[Dict[str,
     
     return execute_single_query(query, (client_id, normalized_path))
 
-def search_client_files(client_id: int, search_term: str) -> List[Dict[str, Any]]:
+def search_files(search_term: str, client_id: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Ranked, prefix-aware full-text search over file names, path segments and
+    client names, optionally limited to one client.
+    
+    Args:
+        search_term: Text to search for
+        client_id: Restrict results to this client (None searches all clients)
+        limit: Maximum number of results
+        
+    Returns:
+        List of file dictionaries with client_name, rank and highlight snippets
+    """
+    return _match_files(search_term, client_id, "rank", limit)
 
+def _match_files(search_term: str, client_id: Optional[int], order_by: str, limit: Optional[int]) -> List[Dict[str, Any]]:
+    """Run a full-text file search with the given ORDER BY and an optional LIMIT."""
+    fts_query = build_fts_query(search_term)
+    if fts_query is None:
+        return []
+    
+    # bm25 weights: file name matches count most, then folders, then client name
     query = """
     SELECT 
-        file_id,
-        client_id,
-        file_name,
-        onedrive_path,
-        uploaded_at
+        f.file_id,
+        f.client_id,
+        f.file_name,
+        f.onedrive_path,
+        f.uploaded_at,
+        c.display_name AS client_name,
+        bm25(client_files_fts, 10.0, 3.0, 1.0) AS rank,
+        highlight(client_files_fts, 0, '<mark>', '</mark>') AS file_name_highlight,
+        snippet(client_files_fts, 1, '<mark>', '</mark>', '...', 12) AS path_snippet
     FROM 
-        client_files
+        client_files_fts
+    JOIN 
+        client_files f ON f.file_id = client_files_fts.rowid
+    LEFT JOIN 
+        clients c ON c.client_id = f.client_id
     WHERE 
-        client_id = ? AND
-        (file_name LIKE ? OR onedrive_path LIKE ?)
+        client_files_fts MATCH ?
+    """
+    params = [fts_query]
+    
+    if client_id is not None:
+        query += " AND f.client_id = ?"
+        params.append(client_id)
+    
+    query += f" ORDER BY {order_by}"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    
+    return execute_query(query, tuple(params))
+
+def get_files_needing_extraction(extensions: Tuple[str, ...], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Get files whose text has never been extracted, was extracted from
+    content with a different hash than the one now recorded, or whose size
+    or mtime in the manifest differs from the file it was extracted from
+    (edited on disk, so its recorded hash is stale too).
+    
+    Files that failed without a readable hash are not retried until their
+    hash is set (e.g. by a re-upload) or they change on disk.
+    
+    Args:
+        extensions: Lower-case extensions (with dot) that have an extractor
+        limit: Maximum number of files
+        
+    Returns:
+        List of dictionaries with file_id, onedrive_path, sha256, indexed_sha256
+        and the manifest's disk_size and disk_mtime_ns (None when not scanned)
+    """
+    extension_filter = " OR ".join("lower(f.onedrive_path) LIKE ?" for _ in extensions)
+    query = f"""
+    SELECT 
+        f.file_id,
+        f.onedrive_path,
+        f.sha256,
+        c.sha256 AS indexed_sha256,
+        m.size AS disk_size,
+        m.mtime_ns AS disk_mtime_ns
+    FROM 
+        client_files f
+    LEFT JOIN 
+        file_content c ON c.file_id = f.file_id
+    LEFT JOIN 
+        file_manifest m ON m.client_id = f.client_id AND m.path = replace(f.onedrive_path, '\\', '/')
+    WHERE 
+        f.missing_since IS NULL AND
+        ({extension_filter}) AND
+        (c.file_id IS NULL OR
+         (f.sha256 IS NOT NULL AND c.sha256 IS NOT f.sha256) OR
+         (m.mtime_ns IS NOT NULL AND (c.mtime_ns IS NOT m.mtime_ns OR c.size IS NOT m.size)))
     ORDER BY 
-        uploaded_at DESC
+        f.file_id
+    """
+    params = [f"%{extension}" for extension in extensions]
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return execute_query(query, tuple(params))
+
+def save_file_content(
+    file_id: int,
+    sha256: Optional[str],
+    text: Optional[str],
+    error: Optional[str] = None,
+    size: Optional[int] = None,
+    mtime_ns: Optional[int] = None
+) -> bool:
+    """
+    Store a file's extracted text and the content hash it came from,
+    replacing any earlier extraction, in one transaction.
+    
+    Args:
+        file_id: File ID
+        sha256: Hash of the content the text was extracted from
+        text: Extracted text (None if extraction failed)
+        error: Why extraction failed
+        size: Size in the manifest of the file the text came from
+        mtime_ns: Its mtime in the manifest
+        
+    Returns:
+        False if the file was deleted in the meantime
     """
+    with get_db_cursor() as cursor:
+        cursor.execute("SELECT 1 FROM client_files WHERE file_id = ?", (file_id,))
+        if cursor.fetchone() is None:
+            return False
+        cursor.execute("""
+            INSERT INTO file_content (file_id, sha256, chars, error, size, mtime_ns, extracted_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(file_id) DO UPDATE SET
+                sha256 = excluded.sha256,
+                chars = excluded.chars,
+                error = excluded.error,
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns,
+                extracted_at = excluded.extracted_at
+        """, (file_id, sha256, len(text or ''), error, size, mtime_ns))
+        cursor.execute("DELETE FROM file_content_fts WHERE rowid = ?", (file_id,))
+        if text:
+            cursor.execute("INSERT INTO file_content_fts (rowid, content) VALUES (?, ?)", (file_id, text))
+    return True
+
+def get_content_index_counts() -> Dict[str, int]:
+    """
+    Count files with extracted text and files whose extraction failed.
     
-    search_pattern = f"%{search_term}%"
-    return execute_query(query, (client_id, search_pattern, search_pattern))
\ No newline at end of file
+    Returns:
+        Dictionary with indexed and failed counts
+    """
+    query = """
+    SELECT 
+        COALESCE(SUM(error IS NULL), 0) AS indexed,
+        COALESCE(SUM(error IS NOT NULL), 0) AS failed
+    FROM 
+        file_content
+    """
+    return execute_single_query(query)
+
+def search_file_content(search_term: str, client_id: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Ranked full-text search over the extracted text of documents.
+    
+    Args:
+        search_term: Text to search for
+        client_id: Restrict results to this client (None searches all clients)
+        limit: Maximum number of results
+        
+    Returns:
+        List of file dictionaries with client_name, rank and a content snippet
+    """
+    fts_query = build_fts_query(search_term)
+    if fts_query is None:
+        return []
+    
+    query = """
+    SELECT 
+        f.file_id,
+        f.client_id,
+        f.file_name,
+        f.onedrive_path,
+        f.uploaded_at,
+        c.display_name AS client_name,
+        bm25(file_content_fts) AS rank,
+        snippet(file_content_fts, 0, '<mark>', '</mark>', '...', 16) AS content_snippet
+    FROM 
+        file_content_fts
+    JOIN 
+        client_files f ON f.file_id = file_content_fts.rowid
+    LEFT JOIN 
+        clients c ON c.client_id = f.client_id
+    WHERE 
+        file_content_fts MATCH ?
+    """
+    params = [fts_query]
+    
+    if client_id is not None:
+        query += " AND f.client_id = ?"
+        params.append(client_id)
+    
+    query += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    
+    return execute_query(query, tuple(params))
+
+def search_client_files(client_id: int, search_term: str) -> List[Dict[str, Any]]:
+    """
+    Get every file of a client matching the search text, newest first.
+    
+    Uses the full-text index like search_files, but keeps this endpoint's
+    original contract: no result cap and ordered by upload date.
+    """
+    return _match_files(search_term, client_id, "f.uploaded_at DESC", None)
\ No newline at end of file
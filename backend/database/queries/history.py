@@ -0,0 +1,142 @@
+# backend/database/queries/history.py
+# Point-in-time queries over the valid_from/valid_to history
+
+from database.connection import execute_query, execute_single_query
+from typing import List, Dict, Any, Optional
+
+def _valid_at(alias: str = "") -> str:
+    """
+    Condition for rows current at a timestamp (two parameters). Rows
+    imported before valid_from was recorded count as valid from the start.
+    """
+    return (
+        f"({alias}valid_from IS NULL OR {alias}valid_from <= ?) AND "
+        f"({alias}valid_to IS NULL OR {alias}valid_to > ?)"
+    )
+
+def get_clients_as_of(as_of: str) -> List[Dict[str, Any]]:
+    """
+    Get the clients that existed at a point in time.
+
+    Args:
+        as_of: Timestamp as 'YYYY-MM-DD HH:MM:SS' (UTC, like valid_to)
+
+    Returns:
+        List of client dictionaries ordered by display_name
+    """
+    query = f"""
+    SELECT client_id, display_name, full_name, ima_signed_date, onedrive_folder_path, valid_from, valid_to
+    FROM clients
+    WHERE {_valid_at()}
+    ORDER BY display_name
+    """
+    return execute_query(query, (as_of, as_of))
+
+def get_client_as_of(client_id: int, as_of: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a client as it existed at a point in time.
+
+    Args:
+        client_id: Client ID
+        as_of: Timestamp as 'YYYY-MM-DD HH:MM:SS'
+
+    Returns:
+        Client dictionary or None if the client did not exist then
+    """
+    query = f"""
+    SELECT client_id, display_name, full_name, ima_signed_date, onedrive_folder_path, valid_from, valid_to
+    FROM clients
+    WHERE client_id = ? AND {_valid_at()}
+    """
+    return execute_single_query(query, (client_id, as_of, as_of))
+
+def get_client_contracts_as_of(client_id: int, as_of: str) -> List[Dict[str, Any]]:
+    """
+    Get a client's contracts that were in effect at a point in time.
+
+    Args:
+        client_id: Client ID
+        as_of: Timestamp as 'YYYY-MM-DD HH:MM:SS'
+
+    Returns:
+        List of contract dictionaries, newest contract first
+    """
+    query = f"""
+    SELECT
+        contract_id, client_id, contract_number, provider_name,
+        contract_start_date, fee_type, percent_rate, flat_rate_cents,
+        payment_schedule, num_people, notes, valid_from, valid_to
+    FROM contracts
+    WHERE client_id = ? AND {_valid_at()}
+    ORDER BY contract_start_date DESC
+    """
+    return execute_query(query, (client_id, as_of, as_of))
+
+def get_client_contacts_as_of(client_id: int, as_of: str) -> List[Dict[str, Any]]:
+    """
+    Get a client's contacts at a point in time.
+
+    Args:
+        client_id: Client ID
+        as_of: Timestamp as 'YYYY-MM-DD HH:MM:SS'
+
+    Returns:
+        List of contact dictionaries
+    """
+    query = f"""
+    SELECT
+        contact_id, client_id, contact_type, contact_name, phone, email,
+        fax, physical_address, mailing_address, valid_from, valid_to
+    FROM contacts
+    WHERE client_id = ? AND {_valid_at()}
+    ORDER BY contact_type, contact_name
+    """
+    return execute_query(query, (client_id, as_of, as_of))
+
+def get_client_payments_as_of(client_id: int, as_of: str) -> List[Dict[str, Any]]:
+    """
+    Get a client's payments as recorded at a point in time: payments
+    entered by then and not yet deleted. Payments without a received_date
+    are included; later payments are not.
+
+    Args:
+        client_id: Client ID
+        as_of: Timestamp as 'YYYY-MM-DD HH:MM:SS'
+
+    Returns:
+        List of payment dictionaries, most recently received first
+    """
+    query = f"""
+    SELECT
+        p.payment_id,
+        p.contract_id,
+        p.client_id,
+        p.received_date,
+        p.total_assets,
+        p.expected_fee_cents,
+        p.actual_fee_cents,
+        p.method,
+        p.notes,
+        p.applied_start_month,
+        p.applied_start_month_year,
+        p.applied_end_month,
+        p.applied_end_month_year,
+        p.applied_start_quarter,
+        p.applied_start_quarter_year,
+        p.applied_end_quarter,
+        p.applied_end_quarter_year,
+        p.valid_from,
+        p.valid_to,
+        co.provider_name
+    FROM
+        payments p
+    LEFT JOIN
+        contracts co ON p.contract_id = co.contract_id
+    WHERE
+        p.client_id = ? AND
+        {_valid_at("p.")} AND
+        (p.received_date IS NULL OR p.received_date <= ?)
+    ORDER BY
+        p.received_date DESC
+    """
+    return execute_query(query, (client_id, as_of, as_of, as_of))
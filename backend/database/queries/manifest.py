@@ -0,0 +1,98 @@
+# backend/database/queries/manifest.py
+# File manifest queries (stat data from the last directory scan)
+
+from database.connection import execute_query, get_db_cursor
+from typing import List, Dict, Any, Iterable
+
+def get_client_manifest(client_id: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the stored manifest for a client keyed by path.
+    
+    Args:
+        client_id: Client ID
+        
+    Returns:
+        Dictionary of path -> entry (is_dir, size, mtime_ns, inode)
+    """
+    query = """
+    SELECT path, is_dir, size, mtime_ns, inode
+    FROM file_manifest
+    WHERE client_id = ?
+    """
+    return {row['path']: row for row in execute_query(query, (client_id,))}
+
+def save_manifest_changes(
+    client_id: int,
+    upserts: Iterable[Dict[str, Any]],
+    removed_paths: Iterable[str]
+) -> None:
+    """
+    Apply a scan's changes to the manifest in one transaction.
+    
+    Args:
+        client_id: Client ID
+        upserts: Entries that are new or changed (path, is_dir, size, mtime_ns, inode)
+        removed_paths: Paths that no longer exist
+    """
+    upsert_query = """
+    INSERT INTO file_manifest (client_id, path, is_dir, size, mtime_ns, inode, scanned_at)
+    VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+    ON CONFLICT (client_id, path) DO UPDATE SET
+        is_dir = excluded.is_dir,
+        size = excluded.size,
+        mtime_ns = excluded.mtime_ns,
+        inode = excluded.inode,
+        scanned_at = excluded.scanned_at
+    """
+    delete_query = """
+    DELETE FROM file_manifest WHERE client_id = ? AND path = ?
+    """
+    
+    with get_db_cursor() as cursor:
+        cursor.executemany(upsert_query, [
+            (client_id, e['path'], int(e['is_dir']), e['size'], e['mtime_ns'], e['inode'])
+            for e in upserts
+        ])
+        cursor.executemany(delete_query, [(client_id, path) for path in removed_paths])
+
+def get_all_manifest_files() -> List[Dict[str, Any]]:
+    """
+    Get the files (not folders) in every client's manifest.
+    
+    Returns:
+        List of manifest file entries ordered by client_id, then path
+    """
+    query = """
+    SELECT client_id, path, size, mtime_ns
+    FROM file_manifest
+    WHERE is_dir = 0
+    ORDER BY client_id, path
+    """
+    return execute_query(query)
+
+def get_manifest_client_ids() -> List[int]:
+    """
+    Get the clients that have a manifest, i.e. whose folder has been scanned.
+    
+    Returns:
+        List of client IDs
+    """
+    return [row['client_id'] for row in execute_query("SELECT DISTINCT client_id FROM file_manifest")]
+
+def get_manifest_files(client_id: int) -> List[Dict[str, Any]]:
+    """
+    Get all files (not folders) in a client's manifest.
+    
+    Args:
+        client_id: Client ID
+        
+    Returns:
+        List of manifest file entries ordered by path
+    """
+    query = """
+    SELECT client_id, path, size, mtime_ns, inode, scanned_at
+    FROM file_manifest
+    WHERE client_id = ? AND is_dir = 0
+    ORDER BY path
+    """
+    return execute_query(query, (client_id,))
@@ -4,6 +4,8 @@
 from database.connection import execute_query, execute_single_query, execute_insert, execute_update, execute_delete
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from decimal import Decimal
+from utils import to_cents
 import uuid
 
 def get_client_payments(client_id: int, limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
@@ -39,8 +41,8 @@ def get_client_payments(client_id: int, limit: int = 20, offset: int = 0) -> Tup
         p.client_id,
         p.received_date,
         p.total_assets,
-        p.expected_fee,
-        p.actual_fee,
+        p.expected_fee_cents,
+        p.actual_fee_cents,
         p.method,
         p.notes,
         p.applied_start_month,
@@ -55,7 +57,7 @@ def get_client_payments(client_id: int, limit: int = 20, offset: int = 0) -> Tup
         co.provider_name,
         co.fee_type,
         co.percent_rate,
-        co.flat_rate,
+        co.flat_rate_cents,
         co.payment_schedule,
         (SELECT COUNT(*) FROM payment_files pf WHERE pf.payment_id = p.payment_id) as file_count
     FROM 
@@ -96,8 +98,8 @@ def get_payment_by_id(payment_id: int) -> Optional[Dict[str, Any]]:
         p.client_id,
         p.received_date,
         p.total_assets,
-        p.expected_fee,
-        p.actual_fee,
+        p.expected_fee_cents,
+        p.actual_fee_cents,
         p.method,
         p.notes,
         p.applied_start_month,
@@ -112,7 +114,7 @@ def get_payment_by_id(payment_id: int) -> Optional[Dict[str, Any]]:
         co.provider_name,
         co.fee_type,
         co.percent_rate,
-        co.flat_rate,
+        co.flat_rate_cents,
         co.payment_schedule
     FROM 
         payments p
@@ -131,8 +133,8 @@ def create_payment(
     client_id: int,
     received_date: str,
     total_assets: Optional[int],
-    expected_fee: Optional[float],
-    actual_fee: float,
+    expected_fee_cents: Optional[int],
+    actual_fee_cents: int,
     method: Optional[str],
     notes: Optional[str],
     applied_start_month: Optional[int],
@@ -149,7 +151,7 @@ def create_payment(
     For split payments, start and end period fields differ.
     
     Args:
-        All payment fields
+        All payment fields (fees in integer cents)
         
     Returns:
         ID of the newly created payment
@@ -160,8 +162,8 @@ def create_payment(
         client_id,
         received_date,
         total_assets,
-        expected_fee,
-        actual_fee,
+        expected_fee_cents,
+        actual_fee_cents,
         method,
         notes,
         applied_start_month,
@@ -180,8 +182,8 @@ def create_payment(
         client_id,
         received_date,
         total_assets,
-        expected_fee,
-        actual_fee,
+        expected_fee_cents,
+        actual_fee_cents,
         method,
         notes,
         applied_start_month,
@@ -200,7 +202,7 @@ def update_payment(
     payment_id: int,
     received_date: Optional[str] = None,
     total_assets: Optional[int] = None,
-    actual_fee: Optional[float] = None,
+    actual_fee_cents: Optional[int] = None,
     method: Optional[str] = None,
     notes: Optional[str] = None
 ) -> bool:
@@ -227,9 +229,9 @@ def update_payment(
         update_fields.append("total_assets = ?")
         params.append(total_assets)
     
-    if actual_fee is not None:
-        update_fields.append("actual_fee = ?")
-        params.append(actual_fee)
+    if actual_fee_cents is not None:
+        update_fields.append("actual_fee_cents = ?")
+        params.append(actual_fee_cents)
     
     if method is not None:
         update_fields.append("method = ?")
@@ -255,24 +257,24 @@ def update_payment(
     rows_updated = execute_update(query, tuple(params))
     return rows_updated > 0
 
-def update_expected_fee(payment_id: int, expected_fee: float) -> bool:
+def update_expected_fee(payment_id: int, expected_fee_cents: int) -> bool:
     """
     Update the expected fee for a payment.
     
     Args:
         payment_id: ID of payment to update
-        expected_fee: New expected fee
+        expected_fee_cents: New expected fee in cents
         
     Returns:
         True if update successful, False otherwise
     """
     query = """
     UPDATE payments
-    SET expected_fee = ?
+    SET expected_fee_cents = ?
     WHERE payment_id = ? AND valid_to IS NULL
     """
     
-    rows_updated = execute_update(query, (expected_fee, payment_id))
+    rows_updated = execute_update(query, (expected_fee_cents, payment_id))
     return rows_updated > 0
 
 def delete_payment(payment_id: int) -> bool:
@@ -294,7 +296,52 @@ def delete_payment(payment_id: int) -> bool:
     rows_updated = execute_update(query, (payment_id,))
     return rows_updated > 0
 
-def calculate_expected_fee(contract_id: int, total_assets: Optional[int], period_type: str) -> Optional[float]:
+def restore_payment(payment_id: int) -> bool:
+    """
+    Restore a soft-deleted payment, provided its client and contract are
+    still current.
+    
+    Args:
+        payment_id: ID of payment to restore
+        
+    Returns:
+        True if the payment was restored, False otherwise
+    """
+    query = """
+    UPDATE payments
+    SET valid_to = NULL
+    WHERE payment_id = ? AND valid_to IS NOT NULL
+      AND EXISTS (SELECT 1 FROM clients c WHERE c.client_id = payments.client_id AND c.valid_to IS NULL)
+      AND EXISTS (SELECT 1 FROM contracts co WHERE co.contract_id = payments.contract_id AND co.valid_to IS NULL)
+    """
+    
+    rows_updated = execute_update(query, (payment_id,))
+    return rows_updated > 0
+
+def get_payment_state(payment_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get whether a payment, deleted or not, and its client and contract are current.
+    
+    Args:
+        payment_id: Payment ID
+        
+    Returns:
+        Dictionary with payment_id, client_id, valid_to, client_current and
+        contract_current, or None if the payment does not exist
+    """
+    query = """
+    SELECT
+        p.payment_id,
+        p.client_id,
+        p.valid_to,
+        EXISTS (SELECT 1 FROM clients c WHERE c.client_id = p.client_id AND c.valid_to IS NULL) AS client_current,
+        EXISTS (SELECT 1 FROM contracts co WHERE co.contract_id = p.contract_id AND co.valid_to IS NULL) AS contract_current
+    FROM payments p
+    WHERE p.payment_id = ?
+    """
+    return execute_single_query(query, (payment_id,))
+
+def calculate_expected_fee(contract_id: int, total_assets: Optional[int], period_type: str) -> Optional[int]:
     """
     Calculate expected fee based on contract and assets.
     
@@ -304,13 +351,13 @@ def calculate_expected_fee(contract_id: int, total_assets: Optional[int], period
         period_type: 'month' or 'quarter'
         
     Returns:
-        Expected fee amount or None if not enough information
+        Expected fee in cents or None if not enough information
     """
     query = """
     SELECT 
         fee_type,
         percent_rate,
-        flat_rate,
+        flat_rate_cents,
         payment_schedule
     FROM 
         contracts
@@ -328,12 +375,12 @@ def calculate_expected_fee(contract_id: int, total_assets: Optional[int], period
     
     # Handle flat fee
     if fee_type == 'flat':
-        flat_rate = contract['flat_rate']
-        if flat_rate is None:
+        flat_rate_cents = contract['flat_rate_cents']
+        if flat_rate_cents is None:
             return None
             
         # Return the flat rate directly
-        return flat_rate
+        return flat_rate_cents
             
     # Handle percentage fee
     elif fee_type in ('percentage', 'percent'):
@@ -343,7 +390,7 @@ def calculate_expected_fee(contract_id: int, total_assets: Optional[int], period
             
         # Simply apply the stored percentage rate directly to the assets
         # No period adjustments needed - the rate is already in the correct form
-        return total_assets * float(percent_rate)
+        return to_cents(total_assets * Decimal(repr(percent_rate)))
     
     # Default case if calculation not possible
     return None
@@ -386,16 +433,9 @@ def associate_file_with_payment(payment_id: int, file_id: int) -> bool:
     Returns:
         True if association successful, False otherwise
     """
-    # Check if already associated
-    check_query = """
-    SELECT payment_id FROM payment_files WHERE payment_id = ? AND file_id = ?
-    """
-    existing = execute_single_query(check_query, (payment_id, file_id))
-    if existing:
-        return True  # Already associated
-    
+    # An existing association is left as is
     query = """
-    INSERT INTO payment_files (payment_id, file_id) VALUES (?, ?)
+    INSERT OR IGNORE INTO payment_files (payment_id, file_id) VALUES (?, ?)
     """
     
     try:
@@ -422,6 +462,58 @@ def disassociate_file_from_payment(payment_id: int, file_id: int) -> bool:
     rows_deleted = execute_delete(query, (payment_id, file_id))
     return rows_deleted > 0
 
+def get_client_payment_periods(client_id: int) -> List[Dict[str, Any]]:
+    """
+    Get the applied period and provider of every active payment of a client.
+    
+    Args:
+        client_id: Client ID
+        
+    Returns:
+        List of payment dictionaries with applied period fields and provider_name
+    """
+    query = """
+    SELECT 
+        p.payment_id,
+        p.contract_id,
+        p.received_date,
+        p.applied_start_month,
+        p.applied_start_month_year,
+        p.applied_end_month,
+        p.applied_end_month_year,
+        p.applied_start_quarter,
+        p.applied_start_quarter_year,
+        p.applied_end_quarter,
+        p.applied_end_quarter_year,
+        co.provider_name
+    FROM 
+        payments p
+    LEFT JOIN 
+        contracts co ON p.contract_id = co.contract_id
+    WHERE 
+        p.client_id = ? AND
+        p.valid_to IS NULL
+    """
+    return execute_query(query, (client_id,))
+
+def get_client_payment_links(client_id: int) -> List[Dict[str, Any]]:
+    """
+    Get every payment-file link of a client's files.
+    
+    Args:
+        client_id: Client ID
+        
+    Returns:
+        List of dictionaries with payment_id and file_id
+    """
+    query = """
+    SELECT pf.payment_id, pf.file_id
+    FROM payment_files pf
+    JOIN client_files f ON f.file_id = pf.file_id
+    WHERE f.client_id = ?
+    """
+    return execute_query(query, (client_id,))
+
 def get_payments_by_period(
     client_id: int, 
     is_monthly: bool, 
@@ -447,8 +539,8 @@ def get_payments_by_period(
             contract_id,
             received_date,
             total_assets,
-            expected_fee,
-            actual_fee,
+            expected_fee_cents,
+            actual_fee_cents,
             method,
             notes,
             applied_start_month,
@@ -485,8 +577,8 @@ def get_payments_by_period(
             contract_id,
             received_date,
             total_assets,
-            expected_fee,
-            actual_fee,
+            expected_fee_cents,
+            actual_fee_cents,
             method,
             notes,
             applied_start_quarter,
@@ -0,0 +1,80 @@
+# backend/database/queries/search.py
+# Full-text search queries
+
+from database.connection import execute_query
+from typing import List, Dict, Any, Optional
+import re
+
+# Entity types stored in the global search index
+SEARCH_ENTITY_TYPES = ('client', 'contact', 'contract', 'payment')
+
+def build_fts_query(search_term: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 query: every word becomes a quoted
+    prefix term and all terms must match.
+    
+    Args:
+        search_term: Raw text typed by the user
+        
+    Returns:
+        FTS5 MATCH expression or None if the text has no searchable words
+    """
+    tokens = re.findall(r"\w+", search_term)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def global_search(
+    search_term: str,
+    entity_types: Optional[List[str]] = None,
+    client_id: Optional[int] = None,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """
+    Ranked search across clients, contacts, contracts and payment notes.
+    
+    Args:
+        search_term: Text to search for
+        entity_types: Restrict to these entity types (None for all)
+        client_id: Restrict to one client's records
+        limit: Maximum number of hits
+        
+    Returns:
+        List of hits with entity_type, entity_id, client_id, client_name,
+        title, snippet and rank (lower is better)
+    """
+    fts_query = build_fts_query(search_term)
+    if fts_query is None:
+        return []
+    
+    # Title matches (names, contract numbers) outweigh body text (notes, addresses)
+    query = """
+    SELECT 
+        s.entity_type,
+        s.entity_id,
+        s.client_id,
+        c.display_name AS client_name,
+        trim(s.title) AS title,
+        snippet(search_index, -1, '<mark>', '</mark>', '...', 16) AS snippet,
+        bm25(search_index, 0.0, 0.0, 0.0, 5.0, 1.0) AS rank
+    FROM 
+        search_index s
+    LEFT JOIN 
+        clients c ON c.client_id = s.client_id
+    WHERE 
+        search_index MATCH ?
+    """
+    params: List[Any] = [fts_query]
+    
+    if entity_types:
+        query += f" AND s.entity_type IN ({', '.join('?' for _ in entity_types)})"
+        params.extend(entity_types)
+    
+    if client_id is not None:
+        query += " AND s.client_id = ?"
+        params.append(client_id)
+    
+    query += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    
+    return execute_query(query, tuple(params))
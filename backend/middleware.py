@@ -0,0 +1,184 @@
+# backend/middleware.py
+# Response compression (gzip / brotli) with size thresholds
+
+import zlib
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Media types that are already compressed - recompressing wastes CPU for no gain
+COMPRESSED_MEDIA_TYPES = (
+    'image/', 'video/', 'audio/',
+    'application/zip', 'application/gzip', 'application/x-7z-compressed',
+    'application/vnd.openxmlformats-officedocument.',
+)
+
+def no_compression(endpoint: Callable) -> Callable:
+    """
+    Mark a route endpoint so CompressionMiddleware leaves its responses alone.
+    Apply below the @router decorator, e.g. for file downloads.
+    """
+    endpoint._no_compression = True
+    return endpoint
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best supported encoding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Raw header value, e.g. "gzip, deflate, br;q=0.9"
+
+    Returns:
+        "br", "gzip" or None if the client accepts neither
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+class _Compressor:
+    """Incremental compressor that can flush after every streamed chunk."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        if self.encoding == 'br':
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+class CompressionMiddleware:
+    """
+    Compress responses negotiated through Accept-Encoding.
+
+    Complete bodies are only compressed when they reach minimum_size.
+    Streaming bodies (StreamingResponse, FileResponse) are compressed chunk by
+    chunk and flushed as they go, so nothing is buffered. Responses that
+    already carry a Content-Encoding or Content-Range, have an already
+    compressed media type, or come from a @no_compression route pass through.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope.get('method') == 'HEAD':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, scope, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+class _CompressionResponder:
+    """Per-request state: holds back the start message until the first body chunk."""
+
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, encoding: str, send: Send):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    def _should_skip(self, headers: MutableHeaders) -> bool:
+        endpoint = self.scope.get('endpoint')
+        if getattr(endpoint, '_no_compression', False):
+            return True
+        if 'content-encoding' in headers or 'content-range' in headers:
+            return True
+        if self.start_message['status'] in (204, 206, 304):
+            return True
+        media_type = headers.get('content-type', '').lower()
+        return media_type.startswith(COMPRESSED_MEDIA_TYPES)
+
+    def _mark_compressed(self, headers: MutableHeaders) -> None:
+        headers['Content-Encoding'] = self.encoding
+        headers.add_vary_header('Accept-Encoding')
+        # The compressed bytes differ from the original, so a strong ETag no longer holds
+        etag = headers.get('etag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = f'W/{etag}'
+
+    async def send(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            self.start_message = message
+            return
+
+        if message['type'] != 'http.response.body':
+            await self.downstream(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.passthrough:
+            await self.downstream(message)
+            return
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message['headers'])
+
+            # Small complete bodies and excluded responses go out untouched
+            if self._should_skip(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+                self.passthrough = True
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+
+            self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            self._mark_compressed(headers)
+
+            if not more_body:
+                compressed = self.compressor.finish(body)
+                headers['Content-Length'] = str(len(compressed))
+                await self.downstream(self.start_message)
+                await self.downstream({'type': 'http.response.body', 'body': compressed})
+                return
+
+            # Streaming: length is unknown until the end
+            del headers['Content-Length']
+            await self.downstream(self.start_message)
+
+        if more_body:
+            await self.downstream({'type': 'http.response.body', 'body': self.compressor.chunk(body), 'more_body': True})
+        else:
+            await self.downstream({'type': 'http.response.body', 'body': self.compressor.finish(body)})
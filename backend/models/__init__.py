@@ -1,4 +1,5 @@
 from .schemas import Client, Contact, Contract, ClientWithContract, Payment
 from .schemas import PaymentCreate, PaymentUpdate, ClientMetrics, PaymentWithDetails
 from .schemas import ClientFile, PaymentFile, FileUpload
-from .schemas import ExpectedFeeRequest, ExpectedFeeResponse, ClientSnapshot, PaginatedResponse
\ No newline at end of file
+from .schemas import ExpectedFeeRequest, ExpectedFeeResponse, ClientSnapshot, PaginatedResponse
+from .schemas import SearchHit
\ No newline at end of file
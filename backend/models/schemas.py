@@ -211,6 +211,9 @@ class ClientFile(BaseModel):
     file_name: str
     onedrive_path: str
     uploaded_at: Optional[str] = None
+    missing_since: Optional[str] = None  # Set when the document is no longer on disk
+    size_bytes: Optional[int] = None
+    sha256: Optional[str] = None  # Hex digest, recorded on upload
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -222,12 +225,22 @@ class PaymentFile(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+class PaymentFileLinkBatch(BaseModel):
+    """Payment-file links (or unlinks) for one client, applied in one transaction"""
+    client_id: int
+    links: List[PaymentFile] = Field(..., min_length=1, max_length=1000)
+    
+    model_config = ConfigDict(from_attributes=True)
+
 class FileUpload(BaseModel):
     """File upload response model"""
     file_id: int
     client_id: int
     file_name: str
     onedrive_path: str
+    size_bytes: Optional[int] = None
+    sha256: Optional[str] = None
+    deduplicated: bool = False  # True when an existing file with the same content was reused
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -258,6 +271,18 @@ class ClientSnapshot(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+class SearchHit(BaseModel):
+    """Global search result"""
+    entity_type: Literal["client", "contact", "contract", "payment"]
+    entity_id: int
+    client_id: int
+    client_name: Optional[str] = None
+    title: Optional[str] = None
+    snippet: Optional[str] = None
+    rank: float
+    
+    model_config = ConfigDict(from_attributes=True)
+
 class PaginatedResponse(BaseModel):
     """Generic paginated response model"""
     total: int
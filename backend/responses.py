@@ -0,0 +1,191 @@
+# backend/responses.py
+# Fast JSON responses for trusted database rows, conditional document downloads
+
+from datetime import date, datetime
+from decimal import Decimal
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+import json
+import os
+
+import anyio
+
+from fastapi.responses import JSONResponse, FileResponse, Response
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    """
+    Encode the few non-JSON types that appear in database rows.
+    """
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize content to JSON bytes with the fastest available encoder.
+
+    Args:
+        content: Dicts/lists of plain values (e.g. rows from the query layer)
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response that serializes content directly, skipping FastAPI's
+    jsonable_encoder and response_model validation.
+
+    Only use for data we produced ourselves (database rows), never for
+    user input that still needs validating.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+
+def document_etag(size: int, mtime_ns: int) -> str:
+    """
+    Build a strong ETag from a document's size and modification time.
+
+    Args:
+        size: Size in bytes
+        mtime_ns: Modification time in nanoseconds
+
+    Returns:
+        Quoted ETag value
+    """
+    return f'"{size:x}-{mtime_ns:x}"'
+
+def _validator_headers(size: int, mtime_ns: int, cache_control: str) -> Dict[str, str]:
+    return {
+        "ETag": document_etag(size, mtime_ns),
+        "Last-Modified": formatdate(mtime_ns / 1e9, usegmt=True),
+        # Revalidate on every open, which costs a 304 when unchanged
+        "Cache-Control": cache_control
+    }
+
+def is_not_modified(request_headers: Headers, size: int, mtime_ns: int) -> bool:
+    """
+    Check a request's validators against a document's stat data, so a 304
+    can be answered before the document itself is fetched.
+
+    Args:
+        request_headers: Request headers
+        size: Size in bytes
+        mtime_ns: Modification time in nanoseconds
+
+    Returns:
+        True if the client's copy is current
+    """
+    if_none_match = request_headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or document_etag(size, mtime_ns) in tags
+
+    if_modified_since = request_headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one second resolution
+        return mtime_ns // 1_000_000_000 <= since
+    return False
+
+def not_modified_response(size: int, mtime_ns: int, cache_control: str = DEFAULT_CACHE_CONTROL) -> Response:
+    """
+    Build the 304 for a document the client already has.
+
+    Args:
+        size: Size in bytes
+        mtime_ns: Modification time in nanoseconds
+        cache_control: Cache-Control header value
+
+    Returns:
+        Empty 304 response with the document's validators
+    """
+    return Response(status_code=304, headers=_validator_headers(size, mtime_ns, cache_control))
+
+class DocumentResponse(FileResponse):
+    """
+    FileResponse for client documents that supports conditional requests.
+
+    ETag and Last-Modified come from the document at its origin, so they
+    stay the same whether the bytes are served from the shared folder or
+    the local cache. A matching If-None-Match (or If-Modified-Since) gets a
+    304; Range and If-Range are handled by FileResponse (206). When the
+    server offers the ASGI zero-copy extension, whole-file responses are
+    handed to it as an open file so it can use sendfile instead of reading
+    through Python; ranges still go through FileResponse. release, if
+    given, is called once the response is finished or abandoned, e.g. to
+    let the cache evict the file again.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        mtime_ns: int,
+        filename: Optional[str] = None,
+        media_type: Optional[str] = None,
+        cache_control: str = DEFAULT_CACHE_CONTROL,
+        release: Optional[Callable[[], None]] = None
+    ):
+        super().__init__(
+            path,
+            filename=filename,
+            media_type=media_type,
+            headers=_validator_headers(size, mtime_ns, cache_control)
+        )
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.cache_control = cache_control
+        self.release = release
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            if is_not_modified(Headers(scope=scope), self.size, self.mtime_ns):
+                await not_modified_response(self.size, self.mtime_ns, self.cache_control)(scope, receive, send)
+                return
+            zerocopy = 'http.response.zerocopy' in scope.get('extensions', {})
+            if zerocopy and scope['method'].upper() == 'GET' and 'range' not in Headers(scope=scope):
+                await self._send_zerocopy(send)
+                if self.background is not None:
+                    await self.background()
+                return
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.release is not None:
+                self.release()
+
+    async def _send_zerocopy(self, send: Send) -> None:
+        file = await anyio.to_thread.run_sync(open, self.path, 'rb')
+        try:
+            self.set_stat_headers(os.fstat(file.fileno()))
+            await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+            await send({
+                'type': 'http.response.zerocopy',
+                'file': file,
+                'count': int(self.headers['content-length']),
+                'more_body': False
+            })
+        finally:
+            await anyio.to_thread.run_sync(file.close)
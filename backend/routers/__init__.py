@@ -1,3 +1,4 @@
 from .clients import router as client_router
 from .payments import router as payment_router 
-from .files import router as file_router
\ No newline at end of file
+from .files import router as file_router
+from .search import router as search_router
\ No newline at end of file
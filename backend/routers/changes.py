@@ -0,0 +1,42 @@
+# backend/routers/changes.py
+# Change log endpoint for incremental sync
+
+from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from services import change_service, event_service
+from middleware import no_compression
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["changes"],
+    responses={404: {"description": "Not found"}}
+)
+
+@router.get("/")
+async def get_changes(
+    since: int = Query(0, ge=0, description="Last sequence number already applied"),
+    limit: int = Query(500, ge=1, le=1000),
+    client_id: Optional[int] = Query(None, description="Only changes to this client's entities")
+):
+    """Get the entities changed since a sequence number, with their current data"""
+    try:
+        return change_service.get_changes(since, limit, client_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stream")
+@no_compression
+async def stream_changes(
+    client_id: Optional[List[int]] = Query(None, description="Only changes to these clients; repeat for several"),
+    since: Optional[int] = Query(None, ge=0, description="Version already seen; missed changes are replayed"),
+    last_event_id: Optional[int] = Header(None)
+):
+    """
+    Push change notifications (entity type, id, client_id, version) as server-sent events
+    """
+    return StreamingResponse(
+        event_service.event_stream(set(client_id) if client_id else None, since if since is not None else last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
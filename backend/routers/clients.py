@@ -3,9 +3,10 @@
 
 from fastapi import APIRouter, HTTPException, Query, Form
 from typing import List, Optional, Dict, Any
-from services import client_service
+from services import client_service, history_service
 from models.schemas import Client, ClientSnapshot, Contract
-from database.queries import get_client_by_id, get_client_contracts
+from database.queries import get_client_by_id
+from responses import FastJSONResponse
 
 router = APIRouter(
     prefix="/clients",
@@ -14,8 +15,12 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[Client])
-async def get_all_clients():
+async def get_all_clients(
+    fast: bool = Query(False, description="Serialize database rows directly, skipping response validation")
+):
     """Get a list of all clients"""
+    if fast:
+        return FastJSONResponse(client_service.get_all_client_rows())
     return client_service.get_all_clients()
 
 @router.get("/by-provider")
@@ -23,6 +28,14 @@ async def get_clients_by_provider():
     """Get clients grouped by provider"""
     return client_service.get_clients_by_provider()
 
+@router.get("/history")
+async def get_clients_as_of(as_of: str = Query(..., description="ISO date or datetime; a date means the end of that day")):
+    """Get the clients that existed at a point in time"""
+    try:
+        return history_service.get_clients_as_of(as_of)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/{client_id}", response_model=ClientSnapshot)
 async def get_client_details(client_id: int):
     """Get detailed information for a specific client"""
@@ -31,6 +44,20 @@ async def get_client_details(client_id: int):
         raise HTTPException(status_code=404, detail="Client not found")
     return client
 
+@router.get("/{client_id}/history")
+async def get_client_as_of(
+    client_id: int,
+    as_of: str = Query(..., description="ISO date or datetime; a date means the end of that day")
+):
+    """Get a client with its contracts, contacts and payments at a point in time"""
+    try:
+        result = history_service.get_client_as_of(client_id, as_of)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not result:
+        raise HTTPException(status_code=404, detail="Client not found at that time")
+    return result
+
 @router.get("/{client_id}/compliance-status")
 async def get_client_compliance_status(client_id: int):
     """Get compliance status for a client"""
@@ -71,7 +98,7 @@ async def get_contracts_for_client(client_id: int):
         raise HTTPException(status_code=404, detail=f"Client not found with id {client_id}")
     
     # Get contracts for the client
-    contracts = get_client_contracts(client_id)
+    contracts = client_service.get_client_contracts(client_id)
     
     # Return contracts (empty list is fine)
     return contracts
\ No newline at end of file
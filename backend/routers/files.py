@@ -1,10 +1,15 @@
 # backend/routers/files.py
 # File handling endpoints
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Depends
-from fastapi.responses import FileResponse
-from typing import List, Optional
-from services import file_service
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Depends, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Iterator
+from starlette.concurrency import run_in_threadpool
+from services import file_service, scan_job_service, watcher_service, duplicate_service, preview_service, bundle_service
+from services import content_index_service, reconcile_service, match_service
+from responses import FastJSONResponse, DocumentResponse, document_etag, dumps, is_not_modified, not_modified_response
+from middleware import no_compression
+from models.schemas import PaymentFileLinkBatch
 import os
 
 router = APIRouter(
@@ -13,10 +18,93 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
+@router.get("/search")
+async def search_files(
+    q: str = Query(..., min_length=1, description="Search text; each word matches as a prefix"),
+    client_id: Optional[int] = Query(None, description="Limit results to one client"),
+    limit: int = Query(50, ge=1, le=200),
+    in_content: bool = Query(False, description="Search the text inside documents instead of names and paths")
+):
+    """Full-text search for files across all clients or one client"""
+    try:
+        if in_content:
+            return content_index_service.search_content(q, client_id, limit)
+        return file_service.search_files(q, client_id, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/content-index")
+async def get_content_index_status():
+    """Get progress of document text extraction and index totals"""
+    try:
+        return content_index_service.get_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/content-index")
+async def start_content_indexing(
+    max_workers: int = Query(content_index_service.DEFAULT_MAX_WORKERS, ge=1, le=16, description="Extraction processes")
+):
+    """Extract text from new and changed documents in the background"""
+    try:
+        return content_index_service.start_indexing(max_workers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/watcher")
+async def get_watcher_status():
+    """
+    Get the status of the shared folder watcher
+    """
+    return watcher_service.get_watcher_status()
+
+@router.get("/duplicates")
+async def find_duplicate_documents(
+    max_workers: int = Query(duplicate_service.DEFAULT_MAX_WORKERS, ge=1, le=32, description="Files hashed at once")
+):
+    """
+    Report documents with identical content anywhere in the shared folder
+    """
+    try:
+        return await run_in_threadpool(duplicate_service.find_duplicate_documents, max_workers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/reconcile")
+async def get_reconciliation_report(
+    rescan: bool = Query(True, description="Refresh the manifest from disk first"),
+    full: bool = Query(False, description="Rescan every folder, even those unchanged since the last scan")
+):
+    """
+    Report registered files missing from disk, unregistered files and moved files
+    """
+    try:
+        return await run_in_threadpool(reconcile_service.reconcile_files, False, rescan, full)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/reconcile")
+async def apply_reconciliation(
+    rescan: bool = Query(True, description="Refresh the manifest from disk first"),
+    full: bool = Query(False, description="Rescan every folder, even those unchanged since the last scan")
+):
+    """
+    Reconcile registered files with the disk and apply every fix in one transaction
+    """
+    try:
+        return await run_in_threadpool(reconcile_service.reconcile_files, True, rescan, full)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{client_id}")
-async def get_client_files(client_id: int):
+async def get_client_files(
+    client_id: int,
+    fast: bool = Query(False, description="Serialize database rows directly, skipping response encoding")
+):
     """Get all files for a client"""
     try:
+        if fast:
+            return FastJSONResponse(file_service.get_client_files(client_id))
         return file_service.get_client_files(client_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -29,6 +117,11 @@ async def get_payment_files(payment_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _read_upload(file: UploadFile):
+    """Yield an UploadFile's content in chunks."""
+    while chunk := await file.read(file_service.UPLOAD_CHUNK_SIZE):
+        yield chunk
+
 @router.post("/upload/{client_id}")
 async def upload_file(
     client_id: int,
@@ -42,16 +135,52 @@ async def upload_file(
         if not file.filename:
             raise HTTPException(status_code=400, detail="No file uploaded")
         
-        # Save the file
-        result = file_service.save_file(
+        # Save the file in chunks, off the event loop
+        result = await file_service.save_file_stream(
             client_id=client_id,
-            file_obj=file.file,
+            chunks=_read_upload(file),
             filename=file.filename,
             for_payment=for_payment,
             year=year
         )
+        if result.get("success"):
+            content_index_service.queue_indexing()
         
         return result
+    except file_service.UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/upload/{client_id}")
+async def upload_file_stream(
+    request: Request,
+    client_id: int,
+    filename: str = Query(..., description="Name to save the file as"),
+    for_payment: bool = Query(False),
+    year: Optional[int] = Query(None)
+):
+    """Upload a file sent as the raw request body, streamed straight to disk"""
+    # Reject oversized uploads before reading any of the body
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > file_service.MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File exceeds the upload limit")
+    
+    try:
+        result = await file_service.save_file_stream(
+            client_id=client_id,
+            chunks=request.stream(),
+            filename=os.path.basename(filename),
+            for_payment=for_payment,
+            year=year
+        )
+        if result.get("success"):
+            content_index_service.queue_indexing()
+        return result
+    except file_service.UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -64,10 +193,75 @@ async def link_file_to_payment(payment_id: int, file_id: int):
         result = file_service.link_file_to_payment(payment_id, file_id)
         if not result["success"]:
             raise HTTPException(status_code=500, detail="Failed to link file")
+        # Payment documents are the ones the viewer opens, so have the preview ready
+        preview_service.warm_previews([file_id])
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/link-batch")
+async def link_files_to_payments(batch: PaymentFileLinkBatch):
+    """Link many files to payments of one client in one transaction"""
+    try:
+        pairs = [(link.payment_id, link.file_id) for link in batch.links]
+        result = file_service.update_payment_links(batch.client_id, pairs)
+        preview_service.warm_previews(sorted({r["file_id"] for r in result["results"] if r["status"] == "linked"}))
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/unlink-batch")
+async def unlink_files_from_payments(batch: PaymentFileLinkBatch):
+    """Unlink many files from payments of one client in one transaction"""
+    try:
+        pairs = [(link.payment_id, link.file_id) for link in batch.links]
+        return file_service.update_payment_links(batch.client_id, pairs, unlink=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/usage/{file_id}")
+async def get_file_usage(file_id: int):
+    """List the payments a file is linked to"""
+    try:
+        result = file_service.get_file_usage(file_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return result
+
+@router.get("/usage-counts/{client_id}")
+async def get_client_file_usage(client_id: int):
+    """Count the payments linked to each of a client's files"""
+    try:
+        return file_service.get_client_file_usage(client_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/match/{client_id}")
+async def propose_payment_links(
+    client_id: int,
+    min_confidence: float = Query(0.5, ge=0, le=1, description="Lowest match score to propose"),
+    path: Optional[str] = Query(None, description="Only match files under this folder")
+):
+    """Propose payment links for a client's files from the provider and period in their names"""
+    try:
+        return await run_in_threadpool(match_service.match_client_files, client_id, min_confidence, path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/match/{client_id}")
+async def apply_payment_matches(
+    client_id: int,
+    min_confidence: float = Query(0.8, ge=0, le=1, description="Lowest match score to link"),
+    path: Optional[str] = Query(None, description="Only match files under this folder")
+):
+    """Link a client's files to the payments they match in one transaction"""
+    try:
+        return await run_in_threadpool(match_service.match_client_files, client_id, min_confidence, path, True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/link/{payment_id}/{file_id}")
 async def unlink_file_from_payment(payment_id: int, file_id: int):
     """Unlink a file from a payment"""
@@ -102,20 +296,112 @@ async def get_file_content(file_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/download/{file_id}")
-async def download_file(file_id: int):
+@no_compression
+async def download_file(file_id: int, request: Request):
     """Download a file"""
     try:
-        # Get file information
-        file_info = file_service.get_file_content(file_id)
+        # Answer conditional requests from stat data, before the file is fetched
+        is_current = lambda size, mtime_ns: is_not_modified(request.headers, size, mtime_ns)
+        file_info = await run_in_threadpool(file_service.get_file_download, file_id, is_current)
         if not file_info["success"]:
             raise HTTPException(status_code=404, detail=file_info["message"])
+        if file_info["not_modified"]:
+            return not_modified_response(file_info["size"], file_info["mtime_ns"])
         
-        # Return file as download
-        return FileResponse(
-            path=file_info["file_path"],
+        # Return file as download (conditional and range requests supported)
+        if file_info["local_path"] is None:
+            return StreamingResponse(
+                file_info["stream"],
+                media_type=file_info["mime_type"],
+                headers={
+                    "Content-Disposition": f'attachment; filename="{file_info["file_name"]}"',
+                    "ETag": document_etag(file_info["size"], file_info["mtime_ns"])
+                }
+            )
+        return DocumentResponse(
+            path=file_info["local_path"],
+            size=file_info["size"],
+            mtime_ns=file_info["mtime_ns"],
             filename=file_info["file_name"],
-            media_type=file_info["mime_type"]
+            media_type=file_info["mime_type"],
+            release=file_info["release"]
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/preview/{file_id}")
+@no_compression
+async def get_file_preview(
+    file_id: int,
+    kind: str = Query("thumbnail", pattern="^(thumbnail|text)$", description="thumbnail (PNG) or text")
+):
+    """Get a cached thumbnail or text preview, generating it on first request"""
+    try:
+        preview = await run_in_threadpool(preview_service.get_cached_preview, file_id, kind)
+        if preview is None:
+            preview = await run_in_threadpool(preview_service.get_preview, file_id, kind)
+            if not preview["success"]:
+                raise HTTPException(status_code=404, detail=preview["message"])
+        stat = os.stat(preview["path"])
+        return DocumentResponse(
+            path=preview["path"],
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            media_type=preview["media_type"]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/previews/warm")
+async def warm_previews(limit: int = Query(100, ge=1, le=1000, description="Files linked to the most recent payments")):
+    """Generate previews in the background for files linked to recent payments"""
+    try:
+        return {"queued": preview_service.warm_recent_payment_previews(limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _zip_response(files: list, filename: str) -> StreamingResponse:
+    if not files:
+        raise HTTPException(status_code=404, detail="No files to bundle")
+    return StreamingResponse(
+        bundle_service.stream_zip(files),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/bundle/payment/{payment_id}")
+@no_compression
+async def download_payment_bundle(payment_id: int):
+    """Download all files linked to a payment as a ZIP, streamed as it is built"""
+    try:
+        files = bundle_service.get_payment_bundle_files(payment_id)
+        return _zip_response(files, f"payment_{payment_id}_documents.zip")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/bundle/client/{client_id}")
+@no_compression
+async def download_client_bundle(
+    client_id: int,
+    period_type: Optional[str] = Query(None, pattern="^(month|quarter)$", description="Only files linked to payments for this period"),
+    period: Optional[int] = Query(None, ge=1, le=12, description="Month or quarter number"),
+    year: Optional[int] = Query(None, description="Year of the period")
+):
+    """Download a client's files, or one period's payment files, as a ZIP"""
+    try:
+        files = bundle_service.get_client_bundle_files(client_id, period_type, period, year)
+        suffix = f"_{year}_{'M' if period_type == 'month' else 'Q'}{period}" if period_type else ""
+        return _zip_response(files, f"client_{client_id}{suffix}_documents.zip")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -130,16 +416,84 @@ async def search_client_files(client_id: int, search: str = Query(...)):
 @router.get("/scan-directory/{client_id}")
 async def scan_client_directory(
     client_id: int, 
-    register: bool = Query(False, description="Whether to register found files in the database")
+    register: bool = Query(False, description="Whether to register found files in the database"),
+    full: bool = Query(False, description="List every folder, even those unchanged since the last scan"),
+    changes_only: bool = Query(False, description="Only return files added, changed or removed since the last scan")
 ):
     """
     Scan a client's directory structure and optionally register files
     """
     try:
-        return file_service.scan_client_directory(client_id, register)
+        return file_service.scan_client_directory(client_id, register, full, changes_only)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/browse/{client_id}")
+async def browse_client_directory(
+    client_id: int,
+    path: str = Query("", description="Folder relative to the client folder"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(200, ge=1, le=1000)
+):
+    """
+    List the subfolders and files of one folder in a client's directory
+    """
+    try:
+        result = await run_in_threadpool(file_service.list_client_directory, client_id, path, offset, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
+# Entries per streamed chunk, so compression and socket writes aren't per line
+NDJSON_BATCH_SIZE = 100
+
+def _ndjson_lines(entries) -> Iterator[bytes]:
+    batch = []
+    for entry in entries:
+        batch.append(dumps(entry) + b"\n")
+        if len(batch) >= NDJSON_BATCH_SIZE:
+            yield b"".join(batch)
+            batch.clear()
+    if batch:
+        yield b"".join(batch)
+
+@router.get("/scan-directory/{client_id}/stream")
+async def stream_client_directory(client_id: int):
+    """
+    Stream every folder and file in a client's directory as NDJSON, one entry per line
+    """
+    return StreamingResponse(
+        _ndjson_lines(file_service.iter_client_directory(client_id)),
+        media_type="application/x-ndjson"
+    )
+
+@router.post("/scan-all")
+async def scan_all_clients(
+    register: bool = Query(True, description="Whether to register found files in the database"),
+    max_workers: int = Query(scan_job_service.DEFAULT_MAX_WORKERS, ge=1, le=32, description="Client folders scanned at once")
+):
+    """
+    Start a background job that scans every client's directory
+    """
+    try:
+        return scan_job_service.start_scan_all_job(register, max_workers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/scan-jobs/{job_id}")
+async def get_scan_job(job_id: str):
+    """
+    Get progress and throughput of a scan job
+    """
+    job = scan_job_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return job
+
 @router.post("/register-existing/{client_id}")
 async def register_existing_file(
     client_id: int,
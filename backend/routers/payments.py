@@ -7,6 +7,7 @@ from typing import List, Optional, Dict, Any
 from services import payment_service
 from models.schemas import PaymentCreate, PaymentUpdate, PaymentWithDetails, ExpectedFeeRequest, ExpectedFeeResponse, PaginatedResponse
 from database.queries import get_client_by_id, validate_client_contract
+from responses import FastJSONResponse
 
 router = APIRouter(
     prefix="/payments",
@@ -18,10 +19,13 @@ router = APIRouter(
 async def get_client_payments(
     client_id: int = Path(..., description="Client ID"),
     page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100)
+    page_size: int = Query(20, ge=1, le=100),
+    fast: bool = Query(False, description="Serialize database rows directly, skipping response validation")
 ):
     """Get paginated payment history for a client"""
     try:
+        if fast:
+            return FastJSONResponse(payment_service.get_client_payments_page(client_id, page, page_size))
         return payment_service.get_client_payments(client_id, page, page_size)
     except HTTPException as e:
         raise e
@@ -69,6 +73,14 @@ async def delete_payment(payment_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{payment_id}/restore")
+async def restore_payment(payment_id: int):
+    """Restore a deleted payment"""
+    result = payment_service.restore_payment(payment_id)
+    if not result["success"]:
+        raise HTTPException(status_code=404 if result["status"] == "not_found" else 409, detail=result["message"])
+    return result
+
 @router.post("/expected-fee", response_model=ExpectedFeeResponse)
 async def calculate_expected_fee(request: ExpectedFeeRequest):
     """Calculate expected fee based on contract and assets"""
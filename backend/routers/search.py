@@ -0,0 +1,29 @@
+# backend/routers/search.py
+# Global search endpoint
+
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from services import search_service
+from models.schemas import SearchHit
+
+router = APIRouter(
+    prefix="/search",
+    tags=["search"],
+    responses={404: {"description": "Not found"}}
+)
+
+@router.get("/", response_model=List[SearchHit])
+async def global_search(
+    q: str = Query(..., min_length=1, description="Search text; each word matches as a prefix"),
+    types: Optional[str] = Query(None, description="Comma-separated entity types: client,contact,contract,payment"),
+    client_id: Optional[int] = Query(None, description="Limit results to one client"),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """Search clients, contacts, contracts and payment notes in one ranked query"""
+    entity_types = [t.strip() for t in types.split(',') if t.strip()] if types else None
+    try:
+        return search_service.global_search(q, entity_types, client_id, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
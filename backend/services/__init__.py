@@ -10,4 +10,6 @@ from .payment_service import calculate_expected_fee, get_available_periods
 
 from .file_service import get_client_files, get_payment_files, save_file
 from .file_service import link_file_to_payment, unlink_file_from_payment, delete_file
-from .file_service import get_file_content, search_client_files
\ No newline at end of file
+from .file_service import get_file_content, search_client_files, search_files
+
+from .search_service import global_search
\ No newline at end of file
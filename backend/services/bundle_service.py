@@ -0,0 +1,144 @@
+# backend/services/bundle_service.py
+# ZIP bundles of a payment's or client's documents, streamed as they are built
+
+from database.queries import files as file_queries
+from database.queries import payments as payment_queries
+from services import file_service
+from typing import List, Dict, Any, Optional, Iterator
+import io
+import posixpath
+import time
+import zipfile
+
+BUNDLE_CHUNK_SIZE = 1024 * 1024
+
+# Already compressed - deflating again costs CPU for nothing
+STORED_EXTENSIONS = ('.pdf', '.png', '.jpeg', '.jpg', '.tiff', '.webp', '.docx', '.xlsx')
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink that hands back whatever zipfile wrote since the last call."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def get_payment_bundle_files(payment_id: int) -> List[Dict[str, Any]]:
+    """
+    Get the files linked to a payment.
+
+    Args:
+        payment_id: Payment ID
+
+    Returns:
+        List of file dictionaries
+    """
+    return payment_queries.get_payment_files(payment_id)
+
+def get_client_bundle_files(
+    client_id: int,
+    period_type: Optional[str] = None,
+    period: Optional[int] = None,
+    year: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get a client's files, or only those linked to payments for one period.
+
+    Args:
+        client_id: Client ID
+        period_type: 'month' or 'quarter' (with period and year)
+        period: Month or quarter number
+        year: Year
+
+    Returns:
+        List of file dictionaries, each file once
+    """
+    if period_type is None:
+        return file_queries.get_client_files(client_id)
+
+    if period is None or year is None:
+        raise ValueError("period and year are required with period_type")
+    if period_type not in ('month', 'quarter'):
+        raise ValueError("period_type must be 'month' or 'quarter'")
+
+    payments = payment_queries.get_payments_by_period(client_id, period_type == 'month', period, year)
+    files: Dict[int, Dict[str, Any]] = {}
+    for payment in payments:
+        for file in payment_queries.get_payment_files(payment['payment_id']):
+            files.setdefault(file['file_id'], file)
+    return list(files.values())
+
+def _archive_names(files: List[Dict[str, Any]]) -> List[str]:
+    """
+    Names inside the archive: paths below the folder all files share, with
+    a counter added if two files would collide.
+    """
+    paths = [f['onedrive_path'].replace('\\', '/').lstrip('/') for f in files]
+    folders = [posixpath.dirname(path) for path in paths]
+    common = posixpath.commonpath(folders) if folders and all(folders) else ''
+
+    names, seen = [], set()
+    for path in paths:
+        name = posixpath.relpath(path, common) if common else path
+        base, extension = posixpath.splitext(name)
+        counter = 1
+        while name.lower() in seen:
+            counter += 1
+            name = f"{base} ({counter}){extension}"
+        seen.add(name.lower())
+        names.append(name)
+    return names
+
+def _zip_pieces(files: List[Dict[str, Any]]) -> Iterator[bytes]:
+    storage = file_service.get_storage()
+    sink = _ZipStream()
+    missing = []
+
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as archive:
+        for file, name in zip(files, _archive_names(files)):
+            try:
+                source = storage.open(file['onedrive_path'])
+            except OSError:
+                missing.append(file['onedrive_path'])
+                continue
+
+            stat = storage.stat(file['onedrive_path'])
+            modified = time.localtime(stat.mtime_ns / 1e9) if stat else time.localtime()
+            info = zipfile.ZipInfo(name, date_time=tuple(max(modified[:6], (1980, 1, 1, 0, 0, 0))))
+            info.compress_type = zipfile.ZIP_STORED if name.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+            with source, archive.open(info, 'w', force_zip64=True) as entry:
+                for chunk in iter(lambda: source.read(BUNDLE_CHUNK_SIZE), b''):
+                    entry.write(chunk)
+                    yield sink.take()
+            yield sink.take()
+
+        if missing:
+            archive.writestr("MISSING.txt", "Not found on disk:\n" + "\n".join(missing) + "\n")
+    yield sink.take()
+
+def stream_zip(files: List[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    Build a ZIP of documents and yield it piece by piece.
+
+    Nothing is buffered beyond one chunk: zipfile writes each entry with a
+    trailing data descriptor, so it never needs to seek back, and each
+    document is copied through in BUNDLE_CHUNK_SIZE reads. Documents that
+    can't be read are listed in MISSING.txt at the end of the archive.
+
+    Args:
+        files: File dictionaries (onedrive_path, file_name)
+
+    Returns:
+        Iterator of ZIP bytes
+    """
+    return (piece for piece in _zip_pieces(files) if piece)
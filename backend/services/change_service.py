@@ -0,0 +1,118 @@
+# backend/services/change_service.py
+# Incremental sync from the change log
+
+from database.queries import changes as change_queries
+from utils import row_from_cents
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import os
+import threading
+import time
+
+# Days changes are kept; a client that last synced longer ago reloads everything
+RETENTION_DAYS = float(os.environ.get("CHANGE_LOG_RETENTION_DAYS", "30"))
+
+# Seconds between prunes while the app runs
+PRUNE_INTERVAL = 3600.0
+
+_last_prune: Optional[float] = None
+_prune_lock = threading.Lock()
+
+def prune_changes() -> int:
+    """
+    Delete changes older than the retention period.
+
+    Returns:
+        Number of changes deleted
+    """
+    global _last_prune
+    with _prune_lock:
+        _last_prune = time.monotonic()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=RETENTION_DAYS)
+    return change_queries.prune_changes(cutoff.strftime("%Y-%m-%d %H:%M:%S"))
+
+def _prune_if_due() -> None:
+    with _prune_lock:
+        due = _last_prune is None or time.monotonic() - _last_prune >= PRUNE_INTERVAL
+    if due:
+        prune_changes()
+
+def is_pruned(since: int) -> bool:
+    """
+    Check whether changes after a sequence number were pruned, so a client
+    that synced up to it has to reload instead.
+
+    Args:
+        since: Last sequence number the client applied
+
+    Returns:
+        True if the log no longer covers everything after since
+    """
+    oldest = change_queries.get_oldest_seq()
+    return oldest is not None and since < oldest - 1
+
+def get_changes(since: int = 0, limit: int = 500, client_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get the entities changed after a sequence number, each once with its
+    current row, so a client can apply them instead of refetching lists.
+
+    Several changes to one entity in the page collapse into the latest.
+    Deleted entities (removed or soft-deleted) come with data None. Pass
+    the returned next as since to continue; has_more means the page was
+    full. reset means changes after since were pruned: reload everything,
+    then continue from next.
+
+    Args:
+        since: Last sequence number already applied (0 for everything)
+        limit: Maximum number of log entries to read
+        client_id: Only changes to this client's entities
+
+    Returns:
+        Dictionary with since, next, has_more, reset and the list of changes
+    """
+    _prune_if_due()
+    if is_pruned(since):
+        return {
+            "since": since,
+            "next": change_queries.get_latest_seq(),
+            "has_more": False,
+            "reset": True,
+            "changes": []
+        }
+    log = change_queries.get_changes(since, limit, None if client_id is None else [client_id])
+
+    latest: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for entry in log:
+        key = (entry['entity_type'], entry['entity_id'])
+        latest.pop(key, None)
+        latest[key] = entry
+
+    ids_by_type: Dict[str, list] = {}
+    for entity_type, entity_id in latest:
+        ids_by_type.setdefault(entity_type, []).append(entity_id)
+    rows = {
+        entity_type: change_queries.get_entities(entity_type, entity_ids)
+        for entity_type, entity_ids in ids_by_type.items()
+    }
+
+    changes = []
+    for (entity_type, entity_id), entry in latest.items():
+        row = rows[entity_type].get(entity_id)
+        deleted = row is None or row.get('valid_to') is not None
+        changes.append({
+            "seq": entry['seq'],
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "client_id": entry['client_id'],
+            "op": "delete" if deleted else entry['op'],
+            "changed_at": entry['changed_at'],
+            "data": None if deleted else row_from_cents(row)
+        })
+
+    return {
+        "since": since,
+        "next": log[-1]['seq'] if log else since,
+        "has_more": len(log) == limit,
+        "reset": False,
+        "changes": changes
+    }
@@ -2,14 +2,24 @@
 # Client-related business logic
 
 from database.queries import clients as client_queries
+from services import path_service, watcher_service
 from typing import List, Dict, Any, Optional
+from decimal import Decimal
 from models.schemas import Client, ClientSnapshot, Contract, ClientMetrics
+from utils import row_from_cents, from_cents, to_cents
 
 def get_all_clients() -> List[Client]:
 
     client_data = client_queries.get_all_clients()
     return [Client(**client) for client in client_data]
 
+def get_all_client_rows() -> List[Dict[str, Any]]:
+    """
+    Get all clients as plain dictionaries for the fast response path.
+    Rows come straight from the clients table, so they need no validation.
+    """
+    return client_queries.get_all_clients()
+
 def get_clients_by_provider() -> List[Dict[str, Any]]:
 
     clients = client_queries.get_clients_by_provider()
@@ -62,10 +72,10 @@ def get_client_snapshot(client_id: int) -> Optional[ClientSnapshot]:
             print(f"No contracts found for client ID: {client_id}")
             contracts = []
         else:
-            contracts = [Contract(**contract) for contract in client_data['contracts']]
+            contracts = [Contract(**row_from_cents(contract)) for contract in client_data['contracts']]
         
         # Create metrics if available
-        metrics = ClientMetrics(**metrics_data) if metrics_data else None
+        metrics = ClientMetrics(**row_from_cents(metrics_data)) if metrics_data else None
         
         # Create and return snapshot
         return ClientSnapshot(
@@ -111,8 +121,8 @@ def calculate_fee_summary(client_id: int) -> Dict[str, Any]:
     
     # Calculate fees based on type
     if fee_type == 'flat':
-        flat_rate = contract['flat_rate']
-        if flat_rate is None:
+        flat_rate_cents = contract['flat_rate_cents']
+        if flat_rate_cents is None:
             return {
                 'monthly': None,
                 'quarterly': None,
@@ -122,18 +132,8 @@ def calculate_fee_summary(client_id: int) -> Dict[str, Any]:
             }
         
         # The flat_rate IS the payment amount for the specified schedule
-        payment = flat_rate
+        payment_cents = flat_rate_cents
         
-        # For display purposes only, convert to other payment schedules
-        if contract['payment_schedule'] == 'monthly':
-            monthly = payment
-            quarterly = monthly * 3
-            annual = monthly * 12
-        else:  # quarterly
-            quarterly = payment
-            monthly = quarterly / 3
-            annual = quarterly * 4
-            
     elif fee_type in ('percentage', 'percent'):
         percent_rate = contract['percent_rate']
         if percent_rate is None:
@@ -160,17 +160,7 @@ def calculate_fee_summary(client_id: int) -> Dict[str, Any]:
         
         # Calculate the actual payment amount based on assets and rate
         # The percent_rate is already in the correct format, no adjustments needed
-        payment = last_assets * float(percent_rate)
-        
-        # For display purposes only, convert to other payment frequencies
-        if contract['payment_schedule'] == 'monthly':
-            monthly = payment
-            quarterly = monthly * 3
-            annual = monthly * 12
-        else:  # quarterly
-            quarterly = payment
-            monthly = quarterly / 3
-            annual = quarterly * 4
+        payment_cents = to_cents(Decimal(repr(last_assets)) * Decimal(repr(percent_rate)))
     else:
         # Unknown fee type
         return {
@@ -180,15 +170,37 @@ def calculate_fee_summary(client_id: int) -> Dict[str, Any]:
             'fee_type': fee_type,
             'rate': None
         }
+    
+    # For display purposes only, convert to other payment schedules (in cents)
+    if contract['payment_schedule'] == 'monthly':
+        monthly_cents = payment_cents
+        quarterly_cents = monthly_cents * 3
+        annual_cents = monthly_cents * 12
+    else:  # quarterly
+        quarterly_cents = payment_cents
+        monthly_cents = to_cents(Decimal(quarterly_cents) / 300)
+        annual_cents = quarterly_cents * 4
             
     return {
-        'monthly': round(monthly, 2) if 'monthly' in locals() else None,
-        'quarterly': round(quarterly, 2) if 'quarterly' in locals() else None,
-        'annual': round(annual, 2) if 'annual' in locals() else None,
+        'monthly': from_cents(monthly_cents),
+        'quarterly': from_cents(quarterly_cents),
+        'annual': from_cents(annual_cents),
         'fee_type': fee_type,
-        'rate': contract['percent_rate'] if fee_type in ('percentage', 'percent') else contract['flat_rate']
+        'rate': contract['percent_rate'] if fee_type in ('percentage', 'percent') else from_cents(contract['flat_rate_cents'])
     }
 
+def get_client_contracts(client_id: int) -> List[Dict[str, Any]]:
+    """
+    Get all valid contracts for a client with dollar-valued rates.
+    
+    Args:
+        client_id: Client ID
+        
+    Returns:
+        List of contract dictionaries
+    """
+    return [row_from_cents(contract) for contract in client_queries.get_client_contracts(client_id)]
+
 def update_client_folder_path(client_id: int, folder_path: str) -> Dict[str, Any]:
     """
     Update a client's OneDrive folder path.
@@ -217,6 +229,9 @@ def update_client_folder_path(client_id: int, folder_path: str) -> Dict[str, Any
             "message": "Failed to update client folder path"
         }
     
+    path_service.invalidate_client(client_id)
+    watcher_service.reload_client_folders()
+    
     return {
         "success": True,
         "client_id": client_id,
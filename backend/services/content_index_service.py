@@ -0,0 +1,255 @@
+# backend/services/content_index_service.py
+# Background pipeline that extracts document text into the content search index
+
+from database.queries import files as file_queries
+from services import file_service
+from services.storage import CachedStorage
+from services.text_extraction import EXTRACTABLE_EXTENSIONS, extract_document
+from concurrent.futures import Executor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional, List, Union
+from datetime import datetime
+import multiprocessing
+import os
+import threading
+import time
+
+# PDF parsing is CPU bound and holds the GIL, so extraction runs in processes
+DEFAULT_MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# Passes with this many files or fewer (e.g. after one upload) extract in
+# the indexing thread rather than waking the worker processes
+INLINE_MAX_FILES = 2
+
+# Index new documents automatically (at startup, after uploads and watcher syncs)
+AUTO_INDEX = os.environ.get("CONTENT_INDEX", "1") == "1"
+
+_status: Dict[str, Any] = {
+    "state": "idle",
+    "files_total": 0,
+    "files_done": 0,
+    "indexed": 0,
+    "failed": 0,
+    "started_at": None,
+    "finished_at": None,
+    "elapsed_seconds": 0.0
+}
+_status_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_rerun = threading.Event()
+_stopping = threading.Event()
+
+# Worker processes are started once and reused by every pass
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """The shared worker pool, restarted if its size changes."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != max_workers:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = max_workers
+        return _pool
+
+def _discard_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+class _InlineExecutor(Executor):
+    """Runs extraction in the calling thread (max_workers=0), for small runs and tests."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+def _source(storage, path: str) -> Union[str, bytes]:
+    """A path worker processes can open themselves, or the document content."""
+    local = storage.local_path(path)
+    if local is not None and os.path.isfile(local):
+        return str(local)
+    with storage.open(path) as f:
+        return f.read()
+
+def _record(file: Dict[str, Any], result: Dict[str, Any]) -> bool:
+    """Store one extraction result; returns True if the file now has indexed text."""
+    if result["sha256"] and result["sha256"] != file["sha256"]:
+        # Backfills hashes of files registered from disk and corrects stale ones
+        file_queries.set_file_content_hash(file["file_id"], result["size_bytes"], result["sha256"])
+    file_queries.save_file_content(
+        file["file_id"], result["sha256"], result["text"], result["error"], file["disk_size"], file["disk_mtime_ns"]
+    )
+    return result["error"] is None
+
+def index_pending(max_workers: int = DEFAULT_MAX_WORKERS, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Extract text for every file that is new, whose content hash changed or
+    that a scan found changed on disk (which also refreshes its hash).
+
+    Extraction runs in a shared process pool (small passes run inline); at
+    most two documents per worker are in flight, so memory stays bounded however large the backlog is. Results
+    are written from this thread, one short transaction per file.
+
+    Args:
+        max_workers: Worker processes (0 extracts in the calling thread)
+        limit: Maximum number of files to process
+
+    Returns:
+        Dictionary with files_total, indexed and failed counts
+    """
+    pending = file_queries.get_files_needing_extraction(EXTRACTABLE_EXTENSIONS, limit)
+    with _status_lock:
+        _status["files_total"] += len(pending)
+
+    storage = file_service.get_storage()
+    # Every document is read once; don't let that evict what people are viewing
+    if isinstance(storage, CachedStorage):
+        storage = storage.origin
+
+    if max_workers > 0 and len(pending) > INLINE_MAX_FILES:
+        executor: Executor = _get_pool(max_workers)
+    else:
+        executor = _InlineExecutor()
+
+    counts = {"files_total": len(pending), "indexed": 0, "failed": 0}
+
+    def finish(file: Dict[str, Any], result: Dict[str, Any]) -> None:
+        key = "indexed" if _record(file, result) else "failed"
+        counts[key] += 1
+        with _status_lock:
+            _status[key] += 1
+            _status["files_done"] += 1
+
+    in_flight: Dict[Future, Dict[str, Any]] = {}
+    for file in pending:
+        extension = os.path.splitext(file["onedrive_path"])[1].lower()
+        try:
+            source = _source(storage, file["onedrive_path"])
+        except OSError as e:
+            finish(file, {"sha256": None, "size_bytes": None, "text": None, "error": f"Unreadable: {e}"})
+            continue
+        in_flight[executor.submit(extract_document, source, extension)] = file
+
+        if len(in_flight) >= max(1, max_workers) * 2:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(in_flight.pop(future), future.result())
+
+    for future in list(in_flight):
+        finish(in_flight.pop(future), future.result())
+
+    return counts
+
+def _run(max_workers: int) -> None:
+    global _thread
+    started = time.monotonic()
+    while True:
+        _rerun.clear()
+        try:
+            index_pending(max_workers)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. on a malformed PDF); start fresh ones next pass
+            print(f"Error indexing document content: {e}")
+            _discard_pool()
+        except Exception as e:
+            print(f"Error indexing document content: {e}")
+
+        with _status_lock:
+            # Files registered while this pass ran are picked up by another one
+            if _rerun.is_set() and not _stopping.is_set():
+                continue
+            _status["state"] = "idle"
+            _status["finished_at"] = datetime.now().isoformat()
+            _status["elapsed_seconds"] = round(time.monotonic() - started, 3)
+            _thread = None
+            return
+
+def start_indexing(max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Any]:
+    """
+    Index pending documents in the background. If a pass is already
+    running, another one follows it so newly added files are not missed.
+
+    Args:
+        max_workers: Worker processes
+
+    Returns:
+        Status dictionary
+    """
+    global _thread
+    with _status_lock:
+        if _thread is not None:
+            _rerun.set()
+        elif not _stopping.is_set():
+            _status.update(
+                state="running", files_total=0, files_done=0, indexed=0, failed=0,
+                started_at=datetime.now().isoformat(), finished_at=None, elapsed_seconds=0.0
+            )
+            _thread = threading.Thread(target=_run, args=(max_workers,), name="content-index", daemon=True)
+            _thread.start()
+    return get_status()
+
+def queue_indexing() -> None:
+    """Start a background pass for newly added documents, if automatic indexing is on."""
+    if AUTO_INDEX:
+        start_indexing()
+
+def stop_indexing(timeout: Optional[float] = None) -> None:
+    """
+    Stop background indexing, e.g. at shutdown: queued documents are
+    dropped, the worker processes exit, and the running pass ends.
+
+    Args:
+        timeout: Seconds to wait for the indexing thread (None waits indefinitely)
+    """
+    _stopping.set()
+    _discard_pool()
+    wait_for_indexing(timeout)
+
+def wait_for_indexing(timeout: Optional[float] = None) -> bool:
+    """
+    Wait for the background pass to finish.
+
+    Args:
+        timeout: Seconds to wait (None waits indefinitely)
+
+    Returns:
+        True if no pass is running any more
+    """
+    thread = _thread
+    if thread is not None:
+        thread.join(timeout)
+    return _thread is None
+
+def get_status() -> Dict[str, Any]:
+    """
+    Get progress of the current or last pass and index totals.
+
+    Returns:
+        Status dictionary
+    """
+    with _status_lock:
+        status = dict(_status)
+    status["totals"] = file_queries.get_content_index_counts()
+    return status
+
+def search_content(search_term: str, client_id: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Search the extracted text of documents.
+
+    Args:
+        search_term: Search term (each word matches as a prefix)
+        client_id: Optional client to restrict the search to
+        limit: Maximum number of results
+
+    Returns:
+        List of matching file dictionaries with a content snippet, best matches first
+    """
+    return file_queries.search_file_content(search_term, client_id, limit)
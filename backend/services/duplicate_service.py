@@ -0,0 +1,131 @@
+# backend/services/duplicate_service.py
+# Report of duplicate documents across the shared folder
+
+from database.queries import files as file_queries
+from services import file_service
+from services.manifest_service import to_manifest_path
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterable, Callable, Tuple
+import hashlib
+import os
+import time
+
+# Bytes hashed to split same-size files before hashing them in full
+PARTIAL_HASH_BYTES = 64 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_WORKERS = 8
+
+def hash_file(path: str, limit: Optional[int] = None) -> Optional[str]:
+    """
+    SHA-256 of a file, or of its first limit bytes.
+
+    Args:
+        path: Absolute path
+        limit: Only hash this many bytes from the start
+
+    Returns:
+        Hex digest, or None if the file could not be read
+    """
+    digest = hashlib.sha256()
+    remaining = limit
+    try:
+        with open(path, 'rb') as f:
+            while remaining is None or remaining > 0:
+                chunk = f.read(HASH_CHUNK_SIZE if remaining is None else min(HASH_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+    except OSError as e:
+        print(f"Error hashing {path}: {e}")
+        return None
+    return digest.hexdigest()
+
+def _group_by(paths: Iterable[str], key: Callable[[str], Optional[str]], pool: ThreadPoolExecutor) -> List[Tuple[str, List[str]]]:
+    """Hash paths in parallel and keep only (hash, paths) groups with more than one member."""
+    paths = list(paths)
+    groups: Dict[str, List[str]] = {}
+    for path, value in zip(paths, pool.map(key, paths)):
+        if value is not None:
+            groups.setdefault(value, []).append(path)
+    return [(value, group) for value, group in groups.items() if len(group) > 1]
+
+def find_duplicate_documents(max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Any]:
+    """
+    Find documents with identical content anywhere in the shared folder.
+
+    Files are first grouped by size, which needs no reads; only sizes shared
+    by several files are hashed. Those are split on a hash of their first
+    64 KB before the survivors are hashed in full; for files no larger
+    than that, the first hash already is the full one. Hashing runs in a thread
+    pool (hashlib releases the GIL on large buffers, and reads overlap).
+
+    Args:
+        max_workers: Maximum number of files hashed at once
+
+    Returns:
+        Dictionary with duplicate groups (largest wasted space first) and
+        scan statistics
+    """
+    started = time.monotonic()
+    shared_folder, _ = file_service.get_shared_folder_path()
+
+    by_size: Dict[int, List[str]] = {}
+    sizes: Dict[str, int] = {}
+    files_scanned = 0
+    for root, dirs, names in os.walk(shared_folder):
+        for name in names:
+            if not file_service.is_valid_file_type(name):
+                continue
+            path = os.path.join(root, name)
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                continue
+            files_scanned += 1
+            sizes[path] = size
+            by_size.setdefault(size, []).append(path)
+
+    candidates = [path for size, paths in by_size.items() if len(paths) > 1 and size > 0 for path in paths]
+
+    def partial_key(path: str) -> Optional[str]:
+        digest = hash_file(path, PARTIAL_HASH_BYTES)
+        return f"{sizes[path]}:{digest}" if digest else None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        partial_groups = _group_by(candidates, partial_key, pool)
+        groups = [
+            (key.split(':', 1)[1], paths) for key, paths in partial_groups
+            if sizes[paths[0]] <= PARTIAL_HASH_BYTES
+        ]
+        full_candidates = [
+            path for _, paths in partial_groups if sizes[paths[0]] > PARTIAL_HASH_BYTES for path in paths
+        ]
+        groups += _group_by(full_candidates, hash_file, pool)
+
+    file_ids = file_queries.get_file_ids_by_path()
+    report = []
+    for sha256, paths in groups:
+        size = sizes[paths[0]]
+        rel_paths = sorted(to_manifest_path(path, shared_folder) for path in paths)
+        report.append({
+            "sha256": sha256,
+            "size_bytes": size,
+            "copies": len(paths),
+            "wasted_bytes": size * (len(paths) - 1),
+            "files": [{"path": path, "file_id": file_ids.get(path)} for path in rel_paths]
+        })
+    report.sort(key=lambda group: group["wasted_bytes"], reverse=True)
+
+    return {
+        "groups": report,
+        "stats": {
+            "files_scanned": files_scanned,
+            "files_partially_hashed": len(candidates),
+            "files_fully_hashed": len(full_candidates),
+            "duplicate_groups": len(report),
+            "wasted_bytes": sum(group["wasted_bytes"] for group in report),
+            "elapsed_seconds": round(time.monotonic() - started, 3)
+        }
+    }
@@ -0,0 +1,189 @@
+# backend/services/event_service.py
+# Server-sent events: change notifications pushed to open dashboards
+
+from database.queries import changes as change_queries
+from services import change_service
+from starlette.concurrency import run_in_threadpool
+from responses import dumps
+from typing import Dict, Any, Optional, Set, AsyncIterator
+import asyncio
+import os
+
+# Seconds between reads of the change log while anyone is listening
+POLL_INTERVAL = float(os.environ.get("EVENTS_POLL_INTERVAL", "0.5"))
+
+# Notifications buffered per stream before a slow reader is told to resync
+QUEUE_SIZE = 256
+
+# Seconds of silence before a keep-alive comment, so proxies keep the stream open
+KEEPALIVE_SECONDS = 15.0
+
+# Change log rows read per poll
+BATCH_SIZE = 500
+
+# Most changes replayed to a reconnecting reader before it is told to resync instead
+MAX_REPLAY = 1000
+
+# Milliseconds browsers wait before reconnecting
+RETRY_MS = 3000
+
+def _notification(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Lightweight notification for a change log row; version is its sequence number."""
+    return {
+        "entity_type": entry['entity_type'],
+        "entity_id": entry['entity_id'],
+        "client_id": entry['client_id'],
+        "op": entry['op'],
+        "version": entry['seq']
+    }
+
+def _event(name: str, data: Dict[str, Any], event_id: Optional[int] = None) -> bytes:
+    head = f"id: {event_id}\n".encode() if event_id is not None else b""
+    return head + f"event: {name}\ndata: ".encode() + dumps(data) + b"\n\n"
+
+class Subscription:
+    """
+    One open event stream. Notifications wait in a bounded queue; when a
+    slow reader lets it fill, later ones are dropped and the reader is
+    told to resync from the change log, so no stream buffers without
+    limit or holds up the others.
+    """
+
+    def __init__(self, client_ids: Optional[Set[int]] = None, queue_size: int = QUEUE_SIZE):
+        self.client_ids = client_ids
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+        # Version the subscription starts after; set once the poller knows it
+        self.start: Optional[int] = None
+        self.ready = asyncio.Event()
+
+    def begin(self, start: int) -> None:
+        self.start = start
+        self.ready.set()
+
+    def wants(self, note: Dict[str, Any]) -> bool:
+        return self.client_ids is None or note['client_id'] in self.client_ids
+
+    def offer(self, note: Dict[str, Any]) -> None:
+        if self.dropped or not self.wants(note):
+            return
+        try:
+            self.queue.put_nowait(note)
+        except asyncio.QueueFull:
+            self.dropped = True
+
+_subscriptions: Set[Subscription] = set()
+_poller: Optional[asyncio.Task] = None
+# Last version handed to the streams (None until the poller has started)
+_position: Optional[int] = None
+
+async def _poll() -> None:
+    """
+    Read new change log rows and hand them to every stream; stops when the
+    last stream closes. Errors reading the log are logged and retried, so
+    the streams wait rather than lose their poller.
+    """
+    global _position
+    while _subscriptions:
+        try:
+            if _position is None:
+                _position = await run_in_threadpool(change_queries.get_latest_seq)
+                for subscription in _subscriptions:
+                    if subscription.start is None:
+                        subscription.begin(_position)
+            entries = await run_in_threadpool(change_queries.get_changes, _position, BATCH_SIZE)
+        except Exception as e:
+            print(f"Error reading the change log: {e}")
+            await asyncio.sleep(POLL_INTERVAL)
+            continue
+
+        for entry in entries:
+            note = _notification(entry)
+            for subscription in list(_subscriptions):
+                subscription.offer(note)
+        if entries:
+            _position = entries[-1]['seq']
+        if len(entries) < BATCH_SIZE:
+            await asyncio.sleep(POLL_INTERVAL)
+
+def subscribe(client_ids: Optional[Set[int]] = None) -> Subscription:
+    """
+    Open a subscription, starting the change log poller if it is not
+    running. It receives every change after its start version, which is
+    known once its ready event is set.
+
+    Args:
+        client_ids: Only notify changes to these clients' entities (None for all)
+
+    Returns:
+        The subscription; pass it to unsubscribe when the stream closes
+    """
+    global _poller, _position
+    if _poller is not None and _poller.get_loop() is not asyncio.get_running_loop():
+        # Streams of an event loop that is gone
+        _subscriptions.clear()
+        _poller = None
+
+    subscription = Subscription(client_ids, QUEUE_SIZE)
+    _subscriptions.add(subscription)
+    if _poller is None or _poller.done():
+        _position = None
+        _poller = asyncio.create_task(_poll())
+    elif _position is not None:
+        subscription.begin(_position)
+    return subscription
+
+def unsubscribe(subscription: Subscription) -> None:
+    _subscriptions.discard(subscription)
+
+def subscriber_count() -> int:
+    return len(_subscriptions)
+
+async def event_stream(client_ids: Optional[Set[int]] = None, since: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Server-sent event stream of change notifications.
+
+    Each change is a "change" event whose id is its version (the change
+    log sequence number), so a reconnecting browser resumes from the last
+    one it saw. Changes missed while disconnected are replayed from the
+    change log. When a reader falls too far behind, or missed too much to
+    replay or changes that were since pruned, it gets a "resync" event
+    with the version to pass to GET /changes?since= to catch up.
+
+    Args:
+        client_ids: Only changes to these clients' entities (None for all)
+        since: Version already seen (query parameter or Last-Event-ID)
+
+    Yields:
+        Encoded SSE messages
+    """
+    subscription = subscribe(client_ids)
+    try:
+        await subscription.ready.wait()
+        last = subscription.start
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        if since is not None and since < last:
+            missed = await run_in_threadpool(change_queries.get_changes, since, MAX_REPLAY + 1, client_ids)
+            if len(missed) > MAX_REPLAY or await run_in_threadpool(change_service.is_pruned, since):
+                yield _event("resync", {"since": since})
+            else:
+                for entry in missed:
+                    note = _notification(entry)
+                    if subscription.wants(note) and note['version'] <= last:
+                        yield _event("change", note, note['version'])
+
+        while True:
+            if subscription.dropped and subscription.queue.empty():
+                subscription.dropped = False
+                yield _event("resync", {"since": last})
+            try:
+                note = await asyncio.wait_for(subscription.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if note['version'] <= last:
+                continue
+            last = note['version']
+            yield _event("change", note, last)
+    finally:
+        unsubscribe(subscription)
@@ -3,14 +3,22 @@
 
 from database.queries import files as file_queries
 from database.queries import clients as client_queries
-from typing import List, Dict, Any, Optional, BinaryIO, Tuple
+from services import manifest_service, path_service
+from services.path_service import CONFIG_FILE
+from services.manifest_service import to_manifest_path
+from services.storage import StorageBackend, LocalStorage, CachedStorage
+from utils import row_from_cents
+from typing import List, Dict, Any, Optional, Callable, BinaryIO, Tuple, AsyncIterator, Iterator
 from pathlib import Path
 import os
 import sys
 import json
-import shutil
 from datetime import datetime
 import mimetypes
+import io
+import asyncio
+import hashlib
+import uuid
 
 # Supported file extensions
 SUPPORTED_EXTENSIONS = [
@@ -18,8 +26,19 @@ SUPPORTED_EXTENSIONS = [
     '.docx', '.doc', '.csv', '.xls', '.xlsx', '.txt'
 ]
 
-# Config file path for shared folder settings
-CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "file_paths.json")
+# Uploads larger than this are rejected while streaming (MAX_UPLOAD_MB)
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_MB", "100")) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Local cache of recently read documents (FILE_CACHE_MAX_MB=0 reads straight from the shared folder)
+CACHE_DIR = os.environ.get("FILE_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "documents"))
+CACHE_MAX_BYTES = int(os.environ.get("FILE_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+_storage: Optional[StorageBackend] = None
+_storage_root: Optional[Path] = None
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
 
 def get_client_files(client_id: int) -> List[Dict[str, Any]]:
     """
@@ -49,49 +68,12 @@ def get_payment_files(payment_id: int) -> List[Dict[str, Any]]:
 def get_shared_folder_path() -> Tuple[Path, str]:
     """
     Get the path to the shared team folder where documents are stored.
-    Adapts to different user environments.
+    Resolution is cached by path_service.
     
     Returns:
         Tuple of (full path to shared folder, base path used)
     """
-    # Default path components
-    default_shared_path = "Hohimer Wealth Management\\Hohimer Company Portal - Company\\Hohimer Team Shared 4-15-19"
-    
-    # Try to load from config if it exists
-    config_path = default_shared_path
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                config = json.load(f)
-                if 'shared_folder_path' in config:
-                    config_path = config['shared_folder_path']
-        except Exception as e:
-            print(f"Error loading config: {e}")
-    
-    # Determine user home directory
-    user_home = os.path.expanduser("~")
-    
-    # List of possible path patterns to try
-    possible_paths = [
-        # Standard Windows OneDrive path
-        os.path.join(user_home, config_path),
-        # Alternate path structure
-        os.path.join(user_home, "OneDrive - Hohimer Wealth Management", config_path.split("Hohimer Wealth Management\\")[1]) 
-        if "\\" in config_path else "",
-        # Possible Linux path
-        os.path.join(user_home, config_path.replace("\\", "/")),
-    ]
-    
-    # Try each path
-    for path in possible_paths:
-        if path and os.path.exists(path):
-            return Path(path), config_path
-    
-    # If no paths work, create a temp directory for development
-    temp_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "temp_onedrive")
-    os.makedirs(temp_dir, exist_ok=True)
-    print(f"WARNING: Could not find shared folder. Using temp dir: {temp_dir}")
-    return Path(temp_dir), "temp_onedrive"
+    return path_service.get_shared_folder_path()
 
 def save_shared_folder_config(path: str) -> bool:
     """
@@ -120,15 +102,50 @@ def save_shared_folder_config(path: str) -> bool:
         with open(CONFIG_FILE, 'w') as f:
             json.dump(config, f, indent=2)
         
+        # Resolve the new location on next use
+        path_service.invalidate()
+        
         return True
     except Exception as e:
         print(f"Error saving config: {e}")
         return False
 
+def get_storage() -> StorageBackend:
+    """
+    Get the backend documents are read from.
+    By default the shared folder behind a local LRU cache; rebuilt if the
+    shared folder moves.
+    
+    Returns:
+        Storage backend
+    """
+    global _storage, _storage_root
+    if _storage is not None and _storage_root is None:
+        # Set explicitly with set_storage
+        return _storage
+    
+    shared_folder, _ = get_shared_folder_path()
+    if _storage is None or shared_folder != _storage_root:
+        origin = LocalStorage(shared_folder)
+        _storage = CachedStorage(origin, Path(CACHE_DIR), CACHE_MAX_BYTES) if CACHE_MAX_BYTES > 0 else origin
+        _storage_root = shared_folder
+    return _storage
+
+def set_storage(backend: Optional[StorageBackend]) -> None:
+    """
+    Replace the storage backend (e.g. MemoryStorage in tests).
+    
+    Args:
+        backend: Backend to use, or None to go back to the default
+    """
+    global _storage, _storage_root
+    _storage = backend
+    _storage_root = None
+
 def get_client_folder_path(client_id: int) -> Path:
     """
     Get the path to a client's folder in the shared directory.
-    Uses the client's onedrive_folder_path from the database.
+    Resolution is cached by path_service.
     
     Args:
         client_id: Client ID
@@ -136,44 +153,21 @@ def get_client_folder_path(client_id: int) -> Path:
     Returns:
         Path object for client folder
     """
-    # Get the shared folder base path
-    shared_folder, _ = get_shared_folder_path()
-    
-    # Get client data
-    client = client_queries.get_client_by_id(client_id)
-    if not client or not client.get('onedrive_folder_path'):
-        # If no folder path specified, use "Unknown Client" folder
-        client_path = Path(shared_folder) / "Unknown Clients" / f"Client_{client_id}"
-        # Ensure folder exists
-        os.makedirs(client_path, exist_ok=True)
-        return client_path
-    
-    # Use specified path (normalize slashes)
-    folder_path = client['onedrive_folder_path'].replace('/', '\\')
-    
-    # Check if path is already absolute
-    if os.path.isabs(folder_path):
-        return Path(folder_path)
-    
-    # Combine with shared folder path
-    client_path = Path(shared_folder) / folder_path
-    
-    # Check if directory exists
-    if not os.path.exists(client_path):
-        print(f"WARNING: Client folder not found: {client_path}")
-    
-    return client_path
+    return path_service.get_client_folder_path(client_id)
 
-def scan_client_directory(client_id: int, register_files: bool = False) -> Dict[str, Any]:
+def scan_client_directory(client_id: int, register_files: bool = False, full_rescan: bool = False, changes_only: bool = False) -> Dict[str, Any]:
     """
     Scan a client's directory and optionally register files in the database.
+    Uses the persisted file manifest so unchanged folders are not listed again.
     
     Args:
         client_id: Client ID
         register_files: Whether to register found files in the database
+        full_rescan: List every folder even if its mtime is unchanged
+        changes_only: Only return added/changed/removed paths, not the full listing
         
     Returns:
-        Dictionary with directory structure
+        Dictionary with directory structure and the changes since the last scan
     """
     client_path = get_client_folder_path(client_id)
     shared_folder, base_path = get_shared_folder_path()
@@ -187,93 +181,208 @@ def scan_client_directory(client_id: int, register_files: bool = False) -> Dict[
             "directories": []
         }
     
-    # Get existing files from database
+    scan = manifest_service.scan_tree(client_id, client_path, shared_folder, is_valid_file_type, full=full_rescan)
+    entries = scan["entries"]
+    
+    result = {
+        "success": True,
+        "client_id": client_id,
+        "base_path": str(client_path),
+        "changes": {
+            "added": scan["added"],
+            "changed": scan["changed"],
+            "removed": scan["removed"]
+        },
+        "scan_stats": scan["stats"],
+        "new_files_registered": 0
+    }
+    
+    # Nothing to list or register
+    if changes_only and not (register_files and scan["added"]):
+        return result
+    
+    # Only files that appeared since the last scan can need registering
+    candidates = scan["added"] if changes_only else [p for p, e in entries.items() if not e['is_dir']]
+    
+    if register_files:
+        result["new_files_registered"] = register_scanned_files(client_id, candidates)
+    
+    if changes_only:
+        return result
+    
+    # Get existing files from database (after registering, to include new file_ids)
     db_files = file_queries.get_client_files(client_id)
-    existing_files = {f['onedrive_path']: f for f in db_files}
+    existing_files = {f['onedrive_path'].replace('\\', '/'): f for f in db_files}
     
-    # Track files and directories
+    root_path = to_manifest_path(str(client_path), shared_folder)
     files = []
     directories = []
-    new_files_count = 0
-    
-    # Walk directory
-    for root, dirs, filenames in os.walk(client_path):
-        # Get relative path from shared folder
-        try:
-            rel_root = os.path.relpath(root, shared_folder)
-        except ValueError:
-            # If not relative to shared folder, use absolute path
-            rel_root = root
-            
-        if rel_root == '.':
-            rel_root = ''
-            
-        # Add directories
-        for dir_name in dirs:
-            dir_path = os.path.join(rel_root, dir_name)
+    for path, entry in sorted(entries.items()):
+        if path == root_path:
+            continue
+        full_path = os.path.join(shared_folder, path) if not os.path.isabs(path) else path
+        if entry['is_dir']:
             directories.append({
-                "name": dir_name,
-                "path": dir_path.replace('\\', '/'),
-                "full_path": os.path.join(root, dir_name)
+                "name": path.rsplit('/', 1)[-1],
+                "path": path,
+                "full_path": full_path
             })
+            continue
         
-        # Add files
-        for file_name in filenames:
-            file_path = os.path.join(rel_root, file_name)
-            file_path_norm = file_path.replace('\\', '/')
-            full_path = os.path.join(root, file_name)
-            
-            # Only include supported file types
-            if not is_valid_file_type(file_name):
-                continue
-                
-            # Check if file already registered
-            if file_path_norm in existing_files:
-                # File already registered
-                file_info = existing_files[file_path_norm]
-                files.append({
-                    "file_id": file_info['file_id'],
-                    "name": file_name,
-                    "path": file_path_norm,
-                    "full_path": full_path,
-                    "size": os.path.getsize(full_path),
-                    "registered": True,
-                    "uploaded_at": file_info['uploaded_at']
-                })
-            else:
-                # New file
-                file_info = {
-                    "file_id": None,
-                    "name": file_name,
-                    "path": file_path_norm,
-                    "full_path": full_path,
-                    "size": os.path.getsize(full_path),
-                    "registered": False,
-                    "uploaded_at": None
-                }
-                
-                # Register file if requested
-                if register_files:
-                    try:
-                        file_id = file_queries.create_file(client_id, file_name, file_path_norm)
-                        file_info["file_id"] = file_id
-                        file_info["registered"] = True
-                        file_info["uploaded_at"] = datetime.now().isoformat()
-                        new_files_count += 1
-                    except Exception as e:
-                        print(f"Error registering file {file_path_norm}: {e}")
-                
-                files.append(file_info)
+        file_info = existing_files.get(path)
+        files.append({
+            "file_id": file_info['file_id'] if file_info else None,
+            "name": path.rsplit('/', 1)[-1],
+            "path": path,
+            "full_path": full_path,
+            "size": entry['size'],
+            "registered": file_info is not None,
+            "uploaded_at": file_info['uploaded_at'] if file_info else None
+        })
+    
+    result["files"] = files
+    result["directories"] = directories
+    return result
+
+def _resolve_client_subfolder(client_id: int, subpath: str) -> Tuple[Path, Path]:
+    """
+    Resolve a folder inside a client's folder, refusing paths that leave it.
+    
+    Returns:
+        Tuple of (client folder, requested folder), both resolved
+    """
+    root = Path(os.path.realpath(get_client_folder_path(client_id)))
+    folder = Path(os.path.realpath(root / subpath.replace('\\', '/').lstrip('/')))
+    if folder != root and root not in folder.parents:
+        raise ValueError("Path is outside the client folder")
+    return root, folder
+
+def _entry_info(entry: os.DirEntry, rel_path: str, file_ids: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    """Describe one directory entry for listings, or None if it should be hidden."""
+    if entry.is_dir(follow_symlinks=False):
+        return {"type": "directory", "name": entry.name, "path": rel_path}
+    if not entry.is_file() or not is_valid_file_type(entry.name):
+        return None
+    stat = entry.stat()
+    file_id = file_ids.get(rel_path)
+    return {
+        "type": "file",
+        "name": entry.name,
+        "path": rel_path,
+        "size": stat.st_size,
+        "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        "file_id": file_id,
+        "registered": file_id is not None
+    }
+
+def list_client_directory(client_id: int, subpath: str = "", offset: int = 0, limit: int = 200) -> Dict[str, Any]:
+    """
+    List one level of a client's folder: its subfolders and supported files.
+    
+    Only the requested folder is read, so browsing a large client folder
+    costs one os.scandir per level opened instead of a full tree walk.
+    
+    Args:
+        client_id: Client ID
+        subpath: Folder relative to the client folder ("" for the top level)
+        offset: Number of entries to skip (folders first, then files, by name)
+        limit: Maximum number of entries to return
+        
+    Returns:
+        Dictionary with the page of entries and the total count for the level
+    """
+    root, folder = _resolve_client_subfolder(client_id, subpath)
+    if not folder.is_dir():
+        return {"success": False, "message": f"Folder not found: {subpath or '/'}"}
+    
+    shared_folder, _ = get_shared_folder_path()
+    folder_rel = to_manifest_path(str(folder), os.path.realpath(shared_folder))
+    
+    # Sorting needs the names of this level, but stat-ing and lookups only happen for the page
+    with os.scandir(folder) as it:
+        level = sorted(it, key=lambda e: (not e.is_dir(follow_symlinks=False), e.name.lower()))
+    level = [e for e in level if e.is_dir(follow_symlinks=False) or (e.is_file() and is_valid_file_type(e.name))]
+    
+    page = [(entry, f"{folder_rel}/{entry.name}" if folder_rel else entry.name) for entry in level[offset:offset + limit]]
+    file_ids = file_queries.get_file_ids_for_paths(
+        client_id, [rel_path for entry, rel_path in page if not entry.is_dir(follow_symlinks=False)]
+    )
+    
+    entries = []
+    for entry, rel_path in page:
+        info = _entry_info(entry, rel_path, file_ids)
+        if info:
+            entries.append(info)
     
     return {
         "success": True,
         "client_id": client_id,
-        "base_path": str(client_path),
-        "files": files,
-        "directories": directories,
-        "new_files_registered": new_files_count
+        "path": folder.relative_to(root).as_posix() if folder != root else "",
+        "entries": entries,
+        "total": len(level),
+        "offset": offset,
+        "limit": limit
     }
 
+def iter_client_directory(client_id: int) -> Iterator[Dict[str, Any]]:
+    """
+    Walk a client's whole folder, yielding each folder and supported file
+    as it is found.
+    
+    Only one folder's entries, and the file_ids registered in it, are held
+    at a time, so memory is bounded by the largest single folder rather than
+    the whole tree.
+    
+    Args:
+        client_id: Client ID
+        
+    Yields:
+        Entry dictionaries (type, name, path and file details)
+    """
+    client_path = get_client_folder_path(client_id)
+    if not os.path.isdir(client_path):
+        return
+    shared_folder, _ = get_shared_folder_path()
+    
+    stack = [(str(client_path), to_manifest_path(str(client_path), shared_folder))]
+    while stack:
+        abs_dir, rel_dir = stack.pop()
+        try:
+            with os.scandir(abs_dir) as it:
+                level = [(entry, f"{rel_dir}/{entry.name}" if rel_dir else entry.name) for entry in it]
+        except OSError as e:
+            print(f"Error scanning directory {abs_dir}: {e}")
+            continue
+        file_ids = file_queries.get_file_ids_for_paths(
+            client_id, [rel_path for entry, rel_path in level if is_valid_file_type(entry.name)]
+        )
+        for entry, rel_path in level:
+            try:
+                info = _entry_info(entry, rel_path, file_ids)
+            except OSError as e:
+                print(f"Error reading {entry.path}: {e}")
+                continue
+            if info is None:
+                continue
+            if info["type"] == "directory":
+                stack.append((entry.path, rel_path))
+            yield info
+
+def register_scanned_files(client_id: int, paths: List[str]) -> int:
+    """
+    Register scanned files that are not in the database yet, in one batch.
+    
+    Args:
+        client_id: Client ID
+        paths: Normalized paths relative to the shared folder
+        
+    Returns:
+        Number of files registered
+    """
+    registered = file_queries.get_registered_paths(client_id)
+    new_files = [(path.rsplit('/', 1)[-1], path) for path in paths if path not in registered]
+    return file_queries.create_files(client_id, new_files)
+
 def get_consulting_fee_folder(client_id: int, year: Optional[int] = None) -> Path:
     """
     Get the path to a client's consulting fee folder for a specific year.
@@ -366,19 +475,12 @@ def register_existing_file(client_id: int, file_path: str) -> Dict[str, Any]:
         "onedrive_path": rel_path
     }
 
-def save_file(client_id: int, file_obj: BinaryIO, filename: str, for_payment: bool = False, year: Optional[int] = None) -> Dict[str, Any]:
+def _prepare_upload(client_id: int, filename: str, for_payment: bool, year: Optional[int]) -> Tuple[Path, Path]:
     """
-    Save a file to the client's folder and record in database.
+    Validate an upload and pick its destination folder and temp file.
     
-    Args:
-        client_id: Client ID
-        file_obj: File object
-        filename: Name of the file
-        for_payment: Whether file is related to a payment
-        year: Year folder to use (for payment files)
-        
     Returns:
-        Dictionary with file information
+        Tuple of (destination folder, temp file path)
     """
     # Check file type
     if not is_valid_file_type(filename):
@@ -396,6 +498,40 @@ def save_file(client_id: int, file_obj: BinaryIO, filename: str, for_payment: bo
     # Create folder if it doesn't exist
     os.makedirs(dest_folder, exist_ok=True)
     
+    # Write beside the destination so the final rename stays on one filesystem
+    return dest_folder, dest_folder / f".{uuid.uuid4().hex}.upload"
+
+def _write_chunk(f: BinaryIO, digest: Any, chunk: bytes) -> None:
+    digest.update(chunk)
+    f.write(chunk)
+
+def _commit_upload(client_id: int, dest_folder: Path, filename: str, tmp_path: Path, size: int, sha256: str) -> Dict[str, Any]:
+    """
+    Move a fully written temp file into place and record it in the database.
+    If the client already has a document with the same content that is
+    still on disk unchanged, the temp file is dropped and the existing file
+    is returned instead.
+    
+    Returns:
+        Dictionary with file information (deduplicated is True when an
+        existing file was reused)
+    """
+    existing = file_queries.get_file_by_hash(client_id, sha256)
+    if existing and not _has_content(existing, size, sha256):
+        existing = None
+    if existing:
+        _remove_quietly(tmp_path)
+        return {
+            "success": True,
+            "file_id": existing['file_id'],
+            "client_id": client_id,
+            "file_name": existing['file_name'],
+            "onedrive_path": existing['onedrive_path'],
+            "size_bytes": existing['size_bytes'],
+            "sha256": sha256,
+            "deduplicated": True
+        }
+    
     # Handle filename conflicts by appending timestamp if needed
     base_name, extension = os.path.splitext(filename)
     dest_path = dest_folder / filename
@@ -406,9 +542,8 @@ def save_file(client_id: int, file_obj: BinaryIO, filename: str, for_payment: bo
         filename = f"{base_name}_{timestamp}{extension}"
         dest_path = dest_folder / filename
     
-    # Save file
-    with open(dest_path, 'wb') as f:
-        shutil.copyfileobj(file_obj, f)
+    # Atomic on the same filesystem, so the folder never shows a partial file
+    os.replace(tmp_path, dest_path)
     
     # Get shared folder for relative path calculation
     shared_folder, _ = get_shared_folder_path()
@@ -421,16 +556,119 @@ def save_file(client_id: int, file_obj: BinaryIO, filename: str, for_payment: bo
         relative_path = str(dest_path)
     
     # Record in database
-    file_id = file_queries.create_file(client_id, filename, relative_path)
+    file_id = file_queries.create_file(client_id, filename, relative_path, size, sha256)
     
     return {
         "success": True,
         "file_id": file_id,
         "client_id": client_id,
         "file_name": filename,
-        "onedrive_path": relative_path
+        "onedrive_path": relative_path,
+        "size_bytes": size,
+        "sha256": sha256,
+        "deduplicated": False
     }
 
+def _has_content(file_info: Dict[str, Any], size: int, sha256: str) -> bool:
+    """
+    Check that a registered file still holds the content its row's hash
+    says it does. The file is rehashed, since an edit on disk (even one
+    that keeps the size) doesn't update the stored hash; a stale hash is
+    corrected.
+    """
+    storage = get_storage()
+    stat = storage.stat(file_info['onedrive_path'])
+    if stat is None or stat.size != size:
+        return False
+    digest = hashlib.sha256()
+    try:
+        with storage.open(file_info['onedrive_path']) as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except OSError:
+        return False
+    if digest.hexdigest() != sha256:
+        file_queries.set_file_content_hash(file_info['file_id'], stat.size, digest.hexdigest())
+        return False
+    return True
+
+def _remove_quietly(path: Path) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def save_file(client_id: int, file_obj: BinaryIO, filename: str, for_payment: bool = False, year: Optional[int] = None, max_size: int = MAX_UPLOAD_BYTES) -> Dict[str, Any]:
+    """
+    Save a file to the client's folder and record in database.
+    
+    Args:
+        client_id: Client ID
+        file_obj: File object
+        filename: Name of the file
+        for_payment: Whether file is related to a payment
+        year: Year folder to use (for payment files)
+        max_size: Maximum size in bytes
+        
+    Returns:
+        Dictionary with file information
+    """
+    dest_folder, tmp_path = _prepare_upload(client_id, filename, for_payment, year)
+    
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in iter(lambda: file_obj.read(UPLOAD_CHUNK_SIZE), b''):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"File exceeds the {max_size // (1024 * 1024)} MB upload limit")
+                _write_chunk(f, digest, chunk)
+        return _commit_upload(client_id, dest_folder, filename, tmp_path, size, digest.hexdigest())
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+
+async def save_file_stream(client_id: int, chunks: AsyncIterator[bytes], filename: str, for_payment: bool = False, year: Optional[int] = None, max_size: int = MAX_UPLOAD_BYTES) -> Dict[str, Any]:
+    """
+    Save an upload as it arrives, without blocking the event loop.
+    
+    Each chunk is hashed and written in a worker thread. The size limit is
+    checked per chunk, so an oversized upload is rejected as soon as it
+    crosses the limit rather than after it has been written in full.
+    
+    Args:
+        client_id: Client ID
+        chunks: Async iterator of file content (e.g. request.stream())
+        filename: Name of the file
+        for_payment: Whether file is related to a payment
+        year: Year folder to use (for payment files)
+        max_size: Maximum size in bytes
+        
+    Returns:
+        Dictionary with file information
+    """
+    dest_folder, tmp_path = await asyncio.to_thread(_prepare_upload, client_id, filename, for_payment, year)
+    
+    digest = hashlib.sha256()
+    size = 0
+    f = await asyncio.to_thread(open, tmp_path, 'wb')
+    try:
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"File exceeds the {max_size // (1024 * 1024)} MB upload limit")
+                await asyncio.to_thread(_write_chunk, f, digest, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+        return await asyncio.to_thread(_commit_upload, client_id, dest_folder, filename, tmp_path, size, digest.hexdigest())
+    except BaseException:
+        await asyncio.to_thread(_remove_quietly, tmp_path)
+        raise
+
 def link_file_to_payment(payment_id: int, file_id: int) -> Dict[str, bool]:
     """
     Link an existing file to a payment.
@@ -459,6 +697,95 @@ def unlink_file_from_payment(payment_id: int, file_id: int) -> Dict[str, bool]:
     success = file_queries.unlink_file_from_payment(payment_id, file_id)
     return {"success": success}
 
+def update_payment_links(client_id: int, pairs: List[Tuple[int, int]], unlink: bool = False) -> Dict[str, Any]:
+    """
+    Link (or unlink) many files to payments of one client at once.
+    
+    Every payment and file is checked against the client in one query; the
+    valid pairs are then applied together in one transaction.
+    
+    Args:
+        client_id: Client that every payment and file must belong to
+        pairs: (payment_id, file_id) pairs
+        unlink: Remove the links instead of adding them
+        
+    Returns:
+        Dictionary with per-pair results and counts by status
+    """
+    pairs = list(dict.fromkeys(pairs))
+    payments, files = file_queries.get_link_owners(
+        sorted({payment_id for payment_id, _ in pairs}),
+        sorted({file_id for _, file_id in pairs})
+    )
+    
+    errors = {}
+    for payment_id, file_id in pairs:
+        if payment_id not in payments:
+            errors[(payment_id, file_id)] = "Payment not found"
+        elif file_id not in files:
+            errors[(payment_id, file_id)] = "File not found"
+        elif payments[payment_id] != client_id:
+            errors[(payment_id, file_id)] = "Payment belongs to another client"
+        elif files[file_id] != client_id:
+            errors[(payment_id, file_id)] = "File belongs to another client"
+    valid = [pair for pair in pairs if pair not in errors]
+    
+    if unlink:
+        changed = file_queries.unlink_files_from_payments(valid)
+        done, unchanged = "unlinked", "not_linked"
+    else:
+        changed = set(valid) - file_queries.link_files_to_payments(valid)
+        done, unchanged = "linked", "already_linked"
+    
+    results = []
+    counts = {done: 0, unchanged: 0, "invalid": 0}
+    for payment_id, file_id in pairs:
+        pair = (payment_id, file_id)
+        if pair in errors:
+            result = {"payment_id": payment_id, "file_id": file_id, "status": "invalid", "message": errors[pair]}
+        else:
+            result = {"payment_id": payment_id, "file_id": file_id, "status": done if pair in changed else unchanged}
+        counts[result["status"]] += 1
+        results.append(result)
+    
+    return {"success": not errors, "client_id": client_id, "results": results, "counts": counts}
+
+def get_file_usage(file_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the payments a file supports.
+    
+    Args:
+        file_id: File ID
+        
+    Returns:
+        Dictionary with the file's ID, name and linked payments, or None if
+        the file does not exist
+    """
+    file_info = file_queries.get_file_by_id(file_id)
+    if not file_info:
+        return None
+    payments = [row_from_cents(p) for p in file_queries.get_file_payments(file_id)]
+    return {
+        "file_id": file_id,
+        "file_name": file_info['file_name'],
+        "payment_count": len(payments),
+        "payments": payments
+    }
+
+def get_client_file_usage(client_id: int) -> Dict[str, Any]:
+    """
+    Get payment link counts for all of a client's files at once, e.g. for
+    badges in the document list.
+    
+    Args:
+        client_id: Client ID
+        
+    Returns:
+        Dictionary with a usage entry per linked file (files missing from the
+        list have no links)
+    """
+    return {"client_id": client_id, "files": file_queries.get_file_usage_counts(client_id)}
+
 def delete_file(file_id: int, delete_physical: bool = False) -> Dict[str, Any]:
     """
     Delete a file from the database and optionally from disk.
@@ -520,14 +847,16 @@ def get_file_content(file_id: int) -> Dict[str, Any]:
     file_path = shared_folder / file_info['onedrive_path']
     
     # Check if file exists
-    if not os.path.exists(file_path):
+    storage = get_storage()
+    stat = storage.stat(file_info['onedrive_path'])
+    if stat is None:
         return {"success": False, "message": "File not found on disk"}
     
     # Get file size
-    file_size = os.path.getsize(file_path)
+    file_size = stat.size
     
     # Determine MIME type
-    mime_type, _ = mimetypes.guess_type(file_path)
+    mime_type, _ = mimetypes.guess_type(file_info['onedrive_path'])
     if not mime_type:
         mime_type = 'application/octet-stream'
     
@@ -541,14 +870,13 @@ def get_file_content(file_id: int) -> Dict[str, Any]:
     
     if is_text and file_size < 1024 * 1024:  # Only preview if < 1MB
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with io.TextIOWrapper(storage.open(file_info['onedrive_path']), encoding='utf-8') as f:
                 preview = f.read(4096)  # Read first 4KB
         except UnicodeDecodeError:
             # Not a text file after all
             preview = None
     
-    # TODO: Add preview support for PDF and other document types
-    # This would require additional libraries like pdf2image, python-docx, etc.
+    # Thumbnails and PDF/Office text previews come from preview_service (GET /files/preview)
     
     return {
         "success": True,
@@ -564,6 +892,53 @@ def get_file_content(file_id: int) -> Dict[str, Any]:
         "file_path": str(file_path)
     }
 
+def get_file_download(file_id: int, is_current: Optional[Callable[[int, int], bool]] = None) -> Dict[str, Any]:
+    """
+    Get what is needed to send a file to the browser.
+    Served from the local cache when enabled, so repeat views don't
+    touch the shared folder.
+    
+    Args:
+        file_id: File ID
+        is_current: Called with the size and mtime_ns from stat; when it returns
+            True the browser's copy is current and the file is not fetched
+        
+    Returns:
+        Dictionary with file_name, mime_type, size, mtime_ns, not_modified and,
+        unless not_modified, either local_path or an open binary stream (for
+        backends without local files). A local_path is kept in the cache until
+        release is called.
+    """
+    file_info = file_queries.get_file_by_id(file_id)
+    if not file_info:
+        return {"success": False, "message": "File not found"}
+    
+    storage = get_storage()
+    path = file_info['onedrive_path']
+    stat = storage.stat(path)
+    if stat is None:
+        return {"success": False, "message": "File not found on disk"}
+    
+    mime_type, _ = mimetypes.guess_type(path)
+    result = {
+        "success": True,
+        "file_name": file_info['file_name'],
+        "mime_type": mime_type or 'application/octet-stream',
+        "size": stat.size,
+        "mtime_ns": stat.mtime_ns,
+        "not_modified": False
+    }
+    if is_current is not None and is_current(stat.size, stat.mtime_ns):
+        return dict(result, not_modified=True)
+    
+    local_path = storage.acquire(path)
+    return {
+        **result,
+        "local_path": str(local_path) if local_path else None,
+        "stream": None if local_path else storage.open(path),
+        "release": (lambda: storage.release(local_path)) if local_path else None
+    }
+
 def search_client_files(client_id: int, search_term: str) -> List[Dict[str, Any]]:
     """
     Search for files by name for a client.
@@ -575,4 +950,18 @@ def search_client_files(client_id: int, search_term: str) -> List[Dict[str, Any]
     Returns:
         List of matching file dictionaries
     """
-    return file_queries.search_client_files(client_id, search_term)
\ No newline at end of file
+    return file_queries.search_client_files(client_id, search_term)
+
+def search_files(search_term: str, client_id: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Full-text search for files across all clients or within one client.
+    
+    Args:
+        search_term: Search term (each word matches as a prefix)
+        client_id: Optional client to restrict the search to
+        limit: Maximum number of results
+        
+    Returns:
+        List of matching file dictionaries, best matches first
+    """
+    return file_queries.search_files(search_term, client_id, limit)
\ No newline at end of file
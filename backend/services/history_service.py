@@ -0,0 +1,74 @@
+# backend/services/history_service.py
+# Point-in-time views of clients, contracts, contacts and payments
+
+from database.queries import history as history_queries
+from utils import row_from_cents
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+import re
+
+def parse_as_of(value: str) -> str:
+    """
+    Normalize a point in time to the 'YYYY-MM-DD HH:MM:SS' UTC text that
+    valid_from/valid_to hold. A bare date means the end of that day, so
+    "2024-03-31" includes everything recorded on quarter-end.
+
+    Args:
+        value: ISO date or datetime, with or without a UTC offset
+
+    Returns:
+        Timestamp text comparable with valid_from/valid_to
+
+    Raises:
+        ValueError: If the value is not an ISO date or datetime
+    """
+    value = value.strip()
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", value):
+        moment = datetime.fromisoformat(value).replace(hour=23, minute=59, second=59)
+    else:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+def get_clients_as_of(as_of: str) -> List[Dict[str, Any]]:
+    """
+    Get the clients that existed at a point in time.
+
+    Args:
+        as_of: ISO date or datetime
+
+    Returns:
+        List of client dictionaries
+    """
+    return history_queries.get_clients_as_of(parse_as_of(as_of))
+
+def get_client_as_of(client_id: int, as_of: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a client with the contracts, contacts and payments it had at a
+    point in time, e.g. at quarter-end.
+
+    Rows are edited in place, so fields show their current values; what
+    the history reflects is which rows existed (valid_from/valid_to) and,
+    for payments, which had been received by then.
+
+    Args:
+        client_id: Client ID
+        as_of: ISO date or datetime
+
+    Returns:
+        Dictionary with as_of, client, contracts, contacts and payments, or
+        None if the client did not exist then
+    """
+    moment = parse_as_of(as_of)
+    client = history_queries.get_client_as_of(client_id, moment)
+    if not client:
+        return None
+
+    return {
+        "as_of": moment,
+        "client": client,
+        "contracts": [row_from_cents(c) for c in history_queries.get_client_contracts_as_of(client_id, moment)],
+        "contacts": history_queries.get_client_contacts_as_of(client_id, moment),
+        "payments": [row_from_cents(p) for p in history_queries.get_client_payments_as_of(client_id, moment)]
+    }
@@ -0,0 +1,147 @@
+# backend/services/manifest_service.py
+# Incremental directory scanning against the persisted file manifest
+
+from database.queries import manifest as manifest_queries
+from typing import List, Dict, Any, Callable
+from pathlib import Path
+import os
+
+def to_manifest_path(full_path: str, shared_folder: Path) -> str:
+    """
+    Convert an absolute path to the form stored in the manifest and in
+    client_files.onedrive_path: relative to the shared folder, forward slashes.
+
+    Args:
+        full_path: Absolute path on disk
+        shared_folder: Shared folder root
+
+    Returns:
+        Normalized path (absolute if outside the shared folder)
+    """
+    try:
+        rel_path = os.path.relpath(full_path, shared_folder)
+        if rel_path.startswith('..'):
+            rel_path = full_path
+    except ValueError:
+        # Different drive on Windows
+        rel_path = full_path
+    if rel_path == '.':
+        rel_path = ''
+    return rel_path.replace('\\', '/')
+
+def _parent(path: str) -> str:
+    return path.rsplit('/', 1)[0] if '/' in path else ''
+
+def scan_tree(
+    client_id: int,
+    client_path: Path,
+    shared_folder: Path,
+    include_file: Callable[[str], bool],
+    full: bool = False
+) -> Dict[str, Any]:
+    """
+    Scan a client folder, reusing the stored manifest wherever possible.
+
+    Folders whose mtime matches the manifest are not listed again: their
+    files are taken from the manifest and only their subfolders are
+    stat-ed and descended into. Changed folders are listed with os.scandir,
+    whose entries carry stat data without a separate call per file.
+    A folder's mtime only changes when entries are added, removed or renamed,
+    so pass full=True to also catch in-place edits to existing files.
+
+    Args:
+        client_id: Client ID
+        client_path: Absolute path of the client folder
+        shared_folder: Shared folder root (for relative paths)
+        include_file: Predicate on file names (e.g. supported extensions)
+        full: List every folder regardless of mtime
+
+    Returns:
+        Dictionary with entries (path -> entry), added/changed/removed file
+        paths and scan statistics
+    """
+    old = manifest_queries.get_client_manifest(client_id)
+
+    # Index the previous manifest by parent folder for skipped folders
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in old.values():
+        children.setdefault(_parent(entry['path']), []).append(entry)
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    stats = {"directories_scanned": 0, "directories_skipped": 0}
+
+    def visit(abs_dir: str, rel_dir: str, dir_stat: os.stat_result) -> None:
+        entries[rel_dir] = {
+            "path": rel_dir,
+            "is_dir": True,
+            "size": None,
+            "mtime_ns": dir_stat.st_mtime_ns,
+            "inode": dir_stat.st_ino or None,
+        }
+
+        previous = old.get(rel_dir)
+        if not full and previous and previous['is_dir'] and previous['mtime_ns'] == dir_stat.st_mtime_ns:
+            stats["directories_skipped"] += 1
+            for child in children.get(rel_dir, []):
+                name = child['path'].rsplit('/', 1)[-1]
+                if not child['is_dir']:
+                    entries[child['path']] = dict(child, is_dir=False)
+                    continue
+                child_abs = os.path.join(abs_dir, name)
+                try:
+                    child_stat = os.stat(child_abs)
+                except OSError:
+                    continue
+                visit(child_abs, child['path'], child_stat)
+            return
+
+        stats["directories_scanned"] += 1
+        try:
+            with os.scandir(abs_dir) as it:
+                for item in it:
+                    item_rel = f"{rel_dir}/{item.name}" if rel_dir else item.name
+                    try:
+                        if item.is_dir(follow_symlinks=False):
+                            visit(item.path, item_rel, item.stat(follow_symlinks=False))
+                        elif item.is_file() and include_file(item.name):
+                            item_stat = item.stat()
+                            entries[item_rel] = {
+                                "path": item_rel,
+                                "is_dir": False,
+                                "size": item_stat.st_size,
+                                "mtime_ns": item_stat.st_mtime_ns,
+                                "inode": item.inode() or None,
+                            }
+                    except OSError as e:
+                        print(f"Error reading {item.path}: {e}")
+        except OSError as e:
+            print(f"Error scanning directory {abs_dir}: {e}")
+
+    root = str(client_path)
+    visit(root, to_manifest_path(root, shared_folder), os.stat(root))
+
+    added, changed, upserts = [], [], []
+    for path, entry in entries.items():
+        previous = old.get(path)
+        if previous is None:
+            upserts.append(entry)
+            if not entry['is_dir']:
+                added.append(path)
+        elif (previous['size'], previous['mtime_ns'], bool(previous['is_dir'])) != (entry['size'], entry['mtime_ns'], entry['is_dir']):
+            upserts.append(entry)
+            if not entry['is_dir']:
+                changed.append(path)
+
+    removed_entries = [path for path in old if path not in entries]
+    removed = [path for path in removed_entries if not old[path]['is_dir']]
+
+    if upserts or removed_entries:
+        manifest_queries.save_manifest_changes(client_id, upserts, removed_entries)
+
+    return {
+        "entries": entries,
+        "added": sorted(added),
+        "changed": sorted(changed),
+        "removed": sorted(removed),
+        "stats": stats,
+    }
@@ -0,0 +1,265 @@
+# backend/services/match_service.py
+# Proposes payment links for documents from the provider and period in their file names
+
+from database.queries import files as file_queries
+from database.queries import payments as payment_queries
+from services import file_service
+from typing import List, Dict, Any, Optional, Tuple, Set
+import re
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+_MONTH = (r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)"
+          r"(?:uary|ruary|ch|il|e|y|ust|t|tember|ober|ember)?\.?(?![a-z])")
+# A two-digit year can't be followed by a four-digit one: "March 15 2024" is not March 2015
+_YEAR = r"(20\d\d|'?\d\d(?!\d)(?![\s_,.-]*20\d\d))"
+
+# Tried in order; each yields (first month, last month) as year * 12 + month - 1
+_PATTERNS = [
+    ("date", re.compile(r"(?<!\d)(20\d\d)[-_. ]?(0[1-9]|1[0-2])[-_. ]?(0[1-9]|[12]\d|3[01])(?!\d)")),
+    ("date", re.compile(r"(?<!\d)(0?[1-9]|1[0-2])[-_.](0?[1-9]|[12]\d|3[01])[-_.](20\d\d|\d\d)(?!\d)")),
+    ("quarter", re.compile(r"(?<![a-z\d])q([1-4])(?:[\s_-]*" + _YEAR + r")?(?!\d)")),
+    ("quarter", re.compile(r"(?<!\d)(20\d\d)[\s_-]*q([1-4])(?!\d)")),
+    ("date", re.compile(r"(?<![a-z])" + _MONTH + r"[\s_.-]*(0?[1-9]|[12]\d|3[01])(?:st|nd|rd|th)?[\s_,.-]+(20\d\d)(?!\d)")),
+    ("months", re.compile(
+        r"(?<![a-z])" + _MONTH + r"[\s_,.-]*" + _YEAR + r"?\s*(?:-|–|to|thru|through)\s*"
+        + _MONTH + r"[\s_,.-]*" + _YEAR + r"?(?!\d)"
+    )),
+    ("month", re.compile(r"(?<![a-z])" + _MONTH + r"[\s_,.-]*" + _YEAR + r"?(?!\d)")),
+    ("month", re.compile(r"(?<!\d)(20\d\d)[-_. ](0[1-9]|1[0-2])(?!\d)")),
+    ("year", re.compile(r"(?<!\d)(20\d\d)(?!\d)")),
+]
+
+# Words in provider names that don't identify the provider
+_GENERIC_WORDS = {'company', 'trust', 'group', 'funds', 'fund', 'inc', 'llc', 'the', 'and', 'from', 'direct', 'financial', 'services'}
+
+# Year-only names cover a whole year of payments, so their period counts for less
+_KIND_WEIGHT = {"date": 1.0, "month": 1.0, "months": 1.0, "quarter": 1.0, "year": 0.5}
+
+PERIOD_WEIGHT = 0.7
+PROVIDER_WEIGHT = 0.3
+
+def _year(text: Optional[str], default: Optional[int]) -> Optional[int]:
+    if not text:
+        return default
+    text = text.lstrip("'")
+    return int(text) if len(text) == 4 else 2000 + int(text)
+
+def _month_index(year: int, month: int) -> int:
+    return year * 12 + month - 1
+
+def parse_period(path: str) -> Optional[Tuple[str, int, int]]:
+    """
+    Find the period a document covers from its file name. A year folder
+    (e.g. ".../2024/March statement.pdf") supplies the year when the name
+    has none.
+
+    Args:
+        path: onedrive_path of the file
+
+    Returns:
+        Tuple of (kind, first month index, last month index) or None
+    """
+    segments = path.replace('\\', '/').split('/')
+    name = segments[-1].rsplit('.', 1)[0].lower()
+    folder_year = next((int(s) for s in reversed(segments[:-1]) if re.fullmatch(r"(19|20)\d\d", s)), None)
+
+    for kind, pattern in _PATTERNS:
+        match = pattern.search(name)
+        if not match:
+            continue
+        groups = match.groups()
+        if kind == "date":
+            if groups[0].isalpha():
+                year, month = int(groups[2]), MONTHS[groups[0]]
+            elif len(groups[0]) == 4:
+                year, month = int(groups[0]), int(groups[1])
+            else:
+                year, month = _year(groups[2], None), int(groups[0])
+            start = end = _month_index(year, month)
+        elif kind == "quarter":
+            if len(groups[0]) == 1:
+                quarter, year = int(groups[0]), _year(groups[1], folder_year)
+                if year is None:
+                    continue
+            else:
+                year, quarter = int(groups[0]), int(groups[1])
+            start, end = _month_index(year, quarter * 3 - 2), _month_index(year, quarter * 3)
+        elif kind == "months":
+            # Either side may carry the year, e.g. "Dec 2023 - Feb 2024" or "Jan-Mar 2024"
+            start_year, end_year = _year(groups[1], None), _year(groups[3], None)
+            end_year = end_year or start_year or folder_year
+            start_year = start_year or end_year
+            if end_year is None:
+                continue
+            start, end = _month_index(start_year, MONTHS[groups[0]]), _month_index(end_year, MONTHS[groups[2]])
+            if end < start:
+                continue
+        elif kind == "month":
+            if groups[0].isdigit():
+                year, month = int(groups[0]), int(groups[1])
+            else:
+                year, month = _year(groups[1], folder_year), MONTHS[groups[0]]
+            if year is None:
+                continue
+            start = end = _month_index(year, month)
+        else:
+            year = int(groups[0])
+            start, end = _month_index(year, 1), _month_index(year, 12)
+        return kind, start, end
+
+    if folder_year is not None:
+        return "year", _month_index(folder_year, 1), _month_index(folder_year, 12)
+    return None
+
+def _provider_words(provider_name: Optional[str]) -> Set[str]:
+    words = re.findall(r"[a-z]+", (provider_name or '').lower())
+    return {word for word in words if len(word) >= 3 and word not in _GENERIC_WORDS}
+
+def _payment_months(payment: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """First and last month index a payment applies to, from its monthly or quarterly fields."""
+    if payment['applied_start_month'] and payment['applied_start_month_year']:
+        start = _month_index(payment['applied_start_month_year'], payment['applied_start_month'])
+        end = _month_index(
+            payment['applied_end_month_year'] or payment['applied_start_month_year'],
+            payment['applied_end_month'] or payment['applied_start_month']
+        )
+        return start, max(start, end)
+    if payment['applied_start_quarter'] and payment['applied_start_quarter_year']:
+        start = _month_index(payment['applied_start_quarter_year'], payment['applied_start_quarter'] * 3 - 2)
+        end = _month_index(
+            payment['applied_end_quarter_year'] or payment['applied_start_quarter_year'],
+            (payment['applied_end_quarter'] or payment['applied_start_quarter']) * 3
+        )
+        return start, max(start, end)
+    return None
+
+def _period_label(start: int, end: int) -> str:
+    names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    first = f"{names[start % 12]} {start // 12}"
+    return first if start == end else f"{first} - {names[end % 12]} {end // 12}"
+
+class PeriodIndex:
+    """
+    A client's payments indexed by every month they apply to, built from one
+    query so each file is matched with dictionary lookups only.
+    """
+
+    def __init__(self, payments: List[Dict[str, Any]]):
+        self.by_month: Dict[int, List[Dict[str, Any]]] = {}
+        self.providers: Dict[str, Set[str]] = {}
+        for payment in payments:
+            months = _payment_months(payment)
+            if months is None:
+                continue
+            entry = dict(payment, months=months, provider_words=_provider_words(payment['provider_name']))
+            for month in range(months[0], months[1] + 1):
+                self.by_month.setdefault(month, []).append(entry)
+            if payment['provider_name']:
+                self.providers[payment['provider_name']] = entry['provider_words']
+
+    def providers_in(self, path: str) -> List[str]:
+        """Providers of this client named in a file name."""
+        words = set(re.findall(r"[a-z]+", path.replace('\\', '/').rsplit('/', 1)[-1].lower()))
+        return sorted(name for name, provider_words in self.providers.items() if provider_words & words)
+
+    def candidates(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Payments applying to any month in [start, end], each once."""
+        found: Dict[int, Dict[str, Any]] = {}
+        for month in range(start, end + 1):
+            for payment in self.by_month.get(month, []):
+                found.setdefault(payment['payment_id'], payment)
+        return list(found.values())
+
+def match_client_files(
+    client_id: int,
+    min_confidence: float = 0.5,
+    path_prefix: Optional[str] = None,
+    apply: bool = False
+) -> Dict[str, Any]:
+    """
+    Propose payment links for a client's documents.
+
+    Each file name is parsed for a period (date, month, month range, quarter
+    or year) and provider names. Payments are scored by how much of their
+    applied period the document covers and whether the document names the
+    payment's provider; a document naming a different provider is not
+    matched to that payment. Existing links are not proposed again.
+
+    Args:
+        client_id: Client ID
+        min_confidence: Lowest score (0-1) to propose
+        path_prefix: Only match files under this folder
+        apply: Link every proposal in one transaction
+
+    Returns:
+        Dictionary with proposals per file, applied link results (None
+        without apply) and stats
+    """
+    index = PeriodIndex(payment_queries.get_client_payment_periods(client_id))
+    linked = {(link['payment_id'], link['file_id']) for link in payment_queries.get_client_payment_links(client_id)}
+    prefix = path_prefix.replace('\\', '/').rstrip('/') + '/' if path_prefix else None
+
+    files = [
+        f for f in file_queries.get_client_files(client_id)
+        if not f.get('missing_since') and (prefix is None or f['onedrive_path'].replace('\\', '/').startswith(prefix))
+    ]
+
+    proposals = []
+    files_parsed = 0
+    for file in files:
+        period = parse_period(file['onedrive_path'])
+        if period is None:
+            continue
+        files_parsed += 1
+        kind, start, end = period
+        named = index.providers_in(file['onedrive_path'])
+
+        matches = []
+        for payment in index.candidates(start, end):
+            if (payment['payment_id'], file['file_id']) in linked:
+                continue
+            if named and payment['provider_name'] not in named:
+                continue
+            pay_start, pay_end = payment['months']
+            covered = min(end, pay_end) - max(start, pay_start) + 1
+            coverage = covered / (pay_end - pay_start + 1)
+            confidence = PERIOD_WEIGHT * coverage * _KIND_WEIGHT[kind] + (PROVIDER_WEIGHT if named else 0.0)
+            if confidence >= min_confidence:
+                matches.append({
+                    "payment_id": payment['payment_id'],
+                    "received_date": payment['received_date'],
+                    "provider_name": payment['provider_name'],
+                    "period": _period_label(pay_start, pay_end),
+                    "confidence": round(confidence, 3)
+                })
+
+        if matches:
+            matches.sort(key=lambda m: (-m["confidence"], m["received_date"] or ""))
+            proposals.append({
+                "file_id": file['file_id'],
+                "file_name": file['file_name'],
+                "onedrive_path": file['onedrive_path'],
+                "period": _period_label(start, end),
+                "providers": named,
+                "payments": matches
+            })
+
+    applied = None
+    if apply and proposals:
+        pairs = [(m["payment_id"], p["file_id"]) for p in proposals for m in p["payments"]]
+        applied = file_service.update_payment_links(client_id, pairs)["counts"]
+
+    return {
+        "client_id": client_id,
+        "proposals": proposals,
+        "applied": applied,
+        "stats": {
+            "files_checked": len(files),
+            "files_parsed": files_parsed,
+            "files_matched": len(proposals),
+            "links_proposed": sum(len(p["payments"]) for p in proposals)
+        }
+    }
@@ -0,0 +1,181 @@
+# backend/services/path_service.py
+# Resolution of the shared folder and client folders, cached between calls
+
+from database.queries import clients as client_queries
+from typing import Dict, Optional, Tuple
+from pathlib import Path
+import os
+import json
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+
+# Config file path for shared folder settings
+CONFIG_FILE = os.path.join(BACKEND_DIR, "config", "file_paths.json")
+
+# How long to trust the development temp folder before probing for the real one again
+FALLBACK_RECHECK_SECONDS = 30.0
+
+_lock = threading.Lock()
+_shared: Optional[Tuple[Path, str]] = None
+_shared_config_mtime: Optional[int] = None
+_shared_expires: Optional[float] = None
+_client_folders: Dict[int, Path] = {}
+
+def _resolve_shared_folder() -> Tuple[Path, str]:
+    """
+    Locate the shared team folder where documents are stored.
+    Adapts to different user environments.
+    
+    Returns:
+        Tuple of (full path to shared folder, base path used)
+    """
+    # Default path components
+    default_shared_path = "Hohimer Wealth Management\\Hohimer Company Portal - Company\\Hohimer Team Shared 4-15-19"
+    
+    # Try to load from config if it exists
+    config_path = default_shared_path
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, 'r') as f:
+                config = json.load(f)
+                if 'shared_folder_path' in config:
+                    config_path = config['shared_folder_path']
+        except Exception as e:
+            print(f"Error loading config: {e}")
+    
+    # Determine user home directory
+    user_home = os.path.expanduser("~")
+    
+    # List of possible path patterns to try
+    possible_paths = [
+        # Standard Windows OneDrive path
+        os.path.join(user_home, config_path),
+        # Alternate path structure
+        os.path.join(user_home, "OneDrive - Hohimer Wealth Management", config_path.split("Hohimer Wealth Management\\")[1]) 
+        if "\\" in config_path else "",
+        # Possible Linux path
+        os.path.join(user_home, config_path.replace("\\", "/")),
+    ]
+    
+    # Try each path
+    for path in possible_paths:
+        if path and os.path.exists(path):
+            return Path(path), config_path
+    
+    # If no paths work, create a temp directory for development
+    temp_dir = os.path.join(BACKEND_DIR, "temp_onedrive")
+    os.makedirs(temp_dir, exist_ok=True)
+    print(f"WARNING: Could not find shared folder. Using temp dir: {temp_dir}")
+    return Path(temp_dir), "temp_onedrive"
+
+def _resolve_client_folder(client_id: int, shared_folder: Path) -> Path:
+    """
+    Locate a client's folder in the shared directory.
+    Uses the client's onedrive_folder_path from the database.
+    
+    Args:
+        client_id: Client ID
+        shared_folder: Resolved shared folder root
+        
+    Returns:
+        Path object for client folder
+    """
+    # Get client data
+    client = client_queries.get_client_by_id(client_id)
+    if not client or not client.get('onedrive_folder_path'):
+        # If no folder path specified, use "Unknown Client" folder
+        client_path = Path(shared_folder) / "Unknown Clients" / f"Client_{client_id}"
+        # Ensure folder exists
+        os.makedirs(client_path, exist_ok=True)
+        return client_path
+    
+    # Use specified path (normalize slashes)
+    folder_path = client['onedrive_folder_path'].replace('/', '\\')
+    
+    # Check if path is already absolute
+    if os.path.isabs(folder_path):
+        return Path(folder_path)
+    
+    # Combine with shared folder path
+    client_path = Path(shared_folder) / folder_path
+    
+    # Check if directory exists
+    if not os.path.exists(client_path):
+        print(f"WARNING: Client folder not found: {client_path}")
+    
+    return client_path
+
+def _config_mtime() -> Optional[int]:
+    try:
+        return os.stat(CONFIG_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+def get_shared_folder_path() -> Tuple[Path, str]:
+    """
+    Get the path to the shared team folder where documents are stored.
+    Resolved once and reused until the config file changes (checked with a
+    single stat) or invalidate() is called.
+    
+    Returns:
+        Tuple of (full path to shared folder, base path used)
+    """
+    global _shared, _shared_config_mtime, _shared_expires
+    config_mtime = _config_mtime()
+    with _lock:
+        if (_shared is not None and config_mtime == _shared_config_mtime
+                and (_shared_expires is None or time.monotonic() < _shared_expires)):
+            return _shared
+    
+    shared = _resolve_shared_folder()
+    with _lock:
+        if _shared is not None and shared[0] != _shared[0]:
+            # Client folders may be relative to the old root
+            _client_folders.clear()
+        _shared = shared
+        _shared_config_mtime = config_mtime
+        _shared_expires = time.monotonic() + FALLBACK_RECHECK_SECONDS if shared[1] == "temp_onedrive" else None
+    return shared
+
+def get_client_folder_path(client_id: int) -> Path:
+    """
+    Get the path to a client's folder in the shared directory.
+    Cached per client until the shared folder or the client's folder path changes.
+    
+    Args:
+        client_id: Client ID
+        
+    Returns:
+        Path object for client folder
+    """
+    shared_folder, _ = get_shared_folder_path()
+    with _lock:
+        cached = _client_folders.get(client_id)
+    if cached is not None:
+        return cached
+    
+    client_path = _resolve_client_folder(client_id, shared_folder)
+    with _lock:
+        _client_folders[client_id] = client_path
+    return client_path
+
+def invalidate() -> None:
+    """Forget every resolved path, e.g. after the shared folder is reconfigured."""
+    global _shared, _shared_config_mtime, _shared_expires
+    with _lock:
+        _shared = None
+        _shared_config_mtime = None
+        _shared_expires = None
+        _client_folders.clear()
+
+def invalidate_client(client_id: int) -> None:
+    """
+    Forget a client's resolved folder, e.g. after its folder path is updated.
+    
+    Args:
+        client_id: Client ID
+    """
+    with _lock:
+        _client_folders.pop(client_id, None)
@@ -4,6 +4,7 @@
 from database.queries import payments as payment_queries
 from database.queries import clients as client_queries
 from models.schemas import Payment, PaymentCreate, PaymentUpdate, PaymentWithDetails, PaginatedResponse
+from utils import to_cents, from_cents, row_from_cents
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, date
 import uuid
@@ -12,6 +13,13 @@ from fastapi import HTTPException
 
 def get_client_payments(client_id: int, page: int = 1, page_size: int = 20) -> PaginatedResponse:
 
+    return PaginatedResponse(**get_client_payments_page(client_id, page, page_size))
+
+def get_client_payments_page(client_id: int, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+    """
+    Get one page of a client's payment history as plain dictionaries,
+    ready to serialize without further validation.
+    """
     # Check if client exists
     client = client_queries.get_client_by_id(client_id)
     if not client:
@@ -24,12 +32,12 @@ def get_client_payments(client_id: int, page: int = 1, page_size: int = 20) -> P
     payments, total = payment_queries.get_client_payments(client_id, page_size, offset)
     
     # Return paginated response
-    return PaginatedResponse(
-        total=total,
-        page=page,
-        page_size=page_size,
-        items=payments
-    )
+    return {
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "items": [row_from_cents(payment) for payment in payments]
+    }
 
 def get_payment_by_id(payment_id: int) -> Optional[PaymentWithDetails]:
  
@@ -41,7 +49,7 @@ def get_payment_by_id(payment_id: int) -> Optional[PaymentWithDetails]:
     files = payment_queries.get_payment_files(payment_id)
     
     # Create PaymentWithDetails object
-    payment_detail = PaymentWithDetails(**payment, files=files)
+    payment_detail = PaymentWithDetails(**row_from_cents(payment), files=files)
     return payment_detail
 
 def create_payment(payment_data: PaymentCreate) -> Dict[str, Any]:
@@ -64,9 +72,9 @@ def create_payment(payment_data: PaymentCreate) -> Dict[str, Any]:
     period_type = 'month' if is_monthly else 'quarter'
     
     # Calculate expected fee if assets provided
-    expected_fee = None
+    expected_fee_cents = None
     if payment_data.total_assets is not None:
-        expected_fee = payment_queries.calculate_expected_fee(
+        expected_fee_cents = payment_queries.calculate_expected_fee(
             payment_data.contract_id, 
             payment_data.total_assets, 
             period_type
@@ -93,8 +101,8 @@ def create_payment(payment_data: PaymentCreate) -> Dict[str, Any]:
             client_id=payment_data.client_id,
             received_date=payment_data.received_date,
             total_assets=payment_data.total_assets,
-            expected_fee=expected_fee,
-            actual_fee=float(payment_data.actual_fee),
+            expected_fee_cents=expected_fee_cents,
+            actual_fee_cents=to_cents(payment_data.actual_fee),
             method=payment_data.method,
             notes=payment_data.notes,
             applied_start_month=payment_data.start_period,
@@ -113,8 +121,8 @@ def create_payment(payment_data: PaymentCreate) -> Dict[str, Any]:
             client_id=payment_data.client_id,
             received_date=payment_data.received_date,
             total_assets=payment_data.total_assets,
-            expected_fee=expected_fee,
-            actual_fee=float(payment_data.actual_fee),
+            expected_fee_cents=expected_fee_cents,
+            actual_fee_cents=to_cents(payment_data.actual_fee),
             method=payment_data.method,
             notes=payment_data.notes,
             applied_start_month=None,
@@ -140,15 +148,12 @@ def update_payment(payment_id: int, payment_data: PaymentUpdate) -> Dict[str, An
     if not existing_payment:
         return {"success": False, "message": "Payment not found"}
     
-    # Convert Decimal to float for database
-    actual_fee = float(payment_data.actual_fee) if payment_data.actual_fee is not None else None
-    
     # Update payment
     success = payment_queries.update_payment(
         payment_id=payment_id,
         received_date=payment_data.received_date,
         total_assets=payment_data.total_assets,
-        actual_fee=actual_fee,
+        actual_fee_cents=to_cents(payment_data.actual_fee),
         method=payment_data.method,
         notes=payment_data.notes
     )
@@ -166,15 +171,15 @@ def update_payment(payment_id: int, payment_data: PaymentUpdate) -> Dict[str, An
             period_type = 'month' if is_monthly else 'quarter'
             
             # Calculate new expected fee
-            expected_fee = payment_queries.calculate_expected_fee(
+            expected_fee_cents = payment_queries.calculate_expected_fee(
                 payment['contract_id'], 
                 payment_data.total_assets, 
                 period_type
             )
             
             # Update expected fee
-            if expected_fee is not None:
-                payment_queries.update_expected_fee(payment_id, expected_fee)
+            if expected_fee_cents is not None:
+                payment_queries.update_expected_fee(payment_id, expected_fee_cents)
     
     return {"success": True, "payment_id": payment_id}
 
@@ -192,6 +197,31 @@ def delete_payment(payment_id: int) -> Dict[str, Any]:
     
     return {"success": True}
 
+def restore_payment(payment_id: int) -> Dict[str, Any]:
+    """
+    Undo the soft delete of a payment. The restore is tried first as a
+    single conditional update; the payment is only read again to explain
+    a refusal.
+    
+    Args:
+        payment_id: ID of the deleted payment
+        
+    Returns:
+        Dictionary with success, status (restored, not_found, not_deleted,
+        client_deleted or contract_deleted) and a message on failure
+    """
+    if payment_queries.restore_payment(payment_id):
+        return {"success": True, "status": "restored", "payment_id": payment_id}
+    
+    state = payment_queries.get_payment_state(payment_id)
+    if not state:
+        return {"success": False, "status": "not_found", "message": "Payment not found"}
+    if state['valid_to'] is None:
+        return {"success": False, "status": "not_deleted", "message": "Payment is not deleted"}
+    if not state['client_current']:
+        return {"success": False, "status": "client_deleted", "message": "The payment's client has been deleted"}
+    return {"success": False, "status": "contract_deleted", "message": "The payment's contract has been deleted"}
+
 def calculate_expected_fee(
     client_id: int,
     contract_id: int,
@@ -231,11 +261,11 @@ def calculate_expected_fee(
             total_assets = int(metrics['last_recorded_assets'])
     
     # Calculate expected fee
-    expected_fee = payment_queries.calculate_expected_fee(contract_id, total_assets, period_type)
+    expected_fee_cents = payment_queries.calculate_expected_fee(contract_id, total_assets, period_type)
     
     # Determine calculation method
     if fee_type == 'flat':
-        flat_rate = contract['flat_rate']
+        flat_rate = from_cents(contract['flat_rate_cents'])
         period_label = "monthly" if period_type == "month" else "quarterly"
         calculation_method = f"Flat fee ({period_label}): ${flat_rate:,.2f}"
     elif fee_type in ('percentage', 'percent'):
@@ -249,7 +279,7 @@ def calculate_expected_fee(
         calculation_method = "Unknown fee type"
     
     return {
-        "expected_fee": expected_fee,
+        "expected_fee": from_cents(expected_fee_cents),
         "fee_type": fee_type,
         "calculation_method": calculation_method
     }
@@ -264,7 +294,7 @@ def get_available_periods(client_id: int, contract_id: int) -> Dict[str, Any]:
     contract_query = """
         SELECT 
             contract_id, client_id, contract_number, provider_name,
-            contract_start_date, fee_type, percent_rate, flat_rate,
+            contract_start_date, fee_type, percent_rate, flat_rate_cents,
             payment_schedule, num_people, notes
         FROM contracts
         WHERE contract_id = ? AND client_id = ? AND valid_to IS NULL
@@ -0,0 +1,275 @@
+# backend/services/preview_service.py
+# Thumbnails and text previews for the document viewer, cached by content hash
+
+from database.queries import files as file_queries
+from services import file_service
+from services.storage import StorageBackend, FileStat
+from services.text_extraction import office_text
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, List, BinaryIO, Tuple, Union
+from pathlib import Path
+import hashlib
+import io
+import os
+import threading
+
+try:
+    from PIL import Image
+except ImportError:  # no image thumbnails
+    Image = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # no PDF previews
+    pdfium = None
+
+# Previews depend only on content, so they are shared by every copy of a document
+PREVIEW_DIR = Path(os.environ.get(
+    "PREVIEW_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "previews")
+))
+
+PREVIEW_KINDS = ("thumbnail", "text")
+THUMBNAIL_SIZE = (320, 320)
+TEXT_PREVIEW_CHARS = 4096
+
+IMAGE_EXTENSIONS = ('.png', '.jpeg', '.jpg', '.tiff', '.webp')
+TEXT_EXTENSIONS = ('.txt', '.csv')
+
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("PREVIEW_WORKERS", "2")), thread_name_prefix="preview")
+_pending: Dict[int, Future] = {}
+_pending_lock = threading.Lock()
+
+def _preview_path(sha256: str, kind: str) -> Path:
+    suffix = ".thumb.png" if kind == "thumbnail" else ".txt"
+    return PREVIEW_DIR / sha256[:2] / f"{sha256}{suffix}"
+
+def _marker_path(sha256: str) -> Path:
+    """Written once a document has been processed, even if it had no preview."""
+    return PREVIEW_DIR / sha256[:2] / f"{sha256}.done"
+
+def _stat_path(storage: StorageBackend, path: str, stat: FileStat) -> Path:
+    """Holds the content hash of a document at one size and mtime."""
+    digest = hashlib.sha256(f"{storage.key(path)}\0{stat.mtime_ns}\0{stat.size}".encode()).hexdigest()
+    return PREVIEW_DIR / "stat" / digest[:2] / digest
+
+def _known_hash(storage: StorageBackend, path: str, stat: FileStat) -> Optional[str]:
+    """
+    Content hash of a document as it is now, if it was hashed since it last
+    changed. The hash stored in client_files is not used, as nothing
+    updates it when a file is edited on disk.
+    """
+    try:
+        return _stat_path(storage, path, stat).read_text() or None
+    except OSError:
+        return None
+
+def _hash_stream(f: BinaryIO) -> Tuple[str, int]:
+    """Hash a document in chunks; returns the hex digest and size."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: f.read(1024 * 1024), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    os.makedirs(path.parent, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _thumbnail_png(image: "Image.Image") -> bytes:
+    image.thumbnail(THUMBNAIL_SIZE)
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGB')
+    out = io.BytesIO()
+    image.save(out, format='PNG', optimize=True)
+    return out.getvalue()
+
+def render_previews(data: Union[bytes, BinaryIO], extension: str) -> Dict[str, bytes]:
+    """
+    Build the previews available for a document. Given a file, only what
+    the preview needs is read: the first page of a PDF, the start of a
+    text file, the text parts of an Office document.
+
+    Args:
+        data: Document content, or a seekable binary file
+        extension: Lower-case file extension including the dot
+
+    Returns:
+        Dictionary of kind -> preview bytes (PNG for thumbnail, UTF-8 for text)
+    """
+    previews: Dict[str, bytes] = {}
+    text = None
+    source = io.BytesIO(data) if isinstance(data, bytes) else data
+
+    if extension in IMAGE_EXTENSIONS and Image is not None:
+        with Image.open(source) as image:
+            previews["thumbnail"] = _thumbnail_png(image)
+    elif extension == '.pdf' and pdfium is not None:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            if len(pdf):
+                page = pdf[0]
+                if Image is not None:
+                    previews["thumbnail"] = _thumbnail_png(page.render(scale=1).to_pil())
+                text = page.get_textpage().get_text_range()
+        finally:
+            pdf.close()
+    elif extension in TEXT_EXTENSIONS:
+        text = source.read(TEXT_PREVIEW_CHARS * 4).decode('utf-8', errors='replace')
+    elif extension in ('.docx', '.xlsx'):
+        text = office_text(source, extension)
+
+    if text:
+        previews["text"] = text[:TEXT_PREVIEW_CHARS].encode('utf-8')
+    return previews
+
+def _generate(file_id: int) -> Optional[str]:
+    """
+    Generate and cache previews for a file.
+
+    Returns:
+        Content hash the previews are stored under, or None if the file is gone
+    """
+    file_info = file_queries.get_file_by_id(file_id)
+    if not file_info:
+        return None
+    storage = file_service.get_storage()
+    path = file_info['onedrive_path']
+    stat = storage.stat(path)
+    if stat is None:
+        return None
+
+    sha256 = _known_hash(storage, path, stat)
+    if sha256 is None:
+        try:
+            with storage.open(path) as f:
+                sha256, size = _hash_stream(f)
+        except OSError:
+            return None
+        if sha256 != file_info.get('sha256'):
+            # Backfills hashes of files registered from disk and corrects stale ones
+            file_queries.set_file_content_hash(file_id, size, sha256)
+        _write_atomic(_stat_path(storage, path, stat), sha256.encode())
+
+    if _marker_path(sha256).exists():
+        return sha256
+
+    try:
+        f = storage.open(path)
+    except OSError:
+        return None
+    try:
+        with f:
+            previews = render_previews(f, os.path.splitext(path)[1].lower())
+    except Exception as e:
+        print(f"Error rendering preview for file {file_id}: {e}")
+        previews = {}
+
+    for kind, content in previews.items():
+        _write_atomic(_preview_path(sha256, kind), content)
+    _write_atomic(_marker_path(sha256), b'')
+    return sha256
+
+def _submit(file_id: int) -> Future:
+    """Queue a file, reusing the pending job if it is already queued."""
+    with _pending_lock:
+        future = _pending.get(file_id)
+        if future is None:
+            future = _executor.submit(_generate, file_id)
+            _pending[file_id] = future
+            future.add_done_callback(lambda _: _discard(file_id))
+        return future
+
+def _discard(file_id: int) -> None:
+    with _pending_lock:
+        _pending.pop(file_id, None)
+
+def get_cached_preview(file_id: int, kind: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a cached preview without generating anything.
+
+    Args:
+        file_id: File ID
+        kind: "thumbnail" or "text"
+
+    Returns:
+        Dictionary with path, sha256 and media_type, or None if not cached
+    """
+    file_info = file_queries.get_file_by_id(file_id)
+    if not file_info:
+        return None
+    storage = file_service.get_storage()
+    stat = storage.stat(file_info['onedrive_path'])
+    sha256 = _known_hash(storage, file_info['onedrive_path'], stat) if stat else None
+    if not sha256:
+        return None
+    path = _preview_path(sha256, kind)
+    if not path.exists():
+        return None
+    return {
+        "path": str(path),
+        "sha256": sha256,
+        "media_type": "image/png" if kind == "thumbnail" else "text/plain; charset=utf-8"
+    }
+
+def get_preview(file_id: int, kind: str) -> Dict[str, Any]:
+    """
+    Get a file's preview, generating it first if it is not cached yet.
+
+    Args:
+        file_id: File ID
+        kind: "thumbnail" or "text"
+
+    Returns:
+        Dictionary with success and, when available, path, sha256 and media_type
+    """
+    if kind not in PREVIEW_KINDS:
+        raise ValueError(f"Unknown preview kind: {kind}")
+
+    cached = get_cached_preview(file_id, kind)
+    if cached:
+        return dict(cached, success=True)
+
+    sha256 = _submit(file_id).result()
+    if sha256 is None:
+        return {"success": False, "message": "File not found"}
+
+    cached = get_cached_preview(file_id, kind)
+    if not cached:
+        return {"success": False, "message": f"No {kind} preview available for this file"}
+    return dict(cached, success=True)
+
+def stop_previews() -> None:
+    """Drop queued preview jobs and stop the preview threads, e.g. at shutdown."""
+    _executor.shutdown(wait=True, cancel_futures=True)
+
+def warm_previews(file_ids: List[int]) -> int:
+    """
+    Queue preview generation in the background.
+
+    Args:
+        file_ids: Files to generate previews for
+
+    Returns:
+        Number of files queued
+    """
+    for file_id in file_ids:
+        _submit(file_id)
+    return len(file_ids)
+
+def warm_recent_payment_previews(limit: int = 100) -> int:
+    """
+    Queue previews for files linked to the most recent payments, which are
+    the ones the document viewer is most likely to open next.
+
+    Args:
+        limit: Maximum number of files
+
+    Returns:
+        Number of files queued
+    """
+    return warm_previews(file_queries.get_recent_payment_file_ids(limit))
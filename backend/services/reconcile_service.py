@@ -0,0 +1,173 @@
+# backend/services/reconcile_service.py
+# Reconciliation of registered files (client_files) against what is on disk (the manifest)
+
+from database.queries import clients as client_queries
+from database.queries import files as file_queries
+from database.queries import manifest as manifest_queries
+from services import file_service, manifest_service
+from services.duplicate_service import hash_file
+from typing import List, Dict, Any, Optional, Tuple
+import os
+import time
+
+def _refresh_manifests(full: bool) -> int:
+    """Rescan every client folder so the manifest reflects the disk; returns clients scanned."""
+    shared_folder, _ = file_service.get_shared_folder_path()
+    scanned = 0
+    for client in client_queries.get_all_clients():
+        if not client.get('onedrive_folder_path'):
+            continue
+        client_path = file_service.get_client_folder_path(client['client_id'])
+        if not os.path.isdir(client_path):
+            continue
+        manifest_service.scan_tree(client['client_id'], client_path, shared_folder, file_service.is_valid_file_type, full)
+        scanned += 1
+    return scanned
+
+def _merge(rows: List[Dict[str, Any]], disk: List[Dict[str, Any]]) -> Tuple[list, list, list]:
+    """
+    Walk registered files and manifest files together; both are sorted by
+    (client_id, path), so each side is read once.
+
+    Returns:
+        Tuple of (rows not on disk, disk files not registered, rows on disk)
+    """
+    orphaned, unregistered, present = [], [], []
+    i = j = 0
+    last_matched = None
+    while i < len(rows) or j < len(disk):
+        row_key = (rows[i]['client_id'], rows[i]['path']) if i < len(rows) else None
+        disk_key = (disk[j]['client_id'], disk[j]['path']) if j < len(disk) else None
+
+        if disk_key is None or (row_key is not None and row_key < disk_key):
+            orphaned.append(rows[i])
+            i += 1
+        elif row_key is None or disk_key < row_key:
+            # Several rows can point at one file; only report files no row matched
+            if disk_key != last_matched:
+                unregistered.append(disk[j])
+            j += 1
+        else:
+            present.append(rows[i])
+            last_matched = disk_key
+            i += 1
+    return orphaned, unregistered, present
+
+def _match_moves(
+    orphaned: List[Dict[str, Any]],
+    unregistered: List[Dict[str, Any]],
+    shared_folder,
+    hashes: Dict[str, Optional[str]]
+) -> List[Tuple[Dict[str, Any], Dict[str, Any], str]]:
+    """
+    Pair rows whose file is gone with unregistered files of the same client
+    that hold the same document: by content hash when the row has one (only
+    same-size files are hashed), otherwise by file name and size, or by a
+    unique file name when the row's size is unknown. Hashes computed are
+    kept in hashes (path -> digest).
+
+    Returns:
+        List of (row, disk entry, matched_on)
+    """
+    by_client: Dict[int, List[Dict[str, Any]]] = {}
+    for entry in unregistered:
+        by_client.setdefault(entry['client_id'], []).append(entry)
+
+    def content_hash(entry: Dict[str, Any]) -> Optional[str]:
+        if entry['path'] not in hashes:
+            hashes[entry['path']] = hash_file(os.path.join(shared_folder, entry['path']))
+        return hashes[entry['path']]
+
+    moves = []
+    taken = set()
+    for row in orphaned:
+        candidates = [e for e in by_client.get(row['client_id'], []) if (e['client_id'], e['path']) not in taken]
+        name = row['path'].rsplit('/', 1)[-1]
+        match, matched_on = None, None
+
+        if row['sha256'] and row['size_bytes'] is not None:
+            match = next((e for e in candidates if e['size'] == row['size_bytes'] and content_hash(e) == row['sha256']), None)
+            matched_on = "hash"
+        elif row['size_bytes'] is not None:
+            match = next((e for e in candidates if e['size'] == row['size_bytes'] and e['path'].rsplit('/', 1)[-1] == name), None)
+            matched_on = "name_size"
+        else:
+            same_name = [e for e in candidates if e['path'].rsplit('/', 1)[-1] == name]
+            match = same_name[0] if len(same_name) == 1 else None
+            matched_on = "name"
+
+        if match:
+            taken.add((match['client_id'], match['path']))
+            moves.append((row, match, matched_on))
+    return moves
+
+def reconcile_files(apply: bool = False, rescan: bool = True, full: bool = False) -> Dict[str, Any]:
+    """
+    Compare every client_files row with the files on disk and report
+    orphaned rows, unregistered files and moved files.
+
+    The manifest is refreshed first (incrementally, unless full), then both
+    sides are read sorted by (client_id, path) and compared in one merge
+    pass. Rows of clients whose folder has never been scanned are counted
+    as unverified rather than orphaned. With apply, every fix is written in
+    one transaction: unregistered files are registered, moved files get
+    their new path (keeping file_id and payment links), and orphaned rows
+    are flagged with missing_since rather than deleted.
+
+    Args:
+        apply: Write the fixes
+        rescan: Refresh the manifest from disk first
+        full: Rescan every folder, not only those whose mtime changed
+
+    Returns:
+        Dictionary with orphaned, unregistered, moved and restored entries,
+        applied counts (None without apply) and stats
+    """
+    started = time.monotonic()
+    shared_folder, _ = file_service.get_shared_folder_path()
+    clients_scanned = _refresh_manifests(full) if rescan else None
+
+    scanned_clients = set(manifest_queries.get_manifest_client_ids())
+    all_rows = file_queries.get_files_for_reconciliation()
+    rows = [row for row in all_rows if row['client_id'] in scanned_clients]
+    disk = manifest_queries.get_all_manifest_files()
+
+    orphaned, unregistered, present = _merge(rows, disk)
+    hashes: Dict[str, Optional[str]] = {}
+    moves = _match_moves(orphaned, unregistered, shared_folder, hashes)
+    moved_rows = {row['file_id'] for row, _, _ in moves}
+    moved_files = {(entry['client_id'], entry['path']) for _, entry, _ in moves}
+    orphaned = [row for row in orphaned if row['file_id'] not in moved_rows]
+    unregistered = [entry for entry in unregistered if (entry['client_id'], entry['path']) not in moved_files]
+    restored = [row for row in present if row['missing_since']]
+
+    applied = None
+    if apply:
+        applied = file_queries.apply_reconciliation(
+            added=[(e['client_id'], e['path'].rsplit('/', 1)[-1], e['path']) for e in unregistered],
+            moved=[(row['file_id'], entry['path']) for row, entry, _ in moves],
+            restored=[row['file_id'] for row in restored],
+            missing=[row['file_id'] for row in orphaned]
+        )
+
+    return {
+        "orphaned": [
+            {"file_id": r['file_id'], "client_id": r['client_id'], "path": r['path'], "missing_since": r['missing_since']}
+            for r in orphaned
+        ],
+        "unregistered": [{"client_id": e['client_id'], "path": e['path'], "size": e['size']} for e in unregistered],
+        "moved": [
+            {"file_id": row['file_id'], "client_id": row['client_id'], "old_path": row['path'], "new_path": entry['path'], "matched_on": matched_on}
+            for row, entry, matched_on in moves
+        ],
+        "restored": [{"file_id": r['file_id'], "client_id": r['client_id'], "path": r['path']} for r in restored],
+        "applied": applied,
+        "stats": {
+            "clients_scanned": clients_scanned,
+            "rows_checked": len(rows),
+            "rows_unverified": len(all_rows) - len(rows),
+            "files_on_disk": len(disk),
+            "files_hashed": len(hashes),
+            "elapsed_seconds": round(time.monotonic() - started, 3)
+        }
+    }
@@ -0,0 +1,156 @@
+# backend/services/scan_job_service.py
+# Background jobs that scan and register documents for every client
+
+from database.queries import clients as client_queries
+from services import file_service, manifest_service
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Optional
+from datetime import datetime
+import threading
+import time
+import uuid
+import os
+
+# Folder walks are I/O bound, so threads overlap the stat calls well;
+# keep the pool small so SQLite writers don't queue behind each other
+DEFAULT_MAX_WORKERS = 8
+
+# Finished jobs kept for status lookups
+MAX_JOBS_KEPT = 20
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = threading.Lock()
+
+def _snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a job's status with derived timing fields filled in."""
+    status = dict(job, clients=list(job['clients']), errors=list(job['errors']))
+    end = job['_finished'] or time.monotonic()
+    elapsed = end - job['_started']
+    status['elapsed_seconds'] = round(elapsed, 3)
+    status['files_per_second'] = round(job['files_seen'] / elapsed, 1) if elapsed > 0 else 0.0
+    del status['_started'], status['_finished']
+    return status
+
+def _scan_client(client: Dict[str, Any], shared_folder, register: bool) -> Dict[str, Any]:
+    """
+    Scan one client folder and register its new files in a single batch.
+
+    Args:
+        client: Client row with client_id and onedrive_folder_path
+        shared_folder: Shared folder root
+        register: Whether to register files missing from the database
+
+    Returns:
+        Per-client result dictionary
+    """
+    client_id = client['client_id']
+    client_path = file_service.get_client_folder_path(client_id)
+    if not os.path.isdir(client_path):
+        return {"client_id": client_id, "status": "missing_folder", "files_seen": 0, "files_registered": 0}
+
+    scan = manifest_service.scan_tree(client_id, client_path, shared_folder, file_service.is_valid_file_type)
+    paths = [path for path, entry in scan['entries'].items() if not entry['is_dir']]
+    registered = file_service.register_scanned_files(client_id, paths) if register else 0
+
+    return {
+        "client_id": client_id,
+        "status": "scanned",
+        "files_seen": len(paths),
+        "files_registered": registered,
+        "added": len(scan['added']),
+        "removed": len(scan['removed'])
+    }
+
+def _run_job(job: Dict[str, Any], clients, register: bool, max_workers: int) -> None:
+    shared_folder, _ = file_service.get_shared_folder_path()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan") as pool:
+            futures = {pool.submit(_scan_client, client, shared_folder, register): client for client in clients}
+            for future in as_completed(futures):
+                client = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"client_id": client['client_id'], "status": "error", "files_seen": 0, "files_registered": 0}
+                    with _jobs_lock:
+                        job['errors'].append({"client_id": client['client_id'], "error": str(e)})
+                with _jobs_lock:
+                    job['clients'].append(result)
+                    job['clients_done'] += 1
+                    job['files_seen'] += result['files_seen']
+                    job['files_registered'] += result['files_registered']
+        state = "completed"
+    except Exception as e:
+        with _jobs_lock:
+            job['errors'].append({"client_id": None, "error": str(e)})
+        state = "failed"
+
+    with _jobs_lock:
+        job['state'] = state
+        job['finished_at'] = datetime.now().isoformat()
+        job['_finished'] = time.monotonic()
+
+def start_scan_all_job(register: bool = True, max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Any]:
+    """
+    Start scanning every client folder in the background.
+
+    Clients are scanned concurrently in a bounded thread pool; each client's
+    new files are inserted in one executemany batch. Only one scan-all job
+    runs at a time - if one is already running its status is returned.
+
+    Args:
+        register: Whether to register files missing from the database
+        max_workers: Maximum number of client folders scanned at once
+
+    Returns:
+        Job status dictionary
+    """
+    # Clients without a folder path have nothing to scan
+    clients = [c for c in client_queries.get_all_clients() if c.get('onedrive_folder_path')]
+
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "state": "running",
+        "register": register,
+        "max_workers": max_workers,
+        "clients_total": len(clients),
+        "clients_done": 0,
+        "files_seen": 0,
+        "files_registered": 0,
+        "clients": [],
+        "errors": [],
+        "started_at": datetime.now().isoformat(),
+        "finished_at": None,
+        "_started": time.monotonic(),
+        "_finished": None
+    }
+
+    with _jobs_lock:
+        for running in _jobs.values():
+            if running['state'] == "running":
+                return _snapshot(running)
+
+        # Drop the oldest finished jobs
+        finished = [job_id for job_id, j in _jobs.items() if j['state'] != "running"]
+        for job_id in finished[:max(0, len(_jobs) - MAX_JOBS_KEPT + 1)]:
+            del _jobs[job_id]
+        _jobs[job['job_id']] = job
+
+    threading.Thread(target=_run_job, args=(job, clients, register, max_workers), daemon=True).start()
+
+    with _jobs_lock:
+        return _snapshot(job)
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the status of a scan job.
+
+    Args:
+        job_id: Job ID returned by start_scan_all_job
+
+    Returns:
+        Job status dictionary or None if not found
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return _snapshot(job) if job else None
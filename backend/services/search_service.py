@@ -0,0 +1,31 @@
+# backend/services/search_service.py
+# Global search across clients, contacts, contracts and payments
+
+from database.queries import search as search_queries
+from typing import List, Dict, Any, Optional
+
+def global_search(
+    search_term: str,
+    entity_types: Optional[List[str]] = None,
+    client_id: Optional[int] = None,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """
+    Search every indexed entity type in one ranked query.
+    
+    Args:
+        search_term: Search text (each word matches as a prefix)
+        entity_types: Optional subset of client, contact, contract, payment
+        client_id: Optional client to restrict results to
+        limit: Maximum number of hits
+        
+    Returns:
+        List of typed search hits, best matches first
+    """
+    if entity_types:
+        unknown = [t for t in entity_types if t not in search_queries.SEARCH_ENTITY_TYPES]
+        if unknown:
+            valid_types = ", ".join(search_queries.SEARCH_ENTITY_TYPES)
+            raise ValueError(f"Unknown entity type(s): {', '.join(unknown)}. Valid types: {valid_types}")
+    
+    return search_queries.global_search(search_term, entity_types, client_id, limit)
@@ -0,0 +1,280 @@
+# backend/services/storage.py
+# Storage backends for client documents, with an optional local LRU cache tier
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, BinaryIO, NamedTuple, Tuple
+from pathlib import Path
+import hashlib
+import io
+import os
+import shutil
+import threading
+import time
+
+class FileStat(NamedTuple):
+    """Size and modification time of a stored document."""
+    size: int
+    mtime_ns: int
+
+class StorageBackend(ABC):
+    """
+    Where client documents are read from. Paths are the onedrive_path values
+    stored in client_files (relative to the shared folder).
+    """
+
+    @abstractmethod
+    def stat(self, path: str) -> Optional[FileStat]:
+        """Get size and mtime, or None if the document does not exist."""
+
+    @abstractmethod
+    def open(self, path: str) -> BinaryIO:
+        """Open a document for binary reading."""
+
+    def local_path(self, path: str) -> Optional[Path]:
+        """Get a path on local disk that can be served directly, if there is one."""
+        return None
+
+    def acquire(self, path: str) -> Optional[Path]:
+        """
+        Like local_path, but the file is kept in place until release is
+        called, e.g. while a response is streaming it.
+        """
+        return self.local_path(path)
+
+    def release(self, local_path: Path) -> None:
+        """Let a file returned by acquire be removed again."""
+
+    def key(self, path: str) -> str:
+        """Identify a document across backends, for cache keys."""
+        return path
+
+class LocalStorage(StorageBackend):
+    """Documents in a folder on disk, e.g. the synced OneDrive shared folder."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _full_path(self, path: str) -> Path:
+        return self.root / path
+
+    def stat(self, path: str) -> Optional[FileStat]:
+        try:
+            st = os.stat(self._full_path(path))
+        except OSError:
+            return None
+        return FileStat(st.st_size, st.st_mtime_ns)
+
+    def open(self, path: str) -> BinaryIO:
+        return open(self._full_path(path), 'rb')
+
+    def local_path(self, path: str) -> Optional[Path]:
+        return self._full_path(path)
+
+    def key(self, path: str) -> str:
+        return str(self._full_path(path))
+
+class MemoryStorage(StorageBackend):
+    """Documents held in memory, for tests."""
+
+    def __init__(self):
+        self._files: Dict[str, Tuple[bytes, int]] = {}
+
+    def write(self, path: str, data: bytes) -> None:
+        """Store a document, bumping its mtime."""
+        self._files[path] = (data, time.time_ns())
+
+    def stat(self, path: str) -> Optional[FileStat]:
+        if path not in self._files:
+            return None
+        data, mtime_ns = self._files[path]
+        return FileStat(len(data), mtime_ns)
+
+    def open(self, path: str) -> BinaryIO:
+        if path not in self._files:
+            raise FileNotFoundError(path)
+        return io.BytesIO(self._files[path][0])
+
+    def key(self, path: str) -> str:
+        return f"memory:{path}"
+
+class CachedStorage(StorageBackend):
+    """
+    Read-through cache of recently accessed documents on fast local disk.
+
+    Entries are keyed by the origin path and mtime, so an edited document
+    is fetched again rather than served stale; old versions age out. The
+    least recently used entries are evicted once the cache exceeds
+    max_bytes; entries held with acquire are skipped until released, so a
+    download in progress is never removed underneath it. Metadata (stat)
+    always comes from the origin, which does not trigger OneDrive on-demand
+    hydration.
+    """
+
+    def __init__(self, origin: StorageBackend, cache_dir: Path, max_bytes: int):
+        self.origin = origin
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        # Entry name -> number of acquire calls not yet released
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        """Pick up entries left by a previous run, oldest access first."""
+        existing = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.tmp'):
+                # Copy interrupted by a crash; recent ones may be another process's copy in progress
+                if time.time() - entry.stat().st_mtime < 3600:
+                    continue
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            elif entry.is_file():
+                st = entry.stat()
+                existing.append((st.st_atime_ns, entry.name, st.st_size))
+        for _, name, size in sorted(existing):
+            self._entries[name] = size
+            self._total += size
+        self._evict()
+
+    def _cache_name(self, path: str, stat: FileStat) -> str:
+        digest = hashlib.sha256(f"{self.origin.key(path)}\0{stat.mtime_ns}\0{stat.size}".encode()).hexdigest()
+        # Keep the extension so MIME types can still be guessed from the cached file
+        return digest + os.path.splitext(path)[1].lower()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries that are not acquired; call with the lock held."""
+        for name in list(self._entries):
+            if self._total <= self.max_bytes:
+                break
+            if name in self._pins or not self._remove(name):
+                continue
+            self._total -= self._entries.pop(name)
+
+    def _remove(self, name: str) -> bool:
+        """
+        Delete a cached file. False if it is still there, e.g. open for
+        reading on Windows; its entry is kept so a later eviction retries.
+        """
+        try:
+            os.remove(self.cache_dir / name)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+        return True
+
+    def _pin(self, name: str, pin: bool) -> None:
+        if pin:
+            self._pins[name] = self._pins.get(name, 0) + 1
+
+    def stat(self, path: str) -> Optional[FileStat]:
+        return self.origin.stat(path)
+
+    def local_path(self, path: str) -> Optional[Path]:
+        return self._fetch(path, pin=False)
+
+    def acquire(self, path: str) -> Optional[Path]:
+        return self._fetch(path, pin=True)
+
+    def release(self, local_path: Path) -> None:
+        name = Path(local_path).name
+        with self._lock:
+            count = self._pins.get(name)
+            if count is None:
+                # Served from the origin, not the cache
+                return
+            if count > 1:
+                self._pins[name] = count - 1
+            else:
+                del self._pins[name]
+                self._evict()
+
+    def _fetch(self, path: str, pin: bool) -> Optional[Path]:
+        """Get the cached copy of a document, copying it from the origin on a miss."""
+        stat = self.origin.stat(path)
+        if stat is None:
+            return None
+        # Documents too large for the cache are served from the origin
+        if stat.size > self.max_bytes:
+            return self.origin.local_path(path)
+
+        name = self._cache_name(path, stat)
+        cached = self.cache_dir / name
+        with self._lock:
+            if name in self._entries and cached.exists():
+                self._entries.move_to_end(name)
+                self._pin(name, pin)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        # Copy outside the lock so slow origin reads don't block cache hits
+        tmp = self.cache_dir / f"{name}.{threading.get_ident()}.tmp"
+        try:
+            with self.origin.open(path) as src, open(tmp, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(tmp, cached)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = stat.size
+                self._total += stat.size
+            self._entries.move_to_end(name)
+            self._pin(name, pin)
+            self._evict()
+        return cached
+
+    def open(self, path: str) -> BinaryIO:
+        stat = self.origin.stat(path)
+        if stat is None:
+            raise FileNotFoundError(path)
+        if stat.size > self.max_bytes:
+            return self.origin.open(path)
+        cached = self.acquire(path)
+        if cached is None:
+            raise FileNotFoundError(path)
+        try:
+            return open(cached, 'rb')
+        finally:
+            self.release(cached)
+
+    def key(self, path: str) -> str:
+        return self.origin.key(path)
+
+    def clear(self) -> None:
+        """Remove every cached document that is not acquired."""
+        with self._lock:
+            for name in [name for name in self._entries if name not in self._pins]:
+                if self._remove(name):
+                    self._total -= self._entries.pop(name)
+
+    def status(self) -> Dict[str, int]:
+        """
+        Get cache usage and hit counts.
+
+        Returns:
+            Dictionary with entries, bytes, max_bytes, hits and misses
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,144 @@
+# backend/services/text_extraction.py
+# Plain-text extraction from client documents. No database access, so it
+# can run in the content indexer's worker processes.
+
+from typing import BinaryIO, Dict, List, Optional, Union
+from xml.etree import ElementTree
+import hashlib
+import io
+import re
+import zipfile
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # no PDF text
+    pdfium = None
+
+EXTRACTABLE_EXTENSIONS = ('.pdf', '.docx', '.xlsx', '.csv', '.txt')
+
+# Text kept per document; enough for multi-hundred-page statements
+MAX_TEXT_CHARS = 2_000_000
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+def _docx_text(archive: zipfile.ZipFile) -> str:
+    root = ElementTree.fromstring(archive.read('word/document.xml'))
+    paragraphs = [
+        ''.join(node.text or '' for node in paragraph.iter() if _local_name(node.tag) == 't')
+        for paragraph in root.iter() if _local_name(paragraph.tag) == 'p'
+    ]
+    return '\n'.join(p for p in paragraphs if p)
+
+def _xlsx_text(archive: zipfile.ZipFile) -> str:
+    """Every sheet's cell values, one row per line - numbers included, not just strings."""
+    shared: List[str] = []
+    if 'xl/sharedStrings.xml' in archive.namelist():
+        for item in ElementTree.fromstring(archive.read('xl/sharedStrings.xml')):
+            shared.append(''.join(node.text or '' for node in item.iter() if _local_name(node.tag) == 't'))
+
+    sheets = sorted(
+        (name for name in archive.namelist() if re.match(r'xl/worksheets/sheet\d+\.xml$', name)),
+        key=lambda name: int(re.search(r'(\d+)\.xml$', name).group(1))
+    )
+    lines = []
+    for sheet in sheets:
+        for row in ElementTree.fromstring(archive.read(sheet)).iter():
+            if _local_name(row.tag) != 'row':
+                continue
+            cells = []
+            for cell in row:
+                kind = cell.get('t')
+                if kind == 'inlineStr':
+                    value = ''.join(node.text or '' for node in cell.iter() if _local_name(node.tag) == 't')
+                else:
+                    value = next((node.text for node in cell if _local_name(node.tag) == 'v'), None) or ''
+                    if kind == 's' and value.isdigit() and int(value) < len(shared):
+                        value = shared[int(value)]
+                if value:
+                    cells.append(value)
+            if cells:
+                lines.append('\t'.join(cells))
+    return '\n'.join(lines)
+
+def office_text(data: Union[bytes, BinaryIO], extension: str) -> Optional[str]:
+    """
+    Pull plain text out of .docx / .xlsx files, which are zipped XML.
+
+    Args:
+        data: Document content, or a seekable binary file (only the parts
+            holding text are read)
+        extension: '.docx' or '.xlsx'
+
+    Returns:
+        Extracted text, or None if the document could not be read
+    """
+    try:
+        with zipfile.ZipFile(io.BytesIO(data) if isinstance(data, bytes) else data) as archive:
+            return _docx_text(archive) if extension == '.docx' else _xlsx_text(archive)
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        return None
+
+def _pdf_text(data: bytes) -> Optional[str]:
+    if pdfium is None:
+        return None
+    pdf = pdfium.PdfDocument(data)
+    try:
+        pages = []
+        for index in range(len(pdf)):
+            pages.append(pdf[index].get_textpage().get_text_range())
+            if sum(len(page) for page in pages) >= MAX_TEXT_CHARS:
+                break
+        return '\n'.join(pages)
+    finally:
+        pdf.close()
+
+def extract_text(data: bytes, extension: str) -> Optional[str]:
+    """
+    Extract the searchable text of a document.
+
+    Args:
+        data: Document content
+        extension: Lower-case file extension including the dot
+
+    Returns:
+        Text (truncated to MAX_TEXT_CHARS), or None if the format has no
+        extractor here
+    """
+    if extension == '.pdf':
+        text = _pdf_text(data)
+    elif extension in ('.docx', '.xlsx'):
+        text = office_text(data, extension)
+    elif extension in ('.csv', '.txt'):
+        text = data[:MAX_TEXT_CHARS * 4].decode('utf-8', errors='replace')
+    else:
+        text = None
+    return text[:MAX_TEXT_CHARS] if text is not None else None
+
+def extract_document(source: Union[str, bytes], extension: str) -> Dict[str, Optional[Union[str, int]]]:
+    """
+    Hash a document and extract its text. Runs in the indexer's worker
+    processes, so it takes a path or bytes and never raises.
+
+    Args:
+        source: Absolute path on disk, or the document content
+        extension: Lower-case file extension including the dot
+
+    Returns:
+        Dictionary with sha256, size_bytes, text and error
+    """
+    result: Dict[str, Optional[Union[str, int]]] = {"sha256": None, "size_bytes": None, "text": None, "error": None}
+    try:
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                data = f.read()
+        else:
+            data = source
+        result["sha256"] = hashlib.sha256(data).hexdigest()
+        result["size_bytes"] = len(data)
+        result["text"] = extract_text(data, extension)
+        if result["text"] is None:
+            result["error"] = f"No text extractor available for {extension} files"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
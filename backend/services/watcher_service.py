@@ -0,0 +1,347 @@
+# backend/services/watcher_service.py
+# Background watcher that keeps client_files in sync with the shared folder
+
+from database.queries import clients as client_queries
+from database.queries import files as file_queries
+from database.queries import manifest as manifest_queries
+from services import file_service, manifest_service, content_index_service
+from typing import Dict, Any, Optional, List, Tuple
+import threading
+import time
+import os
+
+try:
+    # Native change notifications (inotify on Linux, ReadDirectoryChangesW on Windows)
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # polling only
+    Observer = None
+    FileSystemEventHandler = object
+
+# Seconds without new events before a client's folder is synced
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+
+# Seconds between sweeps when polling
+DEFAULT_POLL_INTERVAL = 60.0
+
+def _match_moves(
+    removed: List[str],
+    added: List[str],
+    previous: Dict[str, Dict[str, Any]],
+    entries: Dict[str, Dict[str, Any]]
+) -> List[Tuple[str, str]]:
+    """
+    Pair removed and added paths that are the same file after a rename or move.
+    Files match on inode when the filesystem reports one, otherwise on
+    file name and size, or on file name alone when the old size is unknown
+    and only one new file has that name.
+    """
+    by_inode, by_name = {}, {}
+    for path in added:
+        entry = entries[path]
+        if entry['inode']:
+            by_inode.setdefault((entry['inode'], entry['size']), []).append(path)
+        by_name.setdefault((path.rsplit('/', 1)[-1], entry['size']), []).append(path)
+
+    moves = []
+    taken = set()
+    for old_path in removed:
+        old = previous[old_path]
+        name = old_path.rsplit('/', 1)[-1]
+        candidates = by_inode.get((old['inode'], old['size'])) if old['inode'] else None
+        if not candidates and old['size'] is None:
+            same_name = [path for path in added if path.rsplit('/', 1)[-1] == name]
+            candidates = same_name if len(same_name) == 1 else None
+        if not candidates:
+            candidates = by_name.get((name, old['size']), [])
+        new_path = next((path for path in candidates if path not in taken), None)
+        if new_path:
+            taken.add(new_path)
+            moves.append((old_path, new_path))
+    return moves
+
+def sync_client(client_id: int) -> Dict[str, Any]:
+    """
+    Bring a client's registered files in line with its folder on disk.
+
+    Uses the manifest-backed incremental scan, so unchanged folders are not
+    listed. The files on disk are compared with the client's registered
+    files rather than with the previous manifest, since other scans also
+    advance the manifest. New files are registered, renamed or moved files
+    keep their file_id (and payment links) with an updated path, and files
+    that are gone are flagged with missing_since rather than deleted.
+
+    Args:
+        client_id: Client ID
+
+    Returns:
+        Dictionary with registered, restored, moved and missing counts
+    """
+    shared_folder, _ = file_service.get_shared_folder_path()
+    client_path = file_service.get_client_folder_path(client_id)
+    if not os.path.isdir(client_path):
+        return {"registered": 0, "restored": 0, "moved": 0, "missing": 0}
+
+    previous = manifest_queries.get_client_manifest(client_id)
+    scan = manifest_service.scan_tree(client_id, client_path, shared_folder, file_service.is_valid_file_type)
+    on_disk = {path for path, entry in scan['entries'].items() if not entry['is_dir']}
+
+    # Only rows under the client's current folder are expected on disk
+    prefix = os.path.relpath(client_path, shared_folder).replace(os.sep, '/') + '/'
+    rows = [row for row in file_queries.get_files_for_reconciliation(client_id) if row['path'].startswith(prefix)]
+    file_ids = {row['path']: row['file_id'] for row in rows}
+    registered = set(file_ids)
+    present = {row['path'] for row in rows if row['missing_since'] is None}
+
+    gone = sorted(present - on_disk)
+    unregistered = sorted(on_disk - registered)
+    baseline = {row['path']: {"inode": None, "size": row['size_bytes']} for row in rows}
+    baseline.update({path: entry for path, entry in previous.items() if path in baseline})
+
+    moves = _match_moves(gone, unregistered, baseline, scan['entries'])
+    moved_from = {old for old, _ in moves}
+    moved_to = {new for _, new in moves}
+
+    # Rows are updated by file_id, which the primary key serves directly
+    back = sorted(on_disk - present - moved_to)
+    return file_queries.apply_reconciliation(
+        added=[(client_id, path.rsplit('/', 1)[-1], path) for path in back if path not in registered],
+        moved=[(file_ids[old], new) for old, new in moves],
+        restored=[file_ids[path] for path in back if path in registered],
+        missing=[file_ids[path] for path in gone if path not in moved_from]
+    )
+
+class _EventHandler(FileSystemEventHandler):
+    """Forward every filesystem event to the watcher."""
+
+    def __init__(self, watcher: "FolderWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        self.watcher.notify(event.src_path)
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            self.watcher.notify(dest_path)
+
+class FolderWatcher:
+    """
+    Watch the shared folder and sync the clients whose folders change.
+
+    Events only mark a client as dirty; a client is synced once no new
+    events have arrived for debounce seconds, so a OneDrive download of many
+    files results in one sync. Without watchdog installed (or with
+    use_events=False) every client is swept each poll_interval instead,
+    which stays cheap because unchanged folders are skipped via the manifest.
+    """
+
+    def __init__(
+        self,
+        debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_events: bool = True
+    ):
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.mode = "events" if use_events and Observer is not None else "polling"
+        self._folders: List[Tuple[str, int]] = []
+        self._dirty: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+        self.stats = {"syncs": 0, "registered": 0, "restored": 0, "moved": 0, "missing": 0, "errors": 0, "last_sync": None}
+
+    def _load_client_folders(self) -> None:
+        """Map each client folder to its client, longest path first."""
+        folders = []
+        for client in client_queries.get_all_clients():
+            if client.get('onedrive_folder_path'):
+                folder = os.path.normcase(os.path.abspath(file_service.get_client_folder_path(client['client_id'])))
+                folders.append((folder, client['client_id']))
+        folders.sort(key=lambda f: len(f[0]), reverse=True)
+        self._folders = folders
+
+    def client_for_path(self, path: str) -> Optional[int]:
+        """
+        Find the client whose folder contains a path.
+
+        Args:
+            path: Absolute path from a filesystem event
+
+        Returns:
+            Client ID or None if the path is outside every client folder
+        """
+        path = os.path.normcase(os.path.abspath(path))
+        for folder, client_id in self._folders:
+            if path == folder or path.startswith(folder + os.sep):
+                return client_id
+        return None
+
+    def notify(self, path: str) -> None:
+        """Record a change under path; the owning client is synced after the debounce."""
+        client_id = self.client_for_path(path)
+        if client_id is None:
+            return
+        with self._lock:
+            self._dirty[client_id] = time.monotonic()
+        self._wake.set()
+
+    def reload_client_folders(self) -> None:
+        """Pick up client folders that were added, moved or cleared."""
+        folders = self._folders
+        self._load_client_folders()
+        # A folder that moved may hold changes made while nobody was watching it
+        with self._lock:
+            now = time.monotonic()
+            for folder, client_id in self._folders:
+                if (folder, client_id) not in folders:
+                    self._dirty.setdefault(client_id, now - self.debounce)
+        self._wake.set()
+
+    def _mark_all_dirty(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for _, client_id in self._folders:
+                self._dirty.setdefault(client_id, now - self.debounce)
+
+    def _take_settled(self) -> List[int]:
+        """Pop clients that have been quiet for the debounce period."""
+        cutoff = time.monotonic() - self.debounce
+        with self._lock:
+            settled = [client_id for client_id, last in self._dirty.items() if last <= cutoff]
+            for client_id in settled:
+                del self._dirty[client_id]
+        return settled
+
+    def sync_pending(self) -> int:
+        """
+        Sync every client whose changes have settled.
+
+        Returns:
+            Number of clients synced
+        """
+        settled = self._take_settled()
+        new_files = 0
+        for client_id in settled:
+            try:
+                counts = sync_client(client_id)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error syncing files for client {client_id}: {e}")
+                continue
+            self.stats["syncs"] += 1
+            for key, value in counts.items():
+                self.stats[key] += value
+            self.stats["last_sync"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            new_files += counts["registered"] + counts["restored"]
+        if new_files:
+            content_index_service.queue_indexing()
+        return len(settled)
+
+    def _run(self) -> None:
+        next_sweep = time.monotonic()
+        while not self._stop.is_set():
+            if self.mode == "polling" and time.monotonic() >= next_sweep:
+                self._load_client_folders()
+                self._mark_all_dirty()
+                next_sweep = time.monotonic() + self.poll_interval
+
+            self.sync_pending()
+
+            with self._lock:
+                pending = bool(self._dirty)
+            # Wake for the next settle check, the next sweep or a new event
+            timeout = self.debounce if pending else (
+                max(next_sweep - time.monotonic(), 0) if self.mode == "polling" else None
+            )
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self) -> None:
+        """Start watching in background threads."""
+        if self._thread:
+            return
+        self._load_client_folders()
+        shared_folder, _ = file_service.get_shared_folder_path()
+
+        if self.mode == "events":
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), str(shared_folder), recursive=True)
+            self._observer.daemon = True
+            self._observer.start()
+            # Catch up on anything that changed while the app was down
+            self._mark_all_dirty()
+
+        self._thread = threading.Thread(target=self._run, name="folder-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching and wait for the background threads to exit."""
+        self._stop.set()
+        self._wake.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the watcher's mode and sync totals.
+
+        Returns:
+            Status dictionary
+        """
+        with self._lock:
+            pending = len(self._dirty)
+        return {
+            "running": self._thread is not None,
+            "mode": self.mode,
+            "clients_watched": len(self._folders),
+            "clients_pending": pending,
+            **self.stats
+        }
+
+_watcher: Optional[FolderWatcher] = None
+
+def start_watcher(**kwargs) -> FolderWatcher:
+    """
+    Start the shared folder watcher if it is not already running.
+
+    Args:
+        **kwargs: Passed to FolderWatcher
+
+    Returns:
+        The running watcher
+    """
+    global _watcher
+    if _watcher is None:
+        _watcher = FolderWatcher(**kwargs)
+        _watcher.start()
+    return _watcher
+
+def stop_watcher() -> None:
+    """Stop the shared folder watcher if it is running."""
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+def reload_client_folders() -> None:
+    """Reload the watched client folders, e.g. after a client's folder path is updated."""
+    if _watcher is not None:
+        _watcher.reload_client_folders()
+
+def get_watcher_status() -> Dict[str, Any]:
+    """
+    Get the watcher status.
+
+    Returns:
+        Status dictionary (running is False when the watcher is disabled)
+    """
+    if _watcher is None:
+        return {"running": False}
+    return _watcher.status()
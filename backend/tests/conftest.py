@@ -10,7 +10,12 @@ from pathlib import Path
 # Add the parent directory to the path so we can import our application modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from database.connection import get_db_connection
+# Tests run the content indexer explicitly rather than after every upload
+os.environ.setdefault("CONTENT_INDEX", "0")
+
+from fastapi.testclient import TestClient
+from app import app
+from database.connection import get_db_connection, execute_delete
 from database.queries import clients as client_queries
 from database.queries import payments as payment_queries
 from database.queries import files as file_queries
@@ -26,6 +31,13 @@ def db_connection():
     yield conn
     conn.close()
 
+@pytest.fixture
+def api_client():
+    """
+    Fixture that provides a test client for the API.
+    """
+    return TestClient(app)
+
 @pytest.fixture
 def test_client_id():
     """
@@ -38,6 +50,24 @@ def test_client_id():
     
     return clients[0]['client_id']
 
+@pytest.fixture
+def client_folder(request, tmp_path, test_client_id, monkeypatch):
+    """
+    Fixture that points the test client at an empty temporary folder, named
+    "Client Folder" unless parametrized indirectly, and removes the files
+    and manifest rows registered under it.
+    """
+    name = getattr(request, "param", "Client Folder")
+    client_path = tmp_path / name
+    client_path.mkdir(parents=True)
+    monkeypatch.setattr(client_queries, "get_all_clients",
+                        lambda: [{"client_id": test_client_id, "onedrive_folder_path": name}])
+    monkeypatch.setattr(file_service, "get_shared_folder_path", lambda: (tmp_path, "tmp"))
+    monkeypatch.setattr(file_service, "get_client_folder_path", lambda client_id: client_path)
+    yield client_path
+    execute_delete("DELETE FROM client_files WHERE client_id = ? AND onedrive_path LIKE ?", (test_client_id, name + "%"))
+    execute_delete("DELETE FROM file_manifest WHERE client_id = ?", (test_client_id,))
+
 @pytest.fixture
 def test_contract_id(test_client_id):
     """
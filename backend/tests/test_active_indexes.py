@@ -0,0 +1,46 @@
+"""
+Tests that lookups of current (not soft-deleted) rows use the partial indexes.
+"""
+import pytest
+from database.queries import clients as client_queries
+from database.queries import payments as payment_queries
+
+def record_queries(monkeypatch, module):
+    """
+    Record every statement a query module runs, still running it.
+    """
+    recorded = []
+    for name in ("execute_query", "execute_single_query"):
+        original = getattr(module, name)
+        def recorder(query, params=(), _original=original):
+            recorded.append((query, params))
+            return _original(query, params)
+        monkeypatch.setattr(module, name, recorder)
+    return recorded
+
+@pytest.mark.parametrize("module, call, index", [
+    (client_queries, lambda client_id: client_queries.get_all_clients(), "idx_clients_active_name"),
+    (client_queries, lambda client_id: client_queries.get_clients_by_provider(), "idx_contracts_active_client"),
+    (client_queries, client_queries.get_client_contracts, "idx_contracts_active_client"),
+    (client_queries, client_queries.get_client_with_contracts, "idx_contracts_active_client"),
+    (client_queries, client_queries.get_client_compliance_status, "idx_payments_active_client_date"),
+    (payment_queries, payment_queries.get_client_payments, "idx_payments_active_client_date"),
+    (payment_queries, payment_queries.get_client_payment_periods, "idx_payments_active_client_date"),
+    (payment_queries, lambda client_id: payment_queries.get_payments_by_period(client_id, True, 3, 2024), "idx_payments_active_client_date"),
+    (payment_queries, lambda client_id: payment_queries.get_payments_by_period(client_id, False, 1, 2024), "idx_payments_active_client_date"),
+])
+def test_current_row_lookups_use_partial_indexes(monkeypatch, db_connection, test_client_id, module, call, index):
+    """
+    Test that each query filtering on valid_to IS NULL uses its partial
+    index and scans no table.
+    """
+    recorded = record_queries(monkeypatch, module)
+    call(test_client_id)
+    plans = [
+        [row[3] for row in db_connection.execute("EXPLAIN QUERY PLAN " + query, params)]
+        for query, params in recorded if "valid_to IS NULL" in query
+    ]
+    assert plans
+    for plan in plans:
+        assert not [step for step in plan if step.startswith("SCAN") and "USING" not in step], plan
+    assert any(index in step for plan in plans for step in plan)
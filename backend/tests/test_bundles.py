@@ -0,0 +1,66 @@
+"""
+Tests for streaming ZIP bundles of client documents.
+"""
+import io
+import zipfile
+import pytest
+from database.queries import files as file_queries
+from services import bundle_service, file_service
+from services.storage import MemoryStorage
+
+@pytest.fixture
+def bundle_storage():
+    """
+    Fixture that serves documents from memory.
+    """
+    storage = MemoryStorage()
+    file_service.set_storage(storage)
+    yield storage
+    file_service.set_storage(None)
+
+def read_zip(chunks):
+    return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+def test_archive_names_keep_folders_and_avoid_collisions(bundle_storage):
+    """
+    Test that entries are relative to the shared folder prefix and never collide.
+    """
+    statement = b"%PDF-1.7 " * 1000
+    bundle_storage.write("Clients/Acme/2024/q3.pdf", statement)
+    bundle_storage.write("Clients/Acme/2024/Q3.pdf", b"second")
+    bundle_storage.write("Clients\\Acme\\notes.txt", b"notes")
+    files = [
+        {"onedrive_path": "Clients/Acme/2024/q3.pdf"},
+        {"onedrive_path": "Clients/Acme/2024/Q3.pdf"},
+        {"onedrive_path": "Clients\\Acme\\notes.txt"},
+        {"onedrive_path": "Clients/Acme/gone.pdf"},
+    ]
+    archive = read_zip(bundle_service.stream_zip(files))
+    assert archive.namelist() == ["2024/q3.pdf", "2024/Q3 (2).pdf", "notes.txt", "MISSING.txt"]
+    assert archive.read("2024/q3.pdf") == statement
+    assert archive.getinfo("2024/q3.pdf").compress_type == zipfile.ZIP_STORED
+    assert b"Clients/Acme/gone.pdf" in archive.read("MISSING.txt")
+    assert archive.testzip() is None
+
+def test_client_bundle_endpoint(api_client, test_client_id, bundle_storage):
+    """
+    Test that the client bundle endpoint streams the client's registered files.
+    """
+    bundle_storage.write("Bundle Test/a.txt", b"alpha")
+    file_id = file_queries.create_file(test_client_id, "a.txt", "Bundle Test/a.txt")
+    try:
+        response = api_client.get(f"/files/bundle/client/{test_client_id}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert "content-length" not in response.headers, "Bundles should be streamed"
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert any(archive.read(name) == b"alpha" for name in archive.namelist())
+    finally:
+        file_queries.delete_file(file_id)
+
+def test_period_requires_year(api_client, test_client_id):
+    """
+    Test that a period bundle without its year is rejected.
+    """
+    response = api_client.get(f"/files/bundle/client/{test_client_id}?period_type=quarter&period=3")
+    assert response.status_code == 400
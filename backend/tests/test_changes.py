@@ -0,0 +1,102 @@
+"""
+Tests for the change log and the incremental sync endpoint.
+"""
+import sqlite3
+import pytest
+from database.connection import execute_query, execute_insert, execute_update
+from database.queries import changes as change_queries
+from database.queries import files as file_queries
+from database.queries import payments as payment_queries
+from services import change_service
+
+def fetch_changes(api_client, since, **params):
+    response = api_client.get("/changes/", params={"since": since, **params})
+    assert response.status_code == 200
+    result = response.json()
+    return result["next"], {(c["entity_type"], c["entity_id"]): c for c in result["changes"]}
+
+def test_changes_follow_mutations(api_client, test_client_id):
+    """
+    Test that inserts, links, soft deletes, restores and deletes are
+    returned once per entity with their current data.
+    """
+    payments = execute_query(
+        "SELECT payment_id FROM payments WHERE client_id = ? AND valid_to IS NULL LIMIT 1", (test_client_id,)
+    )
+    if not payments:
+        pytest.skip("No payments for testing")
+    payment_id = payments[0]['payment_id']
+    since = change_queries.get_latest_seq()
+
+    file_id = file_queries.create_file(test_client_id, "sync.pdf", "Sync Test/sync.pdf")
+    file_queries.link_file_to_payment(payment_id, file_id)
+    payment_queries.delete_payment(payment_id)
+    try:
+        since, changes = fetch_changes(api_client, since, client_id=test_client_id)
+        assert changes[("file", file_id)]["data"]["file_name"] == "sync.pdf"
+        assert changes[("payment", payment_id)]["op"] == "delete"
+        assert changes[("payment", payment_id)]["data"] is None
+        assert all(c["client_id"] == test_client_id for c in changes.values())
+    finally:
+        payment_queries.restore_payment(payment_id)
+
+    since, changes = fetch_changes(api_client, since)
+    assert changes[("payment", payment_id)]["op"] == "insert"
+    assert "actual_fee" in changes[("payment", payment_id)]["data"]
+
+    file_queries.delete_file(file_id)
+    since, changes = fetch_changes(api_client, since)
+    assert changes[("file", file_id)]["op"] == "delete"
+    assert changes[("payment", payment_id)]["op"] == "update", "Dropping the link changes the payment"
+
+    assert fetch_changes(api_client, since) == (since, {})
+
+def test_only_visible_file_updates_are_logged(test_client_id):
+    """
+    Test that hash backfills are not logged but missing flags and renames are.
+    """
+    file_id = file_queries.create_file(test_client_id, "hidden.pdf", "Sync Test/hidden.pdf")
+    try:
+        since = change_queries.get_latest_seq()
+        file_queries.set_file_content_hash(file_id, 10, "0" * 64)
+        assert change_queries.get_changes(since, 10) == []
+
+        execute_update("UPDATE client_files SET missing_since = datetime('now') WHERE file_id = ?", (file_id,))
+        execute_update("UPDATE client_files SET file_name = 'shown.pdf' WHERE file_id = ?", (file_id,))
+        assert [c["entity_id"] for c in change_queries.get_changes(since, 10)] == [file_id, file_id]
+    finally:
+        file_queries.delete_file(file_id)
+
+def test_pruned_changes_ask_for_reset(api_client, test_client_id):
+    """
+    Test that changes past retention are pruned, keeping the latest, and a
+    client that synced before them is told to reload.
+    """
+    since = change_queries.get_latest_seq()
+    file_ids = [file_queries.create_file(test_client_id, name, f"Sync Test/{name}") for name in ("old.pdf", "older.pdf")]
+    try:
+        execute_update("UPDATE change_log SET changed_at = '2000-01-01 00:00:00'", ())
+        assert change_service.prune_changes() >= 1
+        latest = change_queries.get_latest_seq()
+        assert change_queries.get_oldest_seq() == latest
+
+        result = api_client.get("/changes/", params={"since": since}).json()
+        assert result["reset"] is True
+        assert (result["next"], result["changes"]) == (latest, [])
+        assert api_client.get("/changes/", params={"since": latest}).json()["reset"] is False
+    finally:
+        for file_id in file_ids:
+            file_queries.delete_file(file_id)
+
+def test_failed_mutation_logs_nothing(test_client_id):
+    """
+    Test that the log is written in the mutation's transaction, so a
+    statement that fails leaves no entry.
+    """
+    since = change_queries.get_latest_seq()
+    with pytest.raises(sqlite3.IntegrityError):
+        execute_insert(
+            "INSERT INTO client_files (client_id, file_name, onedrive_path) VALUES (?, ?, ?)",
+            (999999999, "orphan.pdf", "orphan.pdf")
+        )
+    assert change_queries.get_latest_seq() == since
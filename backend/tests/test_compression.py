@@ -0,0 +1,108 @@
+"""
+Tests for the response compression middleware.
+"""
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse, Response
+from fastapi.testclient import TestClient
+from middleware import CompressionMiddleware, negotiate_encoding, no_compression
+
+def build_app() -> FastAPI:
+    """
+    Build a small app exercising each compression path.
+    """
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    async def large():
+        return {"paths": ["Hohimer Team Shared 4-15-19/Client/Consulting Fee/2024"] * 50}
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(20):
+                yield f"line {i}\n".encode() * 10
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/download")
+    @no_compression
+    async def download():
+        return Response(b"%PDF-1.7" + b"0" * 5000, media_type="application/pdf")
+
+    return app
+
+@pytest.fixture
+def api_client():
+    """
+    Fixture that provides a test client that does not decode responses itself.
+    """
+    return TestClient(build_app())
+
+def get_raw(api_client, url, encoding="gzip"):
+    """
+    Fetch a URL and return the response with the raw (undecoded) body.
+    """
+    with api_client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("identity", None),
+    ("gzip;q=0, *;q=0.5", "gzip" if negotiate_encoding("br") is None else "br"),
+    ("br;q=0.1, gzip", "gzip"),
+])
+def test_negotiate_encoding(header, expected):
+    """
+    Test that Accept-Encoding is negotiated using quality values.
+    """
+    assert negotiate_encoding(header) == expected
+
+def test_large_response_is_compressed(api_client):
+    """
+    Test that responses above the threshold are gzip compressed.
+    """
+    response, body = get_raw(api_client, "/large")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) == len(body)
+    assert b"Consulting Fee" in gzip.decompress(body)
+
+def test_small_response_is_not_compressed(api_client):
+    """
+    Test that responses below the threshold are sent as-is.
+    """
+    response, body = get_raw(api_client, "/small")
+    assert "content-encoding" not in response.headers
+    assert body == b'{"status":"ok"}'
+
+def test_streaming_response_is_compressed(api_client):
+    """
+    Test that streaming responses are compressed chunk by chunk.
+    """
+    response, body = get_raw(api_client, "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body).count(b"line 19") == 10
+
+def test_opted_out_route_is_not_compressed(api_client):
+    """
+    Test that @no_compression routes bypass the middleware.
+    """
+    response, body = get_raw(api_client, "/download")
+    assert "content-encoding" not in response.headers
+    assert body.startswith(b"%PDF")
+
+def test_brotli_preferred_when_available(api_client):
+    """
+    Test that brotli is used when installed and accepted by the client.
+    """
+    brotli = pytest.importorskip("brotli")
+    response, body = get_raw(api_client, "/large", encoding="gzip, br")
+    assert response.headers["content-encoding"] == "br"
+    assert b"Consulting Fee" in brotli.decompress(body)
@@ -0,0 +1,154 @@
+"""
+Tests for document text extraction and the content search index.
+"""
+import io
+import zipfile
+import pytest
+from database.connection import execute_delete
+from database.queries import files as file_queries
+from database.queries import manifest as manifest_queries
+from services import content_index_service, file_service
+from services.storage import LocalStorage, MemoryStorage
+from services.text_extraction import extract_text, extract_document
+
+def make_xlsx(shared_strings, rows):
+    out = io.BytesIO()
+    ns = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    strings = "".join(f"<si><t>{s}</t></si>" for s in shared_strings)
+    cells = "".join(
+        "<row>" + "".join(f'<c t="s"><v>{v}</v></c>' if t == "s" else f"<c><v>{v}</v></c>" for t, v in row) + "</row>"
+        for row in rows
+    )
+    with zipfile.ZipFile(out, "w") as archive:
+        archive.writestr("xl/sharedStrings.xml", f"<sst {ns}>{strings}</sst>")
+        archive.writestr("xl/worksheets/sheet1.xml", f"<worksheet {ns}><sheetData>{cells}</sheetData></worksheet>")
+    return out.getvalue()
+
+@pytest.fixture
+def content_storage():
+    """
+    Fixture that serves documents from memory and removes the rows created.
+    """
+    storage = MemoryStorage()
+    file_service.set_storage(storage)
+    created = []
+    yield storage, created
+    file_service.set_storage(None)
+    for file_id in created:
+        file_queries.delete_file(file_id)
+
+def test_xlsx_extraction_includes_numbers():
+    """
+    Test that spreadsheet text includes numeric cells, not just shared strings.
+    """
+    data = make_xlsx(["Plan AUM", "Voya"], [[("s", 1)], [("s", 0), ("n", 2900000)]])
+    assert extract_text(data, ".xlsx") == "Voya\nPlan AUM\t2900000"
+    assert extract_text(b"not a zip", ".xlsx") is None
+
+def test_extract_document_never_raises(tmp_path):
+    """
+    Test that worker results carry the hash and an error instead of raising.
+    """
+    result = extract_document(b"period,amount\nQ3,1200\n", ".csv")
+    assert result["text"].startswith("period,amount") and result["error"] is None
+    assert result["size_bytes"] == 22 and len(result["sha256"]) == 64
+
+    missing = extract_document(str(tmp_path / "gone.pdf"), ".pdf")
+    assert missing["sha256"] is None and "FileNotFoundError" in missing["error"]
+
+def test_index_only_reextracts_on_hash_change(test_client_id, content_storage):
+    """
+    Test that extraction fills the index, skips unchanged files and picks up
+    new content once the recorded hash changes.
+    """
+    storage, created = content_storage
+    storage.write("Content Test/statement.csv", b"Voya quarterly statement, AUM zanzibarite\n")
+    file_id = file_queries.create_file(test_client_id, "statement.csv", "Content Test/statement.csv")
+    created.append(file_id)
+
+    content_index_service.index_pending(max_workers=0)
+    assert file_queries.get_file_by_id(file_id)["sha256"] is not None, "Hash should be backfilled"
+    hits = content_index_service.search_content("zanzibar")
+    assert [hit["file_id"] for hit in hits] == [file_id]
+    assert "<mark>" in hits[0]["content_snippet"]
+
+    pending = file_queries.get_files_needing_extraction((".csv",))
+    assert file_id not in [f["file_id"] for f in pending]
+
+    storage.write("Content Test/statement.csv", b"Restated figures quixotically\n")
+    file_queries.set_file_content_hash(file_id, 30, "0" * 64)
+    pending = file_queries.get_files_needing_extraction((".csv",))
+    assert file_id in [f["file_id"] for f in pending]
+
+    content_index_service.index_pending(max_workers=0)
+    assert content_index_service.search_content("zanzibar") == []
+    assert [hit["file_id"] for hit in content_index_service.search_content("quixotic")] == [file_id]
+
+def test_file_edited_on_disk_is_rehashed(test_client_id, content_storage):
+    """
+    Test that a new size or mtime in the manifest re-extracts a file and
+    replaces its stale hash.
+    """
+    storage, created = content_storage
+    path = "Content Test/notes.csv"
+    storage.write(path, b"Original notes marmaladed\n")
+    file_id = file_queries.create_file(test_client_id, "notes.csv", path)
+    created.append(file_id)
+    entry = {"path": path, "is_dir": False, "size": 26, "mtime_ns": 1, "inode": None}
+    manifest_queries.save_manifest_changes(test_client_id, [entry], [])
+    try:
+        content_index_service.index_pending(max_workers=0)
+        old_hash = file_queries.get_file_by_id(file_id)["sha256"]
+        assert file_id not in [f["file_id"] for f in file_queries.get_files_needing_extraction((".csv",))]
+
+        storage.write(path, b"Edited notes pomegranated\n")
+        manifest_queries.save_manifest_changes(test_client_id, [dict(entry, mtime_ns=2)], [])
+        assert file_id in [f["file_id"] for f in file_queries.get_files_needing_extraction((".csv",))]
+
+        content_index_service.index_pending(max_workers=0)
+        assert file_queries.get_file_by_id(file_id)["sha256"] != old_hash
+        assert [hit["file_id"] for hit in content_index_service.search_content("pomegranate")] == [file_id]
+        assert file_id not in [f["file_id"] for f in file_queries.get_files_needing_extraction((".csv",))]
+    finally:
+        execute_delete("DELETE FROM file_manifest WHERE client_id = ? AND path = ?", (test_client_id, path))
+
+def test_process_pool_and_search_endpoint(api_client, test_client_id, content_storage, tmp_path, monkeypatch):
+    """
+    Test extraction in reused worker processes from files on disk, and
+    content search through the API.
+    """
+    _, created = content_storage
+    monkeypatch.setattr(content_index_service, "INLINE_MAX_FILES", 0)
+    file_service.set_storage(LocalStorage(tmp_path))
+    (tmp_path / "Content Test").mkdir()
+    (tmp_path / "Content Test" / "fees.xlsx").write_bytes(make_xlsx(["Fee schedule kumquatish"], [[("s", 0)]]))
+    file_id = file_queries.create_file(test_client_id, "fees.xlsx", "Content Test/fees.xlsx")
+    created.append(file_id)
+
+    counts = content_index_service.index_pending(max_workers=1)
+    assert counts["indexed"] >= 1
+    pool = content_index_service._pool
+    assert pool is not None, "The worker pool outlives the pass"
+    (tmp_path / "Content Test" / "more.xlsx").write_bytes(make_xlsx(["Custodian"], [[("s", 0)]]))
+    created.append(file_queries.create_file(test_client_id, "more.xlsx", "Content Test/more.xlsx"))
+    content_index_service.index_pending(max_workers=1)
+    assert content_index_service._pool is pool
+
+    response = api_client.get("/files/search", params={"q": "kumquat", "in_content": True, "client_id": test_client_id})
+    assert response.status_code == 200
+    assert [hit["file_id"] for hit in response.json()] == [file_id]
+
+    file_queries.delete_file(file_id)
+    assert content_index_service.search_content("kumquat") == []
+    content_index_service._discard_pool()
+
+def test_small_pass_runs_inline(test_client_id, content_storage):
+    """
+    Test that a pass over one new document doesn't start worker processes.
+    """
+    storage, created = content_storage
+    content_index_service.index_pending(max_workers=0)
+    storage.write("Content Test/upload.csv", b"period,amount\n")
+    created.append(file_queries.create_file(test_client_id, "upload.csv", "Content Test/upload.csv"))
+    assert content_index_service.index_pending(max_workers=2)["indexed"] == 1
+    assert content_index_service._pool is None
@@ -0,0 +1,85 @@
+"""
+Tests for per-level and streaming directory listings.
+"""
+import json
+import pytest
+from database.queries import files as file_queries
+from services import file_service
+
+@pytest.fixture
+def listing_folder(client_folder):
+    """
+    Fixture that fills the test client's temporary folder with a small tree.
+    """
+    (client_folder / "2024" / "Q1").mkdir(parents=True)
+    (client_folder / "Archive").mkdir()
+    (client_folder / "summary.pdf").write_bytes(b"%PDF summary")
+    (client_folder / "ignored.exe").write_bytes(b"MZ")
+    (client_folder / "2024" / "jan.pdf").write_bytes(b"%PDF jan")
+    (client_folder / "2024" / "Q1" / "feb.xlsx").write_bytes(b"PK feb")
+    return client_folder
+
+def test_list_one_level(test_client_id, listing_folder):
+    """
+    Test that only the requested folder is listed, folders first, with
+    registered files marked.
+    """
+    summary_id = file_queries.create_file(test_client_id, "summary.pdf", "Client Folder/summary.pdf")
+    jan_id = file_queries.create_file(test_client_id, "jan.pdf", "Client Folder\\2024\\jan.pdf")
+
+    result = file_service.list_client_directory(test_client_id)
+    assert result["success"]
+    assert result["total"] == 3
+    assert [(e["type"], e["name"]) for e in result["entries"]] == [
+        ("directory", "2024"), ("directory", "Archive"), ("file", "summary.pdf")
+    ]
+    summary = result["entries"][2]
+    assert summary["path"] == "Client Folder/summary.pdf"
+    assert summary["registered"] and summary["file_id"] == summary_id
+
+    nested = file_service.list_client_directory(test_client_id, "2024")
+    assert nested["path"] == "2024"
+    assert [e["name"] for e in nested["entries"]] == ["Q1", "jan.pdf"]
+    assert nested["entries"][1]["file_id"] == jan_id, "Backslash paths should still match"
+
+def test_list_pagination_and_escape(test_client_id, listing_folder):
+    """
+    Test that a level can be paged and paths outside the client folder are refused.
+    """
+    page = file_service.list_client_directory(test_client_id, offset=1, limit=1)
+    assert [e["name"] for e in page["entries"]] == ["Archive"]
+    assert page["total"] == 3
+
+    with pytest.raises(ValueError):
+        file_service.list_client_directory(test_client_id, "../")
+    assert not file_service.list_client_directory(test_client_id, "missing")["success"]
+
+def test_browse_endpoint(api_client, test_client_id, listing_folder):
+    """
+    Test the browse endpoint's success and error responses.
+    """
+    response = api_client.get(f"/files/browse/{test_client_id}", params={"path": "2024/Q1"})
+    assert response.status_code == 200
+    assert [e["path"] for e in response.json()["entries"]] == ["Client Folder/2024/Q1/feb.xlsx"]
+
+    assert api_client.get(f"/files/browse/{test_client_id}", params={"path": "../.."}).status_code == 400
+    assert api_client.get(f"/files/browse/{test_client_id}", params={"path": "nope"}).status_code == 404
+
+def test_stream_full_scan_as_ndjson(api_client, test_client_id, listing_folder):
+    """
+    Test that the streaming scan returns one JSON entry per line for the whole tree.
+    """
+    response = api_client.get(f"/files/scan-directory/{test_client_id}/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    entries = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(e["path"] for e in entries) == [
+        "Client Folder/2024",
+        "Client Folder/2024/Q1",
+        "Client Folder/2024/Q1/feb.xlsx",
+        "Client Folder/2024/jan.pdf",
+        "Client Folder/Archive",
+        "Client Folder/summary.pdf",
+    ]
+    assert all("full_path" not in e for e in entries)
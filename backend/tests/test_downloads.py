@@ -0,0 +1,119 @@
+"""
+Tests for conditional and range requests on document downloads.
+"""
+import asyncio
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from database.queries import files as file_queries
+from responses import DocumentResponse
+from services import file_service
+from services.storage import MemoryStorage, CachedStorage
+
+CONTENT = b"%PDF-1.7\n" + bytes(range(256)) * 40
+
+@pytest.fixture
+def document(tmp_path):
+    """
+    Fixture that writes a small PDF-like document.
+    """
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(CONTENT)
+    return path
+
+def make_response(path):
+    st = os.stat(path)
+    return DocumentResponse(str(path), st.st_size, st.st_mtime_ns, filename="statement.pdf", media_type="application/pdf")
+
+@pytest.fixture
+def document_client(document):
+    """
+    Fixture that serves the document through DocumentResponse.
+    """
+    app = FastAPI()
+
+    @app.get("/download")
+    async def download():
+        return make_response(document)
+
+    return TestClient(app)
+
+def test_reopen_is_not_modified(document_client):
+    """
+    Test that a request with the current ETag gets a 304 without a body.
+    """
+    first = document_client.get("/download")
+    assert first.status_code == 200
+    assert first.content == CONTENT
+    etag = first.headers["etag"]
+
+    again = document_client.get("/download", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    changed = document_client.get("/download", headers={"If-None-Match": '"stale"'})
+    assert changed.status_code == 200
+
+def test_range_request_returns_partial_content(document_client):
+    """
+    Test that a byte range is returned as 206 and If-Range guards it.
+    """
+    etag = document_client.get("/download").headers["etag"]
+    partial = document_client.get("/download", headers={"Range": "bytes=0-8", "If-Range": etag})
+    assert partial.status_code == 206
+    assert partial.content == CONTENT[:9]
+    assert partial.headers["content-range"] == f"bytes 0-8/{len(CONTENT)}"
+
+    outdated = document_client.get("/download", headers={"Range": "bytes=0-8", "If-Range": '"old"'})
+    assert outdated.status_code == 200, "A changed document is sent whole"
+
+def test_zerocopy_extension_is_used(document):
+    """
+    Test that a whole-file body is handed to the server for sendfile when it
+    supports it, and that ranges are still read by FileResponse.
+    """
+    async def fetch(headers):
+        messages = []
+
+        async def send(message):
+            if message["type"] == "http.response.zerocopy":
+                message = dict(message, file=message["file"].name)
+            messages.append(message)
+
+        async def receive():
+            return {"type": "http.request"}
+
+        scope = {"type": "http", "method": "GET", "headers": headers, "extensions": {"http.response.zerocopy": {}}}
+        await make_response(document)(scope, receive, send)
+        return messages
+
+    messages = asyncio.run(fetch([]))
+    assert messages[0]["status"] == 200
+    assert messages[1] == {"type": "http.response.zerocopy", "file": str(document), "count": len(CONTENT), "more_body": False}
+
+    messages = asyncio.run(fetch([(b"range", b"bytes=100-")]))
+    assert messages[0]["status"] == 206
+    assert b"".join(m["body"] for m in messages[1:]) == CONTENT[100:]
+
+def test_revalidation_does_not_fetch_the_document(api_client, test_client_id, tmp_path):
+    """
+    Test that a download with a current ETag is answered from stat data,
+    without copying the document into the cache.
+    """
+    origin = MemoryStorage()
+    origin.write("Download Test/statement.pdf", CONTENT)
+    cache = CachedStorage(origin, tmp_path / "cache", max_bytes=1 << 20)
+    file_id = file_queries.create_file(test_client_id, "statement.pdf", "Download Test/statement.pdf")
+    file_service.set_storage(cache)
+    try:
+        first = api_client.get(f"/files/download/{file_id}")
+        assert first.content == CONTENT
+        again = api_client.get(f"/files/download/{file_id}", headers={"If-None-Match": first.headers["etag"]})
+        assert again.status_code == 304
+        assert again.headers["etag"] == first.headers["etag"]
+        assert (cache.status()["misses"], cache.status()["hits"]) == (1, 0)
+    finally:
+        file_service.set_storage(None)
+        file_queries.delete_file(file_id)
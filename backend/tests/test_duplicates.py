@@ -0,0 +1,43 @@
+"""
+Tests for the duplicate document report.
+"""
+import hashlib
+import pytest
+from services import duplicate_service, file_service
+
+def test_duplicates_grouped_by_content(tmp_path, monkeypatch):
+    """
+    Test that only identical files are reported, grouped by hash.
+    """
+    statement = b"%PDF-1.7 statement" * 10000
+    (tmp_path / "Client A").mkdir()
+    (tmp_path / "Client B" / "2024").mkdir(parents=True)
+    (tmp_path / "Client A" / "q3.pdf").write_bytes(statement)
+    (tmp_path / "Client B" / "2024" / "q3.pdf").write_bytes(statement)
+    # Same size, different tail: survives the partial hash but not the full one
+    (tmp_path / "Client B" / "other.pdf").write_bytes(statement[:-1] + b"!")
+    (tmp_path / "Client A" / "unique.pdf").write_bytes(b"unique")
+    (tmp_path / "Client A" / "setup.exe").write_bytes(statement)
+    monkeypatch.setattr(file_service, "get_shared_folder_path", lambda: (tmp_path, "tmp"))
+
+    report = duplicate_service.find_duplicate_documents(max_workers=2)
+    assert len(report["groups"]) == 1
+    group = report["groups"][0]
+    assert [f["path"] for f in group["files"]] == ["Client A/q3.pdf", "Client B/2024/q3.pdf"]
+    assert group["wasted_bytes"] == len(statement)
+    assert report["stats"]["files_scanned"] == 4
+    assert report["stats"]["files_fully_hashed"] == 3, "The unique size should never be hashed"
+
+def test_small_duplicates_are_hashed_once(tmp_path, monkeypatch):
+    """
+    Test that files within the partial hash size are grouped on that hash
+    alone, under their full SHA-256.
+    """
+    (tmp_path / "a.pdf").write_bytes(b"small statement")
+    (tmp_path / "b.pdf").write_bytes(b"small statement")
+    monkeypatch.setattr(file_service, "get_shared_folder_path", lambda: (tmp_path, "tmp"))
+
+    report = duplicate_service.find_duplicate_documents(max_workers=2)
+    assert report["groups"][0]["sha256"] == hashlib.sha256(b"small statement").hexdigest()
+    assert report["stats"]["files_partially_hashed"] == 2
+    assert report["stats"]["files_fully_hashed"] == 0
@@ -0,0 +1,137 @@
+"""
+Tests for pushing change notifications as server-sent events.
+"""
+import asyncio
+import json
+import pytest
+from starlette.concurrency import run_in_threadpool
+from database.connection import execute_delete, execute_query
+from database.queries import changes as change_queries
+from database.queries import files as file_queries
+from services import event_service
+
+@pytest.fixture
+def fast_events(monkeypatch):
+    """
+    Fixture that polls the change log quickly and removes the files created.
+    """
+    monkeypatch.setattr(event_service, "POLL_INTERVAL", 0.02)
+    yield
+    execute_delete("DELETE FROM client_files WHERE onedrive_path LIKE 'Event Test/%'", ())
+
+def parse(message):
+    fields = dict(line.split(": ", 1) for line in message.decode().strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+async def create_file(client_id, name):
+    return await run_in_threadpool(file_queries.create_file, client_id, name, f"Event Test/{name}")
+
+async def next_message(stream):
+    return await asyncio.wait_for(stream.__anext__(), 5)
+
+def test_stream_pushes_subscribed_clients_changes(fast_events, test_client_id):
+    """
+    Test that a stream gets notifications for its client only, and that a
+    reconnect replays what it missed.
+    """
+    other = execute_query("SELECT client_id FROM clients WHERE client_id != ? LIMIT 1", (test_client_id,))
+    if not other:
+        pytest.skip("Need a second client for testing")
+
+    async def run():
+        stream = event_service.event_stream({test_client_id})
+        assert (await next_message(stream)).startswith(b"retry:")
+        await create_file(other[0]['client_id'], "other.pdf")
+        file_id = await create_file(test_client_id, "ours.pdf")
+        event, note = parse(await next_message(stream))
+        assert event == "change"
+        assert (note["entity_type"], note["entity_id"], note["client_id"], note["op"]) == ("file", file_id, test_client_id, "insert")
+        await stream.aclose()
+        assert event_service.subscriber_count() == 0
+
+        second_id = await create_file(test_client_id, "missed.pdf")
+        stream = event_service.event_stream({test_client_id}, since=note["version"])
+        await next_message(stream)
+        event, replayed = parse(await next_message(stream))
+        assert (event, replayed["entity_id"]) == ("change", second_id)
+        await stream.aclose()
+
+    asyncio.run(run())
+
+def test_replay_skips_other_clients(fast_events, test_client_id, monkeypatch):
+    """
+    Test that a reconnect for several clients only replays their changes, so
+    other clients' activity doesn't count against the replay limit.
+    """
+    others = execute_query("SELECT client_id FROM clients WHERE client_id != ? LIMIT 2", (test_client_id,))
+    if len(others) < 2:
+        pytest.skip("Need three clients for testing")
+    monkeypatch.setattr(event_service, "MAX_REPLAY", 1)
+
+    async def run():
+        since = await run_in_threadpool(change_queries.get_latest_seq)
+        await create_file(others[1]['client_id'], "noise1.pdf")
+        await create_file(others[1]['client_id'], "noise2.pdf")
+        file_id = await create_file(test_client_id, "wanted.pdf")
+        stream = event_service.event_stream({test_client_id, others[0]['client_id']}, since=since)
+        await next_message(stream)
+        event, replayed = parse(await next_message(stream))
+        assert (event, replayed["entity_id"]) == ("change", file_id)
+        await stream.aclose()
+
+    asyncio.run(run())
+
+def test_poller_retries_after_errors(fast_events, test_client_id, monkeypatch):
+    """
+    Test that errors reading the change log are retried instead of leaving
+    streams waiting forever.
+    """
+    failures = [RuntimeError("database is locked")] * 2
+    get_latest_seq, get_changes = change_queries.get_latest_seq, change_queries.get_changes
+
+    def flaky(query):
+        def call(*args):
+            if failures:
+                raise failures.pop()
+            return query(*args)
+        return call
+
+    monkeypatch.setattr(change_queries, "get_latest_seq", flaky(get_latest_seq))
+    monkeypatch.setattr(change_queries, "get_changes", flaky(get_changes))
+
+    async def run():
+        stream = event_service.event_stream({test_client_id})
+        await next_message(stream)
+        failures.append(RuntimeError("disk I/O error"))
+        file_id = await create_file(test_client_id, "retried.pdf")
+        event, note = parse(await next_message(stream))
+        assert (event, note["entity_id"]) == ("change", file_id)
+        await stream.aclose()
+
+    asyncio.run(run())
+
+def test_slow_reader_is_told_to_resync(fast_events, test_client_id, monkeypatch):
+    """
+    Test that notifications beyond a full queue are dropped and the reader
+    gets a resync event with the last version it received.
+    """
+    monkeypatch.setattr(event_service, "QUEUE_SIZE", 1)
+
+    async def run():
+        stream = event_service.event_stream({test_client_id})
+        await next_message(stream)
+        first_id = await create_file(test_client_id, "first.pdf")
+        await create_file(test_client_id, "dropped.pdf")
+        await asyncio.sleep(0.2)
+
+        event, note = parse(await next_message(stream))
+        assert (event, note["entity_id"]) == ("change", first_id)
+        event, resync = parse(await next_message(stream))
+        assert (event, resync["since"]) == ("resync", note["version"])
+
+        later_id = await create_file(test_client_id, "later.pdf")
+        event, note = parse(await next_message(stream))
+        assert (event, note["entity_id"]) == ("change", later_id)
+        await stream.aclose()
+
+    asyncio.run(run())
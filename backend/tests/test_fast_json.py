@@ -0,0 +1,31 @@
+"""
+Tests for the fast JSON response path on list endpoints.
+"""
+import pytest
+from decimal import Decimal
+from responses import dumps
+
+def test_dumps_handles_database_types():
+    """
+    Test that dumps encodes Decimal values and None like the standard encoder.
+    """
+    assert dumps({'fee': Decimal('547.51'), 'notes': None}) == b'{"fee":547.51,"notes":null}'
+
+def test_fast_clients_matches_standard(api_client):
+    """
+    Test that the fast clients list returns the same data as the standard path.
+    """
+    standard = api_client.get("/clients/")
+    fast = api_client.get("/clients/?fast=true")
+    assert fast.status_code == 200, "Fast path should succeed"
+    assert fast.json() == standard.json(), "Fast path should return the same clients"
+
+def test_fast_payments_matches_standard(api_client, test_client_id):
+    """
+    Test that the fast payment history page matches the standard path.
+    """
+    url = f"/payments/client/{test_client_id}?page_size=10"
+    standard = api_client.get(url)
+    fast = api_client.get(url + "&fast=true")
+    assert fast.status_code == 200, "Fast path should succeed"
+    assert fast.json() == standard.json(), "Fast path should return the same page"
@@ -0,0 +1,67 @@
+"""
+Tests for file query functionality.
+"""
+import pytest
+from database.queries import files as file_queries
+
+@pytest.fixture
+def test_file_id(test_client_id):
+    """
+    Fixture that registers a throwaway file for the test client and removes it afterwards.
+    """
+    file_id = file_queries.create_file(
+        test_client_id,
+        "Zephyrquarterly_Statement_Q3_2024.pdf",
+        "Clients/Test Client/Consulting Fee/2024/Zephyrquarterly_Statement_Q3_2024.pdf"
+    )
+    yield file_id
+    file_queries.delete_file(file_id)
+
+def test_search_files_prefix_across_clients(test_file_id):
+    """
+    Test that search_files finds a file by word prefix without a client filter.
+    """
+    results = file_queries.search_files("zephyrq")
+    match = next((r for r in results if r['file_id'] == test_file_id), None)
+    assert match is not None, "File should be found by prefix"
+    assert '<mark>' in match['file_name_highlight'], "File name should be highlighted"
+    assert match['client_name'], "Result should include the client name"
+
+def test_search_files_path_segments(test_client_id, test_file_id):
+    """
+    Test that folder names and multiple words narrow results within a client.
+    """
+    results = file_queries.search_client_files(test_client_id, "consulting zephyr 2024")
+    assert [r['file_id'] for r in results] == [test_file_id], "Only the test file should match"
+    assert file_queries.search_files("zephyr", test_client_id + 100000) == [], "Other clients should not match"
+
+def test_client_search_is_uncapped_and_newest_first(test_client_id):
+    """
+    Test that the per-client search returns every match ordered by upload date.
+    """
+    file_ids = [file_queries.create_file(test_client_id, f"Quokkareport {i}.pdf", f"Quokkareport {i}.pdf")
+                for i in range(55)]
+    try:
+        results = file_queries.search_client_files(test_client_id, "quokka")
+        assert len(results) == 55, "Results should not be capped"
+        uploaded = [r['uploaded_at'] for r in results]
+        assert uploaded == sorted(uploaded, reverse=True), "Results should be newest first"
+    finally:
+        for file_id in file_ids:
+            file_queries.delete_file(file_id)
+
+def test_search_index_follows_delete(test_client_id):
+    """
+    Test that deleting a file removes it from the search index.
+    """
+    file_id = file_queries.create_file(test_client_id, "Xylotemporary.pdf", "Xylotemporary.pdf")
+    assert file_queries.search_files("xylotemp"), "New file should be indexed"
+    file_queries.delete_file(file_id)
+    assert file_queries.search_files("xylotemp") == [], "Deleted file should leave the index"
+
+def test_search_ignores_fts_syntax():
+    """
+    Test that FTS operators in user input cannot break the query.
+    """
+    assert file_queries.build_fts_query('"NEAR( OR *') == '"NEAR"* "OR"*'
+    assert file_queries.search_files('*"()') == []
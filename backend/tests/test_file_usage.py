@@ -0,0 +1,53 @@
+"""
+Tests for looking up the payments that use each file.
+"""
+import pytest
+from database.connection import execute_query
+from database.queries import files as file_queries
+
+@pytest.fixture
+def linked_file(test_client_id):
+    """
+    Fixture that provides a file linked to two of the test client's payments.
+    """
+    payments = execute_query(
+        "SELECT payment_id FROM payments WHERE client_id = ? AND valid_to IS NULL ORDER BY received_date LIMIT 2",
+        (test_client_id,)
+    )
+    if len(payments) < 2:
+        pytest.skip("Not enough payments for testing")
+    file_id = file_queries.create_file(test_client_id, "usage.pdf", "Usage Test/usage.pdf")
+    for p in payments:
+        file_queries.link_file_to_payment(p['payment_id'], file_id)
+    yield file_id, [p['payment_id'] for p in payments]
+    for p in payments:
+        file_queries.unlink_file_from_payment(p['payment_id'], file_id)
+    file_queries.delete_file(file_id)
+
+def test_file_lookups_use_file_index(db_connection):
+    """
+    Test that lookups by file_id search the reverse index instead of scanning payment_files.
+    """
+    plan = " ".join(row[3] for row in db_connection.execute(
+        "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM payment_files WHERE file_id = ?", (1,)
+    ))
+    assert "idx_payment_files_file_id" in plan and "SCAN" not in plan
+
+def test_usage_endpoints(api_client, test_client_id, linked_file):
+    """
+    Test the per-file usage listing and the per-client usage counts.
+    """
+    file_id, payment_ids = linked_file
+    response = api_client.get(f"/files/usage/{file_id}")
+    assert response.status_code == 200
+    usage = response.json()
+    assert usage["payment_count"] == 2
+    assert sorted(p["payment_id"] for p in usage["payments"]) == sorted(payment_ids)
+    assert "actual_fee" in usage["payments"][0]
+
+    response = api_client.get(f"/files/usage-counts/{test_client_id}")
+    assert response.status_code == 200
+    counts = {f["file_id"]: f["payment_count"] for f in response.json()["files"]}
+    assert counts[file_id] == 2
+
+    assert api_client.get("/files/usage/999999999").status_code == 404
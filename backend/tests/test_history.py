@@ -0,0 +1,71 @@
+"""
+Tests for point-in-time queries and restoring deleted payments.
+"""
+import pytest
+from datetime import datetime, timedelta
+from database.connection import execute_query
+from database.queries import history as history_queries
+from database.queries import payments as payment_queries
+from services import history_service
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-03-31", "2024-03-31 23:59:59"),
+    ("2024-03-31T12:30:00", "2024-03-31 12:30:00"),
+    ("2024-03-31T12:30:00-05:00", "2024-03-31 17:30:00"),
+    ("2024-03-31T12:30:00Z", "2024-03-31 12:30:00"),
+])
+def test_parse_as_of(value, expected):
+    """
+    Test that dates mean the end of the day and offsets are converted to UTC.
+    """
+    assert history_service.parse_as_of(value) == expected
+
+def test_as_of_lookups_use_history_indexes(monkeypatch, db_connection):
+    """
+    Test that the as-of contract, contact and payment lookups search the history indexes.
+    """
+    recorded = []
+    monkeypatch.setattr(history_queries, "execute_query", lambda query, params=(): recorded.append((query, params)) or [])
+    history_queries.get_client_contracts_as_of(1, "2024-03-31 23:59:59")
+    history_queries.get_client_contacts_as_of(1, "2024-03-31 23:59:59")
+    history_queries.get_client_payments_as_of(1, "2024-03-31 23:59:59")
+    for (query, params), index in zip(recorded, ("idx_contracts_history", "idx_contacts_history", "idx_payments_history")):
+        plan = " ".join(row[3] for row in db_connection.execute("EXPLAIN QUERY PLAN " + query, params))
+        assert index in plan, plan
+
+def test_deleted_payment_history_and_restore(api_client, test_client_id):
+    """
+    Test that a deleted payment shows in the client's history before its
+    deletion but not after, and that it can be restored once.
+    """
+    payments = execute_query(
+        "SELECT payment_id FROM payments WHERE client_id = ? AND valid_to IS NULL AND received_date IS NOT NULL LIMIT 1",
+        (test_client_id,)
+    )
+    if not payments:
+        pytest.skip("No payments for testing")
+    payment_id = payments[0]['payment_id']
+
+    assert payment_queries.delete_payment(payment_id)
+    try:
+        deleted_at = datetime.fromisoformat(payment_queries.get_payment_state(payment_id)['valid_to'])
+        before = (deleted_at - timedelta(seconds=1)).isoformat()
+
+        response = api_client.get(f"/clients/{test_client_id}/history", params={"as_of": before})
+        assert response.status_code == 200
+        snapshot = response.json()
+        assert payment_id in [p["payment_id"] for p in snapshot["payments"]]
+        assert "actual_fee" in snapshot["payments"][0]
+        assert snapshot["contracts"]
+
+        snapshot = history_service.get_client_as_of(test_client_id, (deleted_at + timedelta(seconds=1)).isoformat())
+        assert payment_id not in [p["payment_id"] for p in snapshot["payments"]]
+    finally:
+        response = api_client.post(f"/payments/{payment_id}/restore")
+    assert response.status_code == 200
+    assert payment_queries.get_payment_by_id(payment_id) is not None
+
+    response = api_client.post(f"/payments/{payment_id}/restore")
+    assert response.status_code == 409
+    assert api_client.post("/payments/999999999/restore").status_code == 404
+    assert api_client.get(f"/clients/{test_client_id}/history", params={"as_of": "not a date"}).status_code == 400
@@ -0,0 +1,65 @@
+"""
+Tests for incremental directory scanning with the file manifest.
+"""
+import os
+import pytest
+from database.connection import execute_delete
+from services import manifest_service
+from services.file_service import is_valid_file_type
+
+@pytest.fixture
+def client_tree(tmp_path, test_client_id):
+    """
+    Fixture that builds a small client folder and clears the client's manifest afterwards.
+    """
+    client_path = tmp_path / "Client A"
+    (client_path / "Statements").mkdir(parents=True)
+    (client_path / "a.pdf").write_bytes(b"a")
+    (client_path / "Statements" / "b.pdf").write_bytes(b"bb")
+    (client_path / "setup.exe").write_bytes(b"skip")
+    yield tmp_path, client_path
+    execute_delete("DELETE FROM file_manifest WHERE client_id = ?", (test_client_id,))
+
+def scan(test_client_id, client_tree, full=False):
+    shared_folder, client_path = client_tree
+    return manifest_service.scan_tree(test_client_id, client_path, shared_folder, is_valid_file_type, full=full)
+
+def test_first_scan_reports_all_files(test_client_id, client_tree):
+    """
+    Test that the first scan adds every supported file.
+    """
+    result = scan(test_client_id, client_tree)
+    assert result["added"] == ["Client A/Statements/b.pdf", "Client A/a.pdf"]
+    assert result["entries"]["Client A/Statements/b.pdf"]["size"] == 2
+    assert result["stats"]["directories_scanned"] == 2
+
+def test_rescan_skips_unchanged_folders(test_client_id, client_tree):
+    """
+    Test that a rescan of an unchanged tree lists no folders and reports no changes.
+    """
+    scan(test_client_id, client_tree)
+    result = scan(test_client_id, client_tree)
+    assert (result["added"], result["changed"], result["removed"]) == ([], [], [])
+    assert result["stats"] == {"directories_scanned": 0, "directories_skipped": 2}
+    assert "Client A/a.pdf" in result["entries"], "Skipped folders keep their files"
+
+def test_rescan_reports_added_and_removed(test_client_id, client_tree):
+    """
+    Test that added and removed files are reported on the next scan.
+    """
+    _, client_path = client_tree
+    scan(test_client_id, client_tree)
+    os.remove(client_path / "a.pdf")
+    (client_path / "Statements" / "c.pdf").write_bytes(b"c")
+    result = scan(test_client_id, client_tree)
+    assert result["added"] == ["Client A/Statements/c.pdf"]
+    assert result["removed"] == ["Client A/a.pdf"]
+
+def test_full_rescan_detects_in_place_edits(test_client_id, client_tree):
+    """
+    Test that full=True catches files edited without a folder mtime change.
+    """
+    _, client_path = client_tree
+    scan(test_client_id, client_tree)
+    (client_path / "Statements" / "b.pdf").write_bytes(b"edited")
+    assert scan(test_client_id, client_tree, full=True)["changed"] == ["Client A/Statements/b.pdf"]
@@ -0,0 +1,62 @@
+"""
+Tests for integer-cents money handling.
+"""
+import pytest
+from decimal import Decimal
+from database.connection import execute_single_query
+from database.migrations import MIGRATIONS
+from utils import to_cents, from_cents, row_from_cents
+
+@pytest.mark.parametrize("amount, cents", [
+    (Decimal('547.51'), 54751),
+    (547.51, 54751),
+    ('0.005', 1),
+    (1000, 100000),
+    (None, None),
+])
+def test_to_cents(amount, cents):
+    """
+    Test that dollar amounts convert to exact integer cents.
+    """
+    assert to_cents(amount) == cents, "Amount should convert to exact cents"
+
+def test_from_cents_round_trip():
+    """
+    Test that cents convert back to the exact Decimal amount.
+    """
+    assert from_cents(54751) == Decimal('547.51'), "Cents should convert to exact dollars"
+    assert from_cents(None) is None, "None should stay None"
+    assert to_cents(from_cents(123456789)) == 123456789, "Round trip should be lossless"
+
+def test_row_from_cents():
+    """
+    Test that *_cents columns are replaced by their dollar counterparts.
+    """
+    row = row_from_cents({'payment_id': 1, 'actual_fee_cents': 54751, 'expected_fee_cents': None})
+    assert row == {'payment_id': 1, 'actual_fee': 547.51, 'expected_fee': None}
+
+def test_schema_is_migrated(db_connection):
+    """
+    Test that the database is at the latest schema version with integer money columns.
+    """
+    version = db_connection.execute("PRAGMA user_version").fetchone()[0]
+    assert version == MIGRATIONS[-1][0], "Database should be at the latest schema version"
+
+    columns = {row['name']: row['type'] for row in db_connection.execute("PRAGMA table_info(payments)")}
+    assert columns.get('actual_fee_cents') == 'INTEGER', "actual_fee_cents should be an INTEGER column"
+    assert columns.get('expected_fee_cents') == 'INTEGER', "expected_fee_cents should be an INTEGER column"
+
+def test_summary_totals_are_integer_cents():
+    """
+    Test that quarterly summary totals are stored as integer cents.
+    """
+    summary = execute_single_query("""
+        SELECT client_id, year, quarter, total_payments_cents
+        FROM quarterly_summaries
+        WHERE total_payments_cents IS NOT NULL
+        LIMIT 1
+    """)
+    if not summary:
+        pytest.skip("No quarterly summaries found")
+
+    assert isinstance(summary['total_payments_cents'], int), "Summary totals should be integers"
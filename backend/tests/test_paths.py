@@ -0,0 +1,66 @@
+"""
+Tests for cached shared folder and client folder resolution.
+"""
+import os
+import pytest
+from database.queries import clients as client_queries
+from services import path_service, client_service
+
+@pytest.fixture
+def resolve_counts(tmp_path, monkeypatch):
+    """
+    Fixture that points the config at a temp file and counts real resolutions.
+    """
+    config_file = tmp_path / "file_paths.json"
+    config_file.write_text('{"shared_folder_path": "Shared"}')
+    monkeypatch.setattr(path_service, "CONFIG_FILE", str(config_file))
+
+    counts = {"shared": 0, "client": 0}
+    resolve_shared = path_service._resolve_shared_folder
+    resolve_client = path_service._resolve_client_folder
+
+    def count_shared():
+        counts["shared"] += 1
+        return resolve_shared()
+
+    def count_client(client_id, shared_folder):
+        counts["client"] += 1
+        return resolve_client(client_id, shared_folder)
+
+    monkeypatch.setattr(path_service, "_resolve_shared_folder", count_shared)
+    monkeypatch.setattr(path_service, "_resolve_client_folder", count_client)
+    path_service.invalidate()
+    yield counts, config_file
+    path_service.invalidate()
+
+def test_paths_are_resolved_once(test_client_id, resolve_counts):
+    """
+    Test that repeated lookups reuse the resolved paths.
+    """
+    counts, _ = resolve_counts
+    for _ in range(3):
+        path_service.get_shared_folder_path()
+        path_service.get_client_folder_path(test_client_id)
+    assert counts == {"shared": 1, "client": 1}
+
+def test_config_change_reloads(test_client_id, resolve_counts):
+    """
+    Test that editing the config file resolves both paths again.
+    """
+    counts, config_file = resolve_counts
+    path_service.get_client_folder_path(test_client_id)
+    stat = os.stat(config_file)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    path_service.get_client_folder_path(test_client_id)
+    assert counts == {"shared": 2, "client": 1}, "Same root keeps client folders"
+
+def test_client_folder_update_invalidates(test_client_id, resolve_counts):
+    """
+    Test that updating a client's folder path drops its cached folder.
+    """
+    counts, _ = resolve_counts
+    original = path_service.get_client_folder_path(test_client_id)
+    folder_path = client_queries.get_client_by_id(test_client_id)['onedrive_folder_path']
+    assert client_service.update_client_folder_path(test_client_id, folder_path)["success"]
+    assert path_service.get_client_folder_path(test_client_id) == original
+    assert counts["client"] == 2
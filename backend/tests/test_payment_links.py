@@ -0,0 +1,66 @@
+"""
+Tests for linking files to payments in batches.
+"""
+import pytest
+from database.connection import execute_query
+from database.queries import files as file_queries
+from services import file_service
+
+@pytest.fixture
+def link_targets(test_client_id):
+    """
+    Fixture that provides two of the test client's payments, a payment of
+    another client, and two files it removes afterwards.
+    """
+    own = execute_query("SELECT payment_id FROM payments WHERE client_id = ? AND valid_to IS NULL LIMIT 2", (test_client_id,))
+    other = execute_query("SELECT payment_id FROM payments WHERE client_id != ? AND valid_to IS NULL LIMIT 1", (test_client_id,))
+    if len(own) < 2 or not other:
+        pytest.skip("Not enough payments for testing")
+    files = [file_queries.create_file(test_client_id, name, f"Link Test/{name}") for name in ("q1.pdf", "q2.pdf")]
+    yield [p['payment_id'] for p in own], other[0]['payment_id'], files
+    for file_id in files:
+        file_queries.delete_file(file_id)
+
+def test_batch_link_reports_each_pair(test_client_id, link_targets):
+    """
+    Test that valid pairs are linked together and invalid ones are reported, not applied.
+    """
+    (first, second), other_payment, (file_a, file_b) = link_targets
+    file_queries.link_file_to_payment(first, file_a)
+
+    result = file_service.update_payment_links(test_client_id, [
+        (first, file_a), (first, file_b), (second, file_b), (second, file_b),
+        (other_payment, file_a), (first, 999999999)
+    ])
+    statuses = [(r["payment_id"], r["file_id"], r["status"]) for r in result["results"]]
+    assert statuses == [
+        (first, file_a, "already_linked"),
+        (first, file_b, "linked"),
+        (second, file_b, "linked"),
+        (other_payment, file_a, "invalid"),
+        (first, 999999999, "invalid"),
+    ]
+    assert not result["success"]
+    assert result["counts"] == {"linked": 2, "already_linked": 1, "invalid": 2}
+    assert result["results"][3]["message"] == "Payment belongs to another client"
+    assert file_queries.get_payment_count_for_file(file_b) == 2
+    assert file_queries.get_payment_count_for_file(file_a) == 1
+
+def test_batch_unlink_endpoint(api_client, test_client_id, link_targets):
+    """
+    Test the link and unlink batch endpoints.
+    """
+    (first, second), _, (file_a, _) = link_targets
+    links = [{"payment_id": first, "file_id": file_a}, {"payment_id": second, "file_id": file_a}]
+
+    response = api_client.post("/files/link-batch", json={"client_id": test_client_id, "links": links})
+    assert response.status_code == 200
+    assert response.json()["counts"]["linked"] == 2
+
+    response = api_client.post("/files/unlink-batch", json={"client_id": test_client_id, "links": links[:1]})
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == ["unlinked"]
+    assert file_queries.get_payment_count_for_file(file_a) == 1
+
+    response = api_client.post("/files/link-batch", json={"client_id": test_client_id, "links": []})
+    assert response.status_code == 422
@@ -0,0 +1,88 @@
+"""
+Tests for matching documents to payments by the period and provider in their names.
+"""
+import pytest
+from database.queries import files as file_queries
+from database.queries import payments as payment_queries
+from services import match_service
+
+@pytest.mark.parametrize("path, expected", [
+    ("Acme/Voya Q1 2024 statement.pdf", ("quarter", "Jan 2024 - Mar 2024")),
+    ("Acme/2024Q3.pdf", ("quarter", "Jul 2024 - Sep 2024")),
+    ("Acme/Empower_2024-03-31.pdf", ("date", "Mar 2024")),
+    ("Acme/3-31-24 stmt.pdf", ("date", "Mar 2024")),
+    ("Acme/2023/March statement.pdf", ("month", "Mar 2023")),
+    ("Acme/Jan-Mar 2024 fees.xlsx", ("months", "Jan 2024 - Mar 2024")),
+    ("Acme/Statement March 15 2024.pdf", ("date", "Mar 2024")),
+    ("Acme/Voya Mar 5, 2024.pdf", ("date", "Mar 2024")),
+    ("Acme/Dec 2023 - Feb 2024.pdf", ("months", "Dec 2023 - Feb 2024")),
+    ("Acme/2022/Q2.pdf", ("quarter", "Apr 2022 - Jun 2022")),
+    ("Acme/Marketing plan 2024.pdf", ("year", "Jan 2024 - Dec 2024")),
+    ("Acme/Plan document.pdf", None),
+])
+def test_parse_period(path, expected):
+    """
+    Test that periods are read from file names, without mistaking words for months.
+    """
+    period = match_service.parse_period(path)
+    result = (period[0], match_service._period_label(period[1], period[2])) if period else None
+    assert result == expected
+
+def payment(payment_id, provider, month=None, quarter=None, year=2024):
+    return {
+        "payment_id": payment_id, "contract_id": 1, "received_date": f"{year}-01-01", "provider_name": provider,
+        "applied_start_month": month, "applied_start_month_year": year if month else None,
+        "applied_end_month": month, "applied_end_month_year": year if month else None,
+        "applied_start_quarter": quarter, "applied_start_quarter_year": year if quarter else None,
+        "applied_end_quarter": quarter, "applied_end_quarter_year": year if quarter else None,
+    }
+
+def test_period_index_lookup():
+    """
+    Test that the index finds payments overlapping a period and providers named in a file.
+    """
+    index = match_service.PeriodIndex([
+        payment(1, "Voya", month=1), payment(2, "Voya", month=2), payment(3, "Voya", month=4),
+        payment(4, "Ascensus Trust Company", quarter=1),
+    ])
+    _, start, end = match_service.parse_period("Acme/Q1 2024.pdf")
+    assert sorted(p["payment_id"] for p in index.candidates(start, end)) == [1, 2, 4]
+    assert index.providers_in("Acme/ascensus_statement.pdf") == ["Ascensus Trust Company"]
+    assert index.providers_in("Acme/trust company letter.pdf") == []
+
+def test_match_and_apply(api_client, test_client_id):
+    """
+    Test that a statement is proposed for the payment of its period and linked on apply.
+    """
+    payments = [p for p in payment_queries.get_client_payment_periods(test_client_id) if p["provider_name"] and (
+        (p["applied_start_month"] and p["applied_start_month"] == p["applied_end_month"]) or
+        (p["applied_start_quarter"] and p["applied_start_quarter"] == p["applied_end_quarter"])
+    )]
+    if not payments:
+        pytest.skip("No single-period payments for testing")
+    target = payments[0]
+    if target["applied_start_month"]:
+        months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+        period = f"{months[target['applied_start_month'] - 1]} {target['applied_start_month_year']}"
+    else:
+        period = f"Q{target['applied_start_quarter']} {target['applied_start_quarter_year']}"
+    name = f"{target['provider_name']} {period}.pdf"
+    file_id = file_queries.create_file(test_client_id, name, f"Match Test/{name}")
+    try:
+        response = api_client.get(f"/files/match/{test_client_id}", params={"path": "Match Test"})
+        assert response.status_code == 200
+        result = response.json()
+        assert [p["file_id"] for p in result["proposals"]] == [file_id]
+        best = result["proposals"][0]["payments"][0]
+        assert best["confidence"] == 1.0
+        assert target["payment_id"] in [m["payment_id"] for m in result["proposals"][0]["payments"]]
+
+        response = api_client.post(f"/files/match/{test_client_id}", params={"path": "Match Test", "min_confidence": 1.0})
+        assert response.status_code == 200
+        assert response.json()["applied"]["linked"] >= 1
+        assert file_queries.get_payment_count_for_file(file_id) >= 1
+
+        result = match_service.match_client_files(test_client_id, path_prefix="Match Test", min_confidence=1.0)
+        assert result["proposals"] == [], "Linked payments should not be proposed again"
+    finally:
+        file_queries.delete_file(file_id)
@@ -0,0 +1,99 @@
+"""
+Tests for document previews cached by content hash.
+"""
+import io
+import zipfile
+import pytest
+from database.queries import files as file_queries
+from services import file_service, preview_service
+from services.storage import MemoryStorage
+
+def make_docx(text):
+    """
+    Build a minimal .docx containing one paragraph.
+    """
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w') as archive:
+        archive.writestr('word/document.xml', (
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:body></w:document>'
+        ))
+    return out.getvalue()
+
+@pytest.fixture
+def preview_files(tmp_path, test_client_id, monkeypatch):
+    """
+    Fixture that registers documents held in memory and caches previews in a temp folder.
+    """
+    monkeypatch.setattr(preview_service, "PREVIEW_DIR", tmp_path)
+    storage = MemoryStorage()
+    storage.write("Preview Test/notes.txt", b"Q3 fee schedule")
+    storage.write("Preview Test/letter.docx", make_docx("Dear client"))
+    file_service.set_storage(storage)
+    file_ids = {
+        name: file_queries.create_file(test_client_id, name, f"Preview Test/{name}")
+        for name in ("notes.txt", "letter.docx")
+    }
+    yield file_ids
+    file_service.set_storage(None)
+    for file_id in file_ids.values():
+        file_queries.delete_file(file_id)
+
+def test_text_preview_is_cached_by_hash(preview_files):
+    """
+    Test that the first request generates the preview and records the file's hash.
+    """
+    file_id = preview_files["notes.txt"]
+    assert preview_service.get_cached_preview(file_id, "text") is None
+
+    preview = preview_service.get_preview(file_id, "text")
+    assert preview["success"]
+    with open(preview["path"], 'rb') as f:
+        assert f.read() == b"Q3 fee schedule"
+    assert file_queries.get_file_by_id(file_id)["sha256"] == preview["sha256"]
+    assert preview_service.get_cached_preview(file_id, "text")["path"] == preview["path"]
+
+def test_edited_file_gets_a_new_preview(preview_files):
+    """
+    Test that a file edited in place is rehashed instead of served the
+    preview of its old content.
+    """
+    file_id = preview_files["notes.txt"]
+    old = preview_service.get_preview(file_id, "text")
+    file_service.get_storage().write("Preview Test/notes.txt", b"Q4 fee schedule")
+    assert preview_service.get_cached_preview(file_id, "text") is None
+
+    new = preview_service.get_preview(file_id, "text")
+    assert new["sha256"] != old["sha256"]
+    with open(new["path"], 'rb') as f:
+        assert f.read() == b"Q4 fee schedule"
+    assert file_queries.get_file_by_id(file_id)["sha256"] == new["sha256"]
+
+def test_docx_text_and_missing_thumbnail(preview_files):
+    """
+    Test that .docx text is extracted and unsupported kinds report no preview.
+    """
+    file_id = preview_files["letter.docx"]
+    with open(preview_service.get_preview(file_id, "text")["path"], 'rb') as f:
+        assert f.read() == b"Dear client"
+    assert preview_service.get_preview(file_id, "thumbnail")["success"] is False
+
+def test_text_preview_reads_only_the_start():
+    """
+    Test that a text preview rendered from a file reads just the bytes it shows.
+    """
+    f = io.BytesIO(b"fee schedule line\n" * 100000)
+    previews = preview_service.render_previews(f, ".txt")
+    assert previews["text"].startswith(b"fee schedule line")
+    assert f.tell() == preview_service.TEXT_PREVIEW_CHARS * 4
+
+def test_image_thumbnail():
+    """
+    Test that images are scaled down to a PNG thumbnail.
+    """
+    Image = pytest.importorskip("PIL.Image")
+    out = io.BytesIO()
+    Image.new('RGB', (1200, 800), 'white').save(out, format='JPEG')
+    thumbnail = preview_service.render_previews(out.getvalue(), '.jpg')["thumbnail"]
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert image.size == (320, 213)
@@ -0,0 +1,61 @@
+"""
+Tests for reconciling client_files with the disk.
+"""
+import hashlib
+import pytest
+from database.queries import files as file_queries
+from services import reconcile_service
+
+@pytest.fixture
+def reconcile_folder(client_folder):
+    """
+    Fixture that provides the test client's folder with an empty year folder.
+    """
+    (client_folder / "2024").mkdir()
+    return client_folder
+
+def ours(entries, key="path"):
+    return sorted(e[key] for e in entries if e[key].startswith("Client Folder/"))
+
+def test_merge_reports_each_side_once():
+    """
+    Test the sorted merge, including two rows pointing at the same file.
+    """
+    rows = [{"client_id": 1, "path": p} for p in ("a", "b", "b", "d")]
+    disk = [{"client_id": 1, "path": p} for p in ("b", "c", "d")] + [{"client_id": 2, "path": "a"}]
+    orphaned, unregistered, present = reconcile_service._merge(rows, disk)
+    assert [r["path"] for r in orphaned] == ["a"]
+    assert [(e["client_id"], e["path"]) for e in unregistered] == [(1, "c"), (2, "a")]
+    assert [r["path"] for r in present] == ["b", "b", "d"]
+
+def test_reconcile_reports_and_applies(api_client, test_client_id, reconcile_folder):
+    """
+    Test that orphaned rows, unregistered files and hash-matched moves are
+    reported, and applied in one pass.
+    """
+    statement = b"%PDF statement"
+    (reconcile_folder / "2024" / "renamed.pdf").write_bytes(statement)
+    (reconcile_folder / "new.pdf").write_bytes(b"new")
+    moved_id = file_queries.create_file(test_client_id, "statement.pdf", "Client Folder/statement.pdf",
+                                        size_bytes=len(statement), sha256=hashlib.sha256(statement).hexdigest())
+    gone_id = file_queries.create_file(test_client_id, "gone.pdf", "Client Folder\\gone.pdf")
+
+    report = reconcile_service.reconcile_files()
+    assert report["applied"] is None
+    assert ours(report["orphaned"]) == ["Client Folder/gone.pdf"]
+    assert ours(report["unregistered"]) == ["Client Folder/new.pdf"]
+    moved = [m for m in report["moved"] if m["file_id"] == moved_id]
+    assert moved and moved[0]["new_path"] == "Client Folder/2024/renamed.pdf" and moved[0]["matched_on"] == "hash"
+    assert file_queries.get_file_by_id(gone_id)["missing_since"] is None, "A report must not change anything"
+
+    report = reconcile_service.reconcile_files(apply=True)
+    assert report["applied"]["moved"] >= 1 and report["applied"]["registered"] >= 1
+    assert file_queries.get_file_by_id(moved_id)["onedrive_path"] == "Client Folder/2024/renamed.pdf"
+    assert file_queries.get_file_by_id(gone_id)["missing_since"] is not None
+
+    (reconcile_folder / "gone.pdf").write_bytes(b"back")
+    response = api_client.get("/files/reconcile")
+    assert response.status_code == 200
+    result = response.json()
+    assert ours(result["restored"]) == ["Client Folder/gone.pdf"]
+    assert ours(result["orphaned"]) == [] and ours(result["unregistered"]) == []
@@ -0,0 +1,49 @@
+"""
+Tests for the all-clients scan job.
+"""
+import time
+import pytest
+from database.queries import files as file_queries
+from services import scan_job_service
+
+@pytest.fixture
+def scan_tree(client_folder):
+    """
+    Fixture that fills the test client's folder with two documents and a
+    file the scan should skip.
+    """
+    (client_folder / "2024").mkdir()
+    (client_folder / "q1.pdf").write_bytes(b"1")
+    (client_folder / "2024" / "q2.pdf").write_bytes(b"2")
+    (client_folder / "notes.exe").write_bytes(b"skip")
+    return client_folder
+
+def wait_for(job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    job = scan_job_service.get_job(job_id)
+    while job['state'] == "running" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = scan_job_service.get_job(job_id)
+    return job
+
+def test_scan_all_registers_new_files(test_client_id, scan_tree):
+    """
+    Test that the job registers each new file once and reports progress.
+    """
+    job = wait_for(scan_job_service.start_scan_all_job(max_workers=2)['job_id'])
+    assert job['state'] == "completed"
+    assert (job['clients_total'], job['clients_done']) == (1, 1)
+    assert (job['files_seen'], job['files_registered']) == (2, 2)
+    assert job['files_per_second'] >= 0
+
+    paths = file_queries.get_registered_paths(test_client_id)
+    assert {"Client Folder/q1.pdf", "Client Folder/2024/q2.pdf"} <= paths
+
+    again = wait_for(scan_job_service.start_scan_all_job()['job_id'])
+    assert again['files_registered'] == 0, "Rescans should not register duplicates"
+
+def test_unknown_job_returns_none():
+    """
+    Test that an unknown job ID has no status.
+    """
+    assert scan_job_service.get_job("missing") is None
@@ -0,0 +1,60 @@
+"""
+Tests for global search functionality.
+"""
+import pytest
+from datetime import datetime
+from database.queries import payments as payment_queries
+from database.queries import clients as client_queries
+from services import search_service
+
+def test_search_finds_contract_number(test_client_id):
+    """
+    Test that a contract can be found by its contract number.
+    """
+    contracts = [c for c in client_queries.get_client_contracts(test_client_id) if c['contract_number']]
+    if not contracts:
+        pytest.skip("No contract numbers found for test client")
+    
+    contract = contracts[0]
+    hits = search_service.global_search(contract['contract_number'], ['contract'])
+    assert any(h['entity_id'] == contract['contract_id'] for h in hits), "Contract should be found by number"
+    assert all(h['entity_type'] == 'contract' for h in hits), "Only contract hits should be returned"
+    hit = next(h for h in hits if h['entity_id'] == contract['contract_id'])
+    assert '<mark>' in hit['snippet'], "A title match should be highlighted too"
+
+def test_search_follows_payment_writes(test_client_id, test_contract_id):
+    """
+    Test that payment notes are indexed on insert and dropped on soft delete.
+    """
+    payment_id = payment_queries.create_payment(
+        contract_id=test_contract_id,
+        client_id=test_client_id,
+        received_date=datetime.now().strftime('%Y-%m-%d'),
+        total_assets=None,
+        expected_fee_cents=None,
+        actual_fee_cents=100,
+        method="Test",
+        notes="Qwzrollover paperwork received - PLEASE DELETE",
+        applied_start_month=1,
+        applied_start_month_year=2023,
+        applied_end_month=1,
+        applied_end_month_year=2023,
+        applied_start_quarter=None,
+        applied_start_quarter_year=None,
+        applied_end_quarter=None,
+        applied_end_quarter_year=None
+    )
+    
+    hits = search_service.global_search("qwzroll", ['payment'], test_client_id)
+    assert [h['entity_id'] for h in hits] == [payment_id], "New payment notes should be searchable"
+    assert '<mark>' in hits[0]['snippet'], "Hit should include a highlighted snippet"
+    
+    payment_queries.delete_payment(payment_id)
+    assert search_service.global_search("qwzroll") == [], "Soft-deleted payment should leave the index"
+
+def test_search_rejects_unknown_type():
+    """
+    Test that unknown entity types are rejected.
+    """
+    with pytest.raises(ValueError):
+        search_service.global_search("anything", ['invoice'])
@@ -0,0 +1,129 @@
+"""
+Tests for document storage backends and the local cache tier.
+"""
+import pytest
+from database.queries import files as file_queries
+from services import file_service
+from services.storage import MemoryStorage, CachedStorage
+
+@pytest.fixture
+def cached(tmp_path):
+    """
+    Fixture that provides an in-memory origin behind a 10 byte cache.
+    """
+    origin = MemoryStorage()
+    return origin, CachedStorage(origin, tmp_path / "cache", max_bytes=10)
+
+def test_repeat_reads_are_cache_hits(cached):
+    """
+    Test that the second read of a document comes from the cache.
+    """
+    origin, cache = cached
+    origin.write("a.txt", b"hello")
+    first = cache.local_path("a.txt")
+    assert cache.local_path("a.txt") == first
+    assert first.read_bytes() == b"hello"
+    assert (cache.status()["hits"], cache.status()["misses"]) == (1, 1)
+
+def test_modified_document_is_refetched(cached):
+    """
+    Test that a new mtime misses the cache instead of serving stale content.
+    """
+    origin, cache = cached
+    origin.write("a.txt", b"old")
+    cache.local_path("a.txt")
+    origin.write("a.txt", b"new!")
+    assert cache.local_path("a.txt").read_bytes() == b"new!"
+    assert cache.status()["misses"] == 2
+
+def test_least_recently_used_is_evicted(cached):
+    """
+    Test that the cache stays under max_bytes by dropping the oldest entry.
+    """
+    origin, cache = cached
+    for name in ("a.txt", "b.txt", "c.txt"):
+        origin.write(name, b"1234")
+    a = cache.local_path("a.txt")
+    cache.local_path("b.txt")
+    cache.local_path("a.txt")
+    cache.local_path("c.txt")
+    assert cache.status()["bytes"] == 8
+    assert a.exists(), "Recently used entry should be kept"
+
+    origin.write("big.txt", b"x" * 20)
+    assert cache.local_path("big.txt") is None, "Oversized documents bypass the cache"
+    with cache.open("big.txt") as f:
+        assert f.read() == b"x" * 20
+
+def test_acquired_entry_is_not_evicted(cached):
+    """
+    Test that an entry held for a download survives eviction until released.
+    """
+    origin, cache = cached
+    for name in ("a.txt", "b.txt", "c.txt"):
+        origin.write(name, b"1234")
+    a = cache.acquire("a.txt")
+    cache.local_path("b.txt")
+    cache.local_path("c.txt")
+    assert a.exists(), "Acquired entry should be kept"
+    assert cache.status()["bytes"] == 8
+
+    cache.release(a)
+    cache.local_path("b.txt")
+    assert not a.exists(), "Released entry is evicted again"
+
+def test_failed_copy_leaves_no_temp_file(cached, monkeypatch):
+    """
+    Test that a copy that fails part way removes its temp file.
+    """
+    origin, cache = cached
+    origin.write("a.txt", b"1234")
+
+    def broken_open(path):
+        raise OSError("offline")
+
+    monkeypatch.setattr(origin, "open", broken_open)
+    with pytest.raises(OSError):
+        cache.local_path("a.txt")
+    assert list(cache.cache_dir.iterdir()) == []
+
+def test_entry_that_cannot_be_removed_stays_tracked(cached, monkeypatch):
+    """
+    Test that an evicted file that is still open (Windows) keeps its entry
+    until a later eviction can remove it.
+    """
+    origin, cache = cached
+    for name in ("a.txt", "b.txt", "c.txt"):
+        origin.write(name, b"1234")
+    a = cache.local_path("a.txt")
+    cache.local_path("b.txt")
+    monkeypatch.setattr(cache, "_remove", lambda name: False)
+    cache.local_path("c.txt")
+    assert a.exists() and cache.status()["entries"] == 3
+    assert cache.status()["bytes"] == 12
+
+    monkeypatch.undo()
+    origin.write("d.txt", b"1234")
+    cache.local_path("d.txt")
+    assert not a.exists()
+    assert cache.status()["bytes"] == 8
+
+def test_file_content_reads_through_storage(test_client_id):
+    """
+    Test that get_file_content and get_file_download use the configured backend.
+    """
+    storage = MemoryStorage()
+    storage.write("Storage Test/notes.txt", b"Q3 statement notes")
+    file_id = file_queries.create_file(test_client_id, "notes.txt", "Storage Test/notes.txt")
+    file_service.set_storage(storage)
+    try:
+        content = file_service.get_file_content(file_id)
+        assert content["preview"] == "Q3 statement notes"
+        assert content["file_size"] == 18
+
+        download = file_service.get_file_download(file_id)
+        assert download["local_path"] is None
+        assert download["stream"].read() == b"Q3 statement notes"
+    finally:
+        file_service.set_storage(None)
+        file_queries.delete_file(file_id)
@@ -0,0 +1,117 @@
+"""
+Tests for streaming uploads.
+"""
+import asyncio
+import hashlib
+import pytest
+from database.queries import files as file_queries
+from services import file_service
+
+CONTENT = b"%PDF-1.7\n" + b"statement line\n" * 5000
+
+@pytest.fixture
+def upload_folder(tmp_path, monkeypatch):
+    """
+    Fixture that sends uploads to a temporary client folder and removes the
+    rows they create.
+    """
+    client_path = tmp_path / "Upload Client"
+    monkeypatch.setattr(file_service, "get_shared_folder_path", lambda: (tmp_path, "tmp"))
+    monkeypatch.setattr(file_service, "get_client_folder_path", lambda client_id: client_path)
+    created = []
+    yield client_path, created
+    for file_id in created:
+        file_queries.delete_file(file_id)
+
+def test_multipart_upload_records_size_and_hash(api_client, test_client_id, upload_folder):
+    """
+    Test that an upload is written whole and its size and SHA-256 are stored.
+    """
+    client_path, created = upload_folder
+    response = api_client.post(
+        f"/files/upload/{test_client_id}",
+        files={"file": ("statement.pdf", CONTENT, "application/pdf")}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    created.append(result["file_id"])
+
+    assert (client_path / "statement.pdf").read_bytes() == CONTENT
+    assert [p.name for p in client_path.iterdir()] == ["statement.pdf"], "No temp files should be left"
+    row = file_queries.get_file_by_id(result["file_id"])
+    assert row["size_bytes"] == len(CONTENT)
+    assert row["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+
+def test_raw_stream_upload(api_client, test_client_id, upload_folder):
+    """
+    Test that a raw body upload is saved under a unique name when one exists.
+    """
+    client_path, created = upload_folder
+    client_path.mkdir()
+    (client_path / "notes.txt").write_bytes(b"existing")
+    response = api_client.put(f"/files/upload/{test_client_id}?filename=notes.txt", content=b"new notes")
+    assert response.status_code == 200
+    result = response.json()
+    created.append(result["file_id"])
+    assert result["file_name"] != "notes.txt"
+    assert (client_path / result["file_name"]).read_bytes() == b"new notes"
+
+def test_same_content_upload_reuses_file(api_client, test_client_id, upload_folder):
+    """
+    Test that re-uploading identical content links to the existing file.
+    """
+    client_path, created = upload_folder
+    first = api_client.put(f"/files/upload/{test_client_id}?filename=q3.pdf", content=CONTENT).json()
+    created.append(first["file_id"])
+    second = api_client.put(f"/files/upload/{test_client_id}?filename=q3-copy.pdf", content=CONTENT).json()
+    assert second["deduplicated"] is True
+    assert second["file_id"] == first["file_id"]
+    assert [p.name for p in client_path.iterdir()] == ["q3.pdf"], "The duplicate should not be written"
+
+def test_upload_is_kept_when_duplicate_is_gone(api_client, test_client_id, upload_folder):
+    """
+    Test that a duplicate whose file was removed from disk is not reused.
+    """
+    client_path, created = upload_folder
+    first = api_client.put(f"/files/upload/{test_client_id}?filename=q3.pdf", content=CONTENT).json()
+    created.append(first["file_id"])
+    (client_path / "q3.pdf").unlink()
+
+    second = api_client.put(f"/files/upload/{test_client_id}?filename=q3-again.pdf", content=CONTENT).json()
+    created.append(second["file_id"])
+    assert second["deduplicated"] is False
+    assert (client_path / "q3-again.pdf").read_bytes() == CONTENT
+
+def test_upload_is_kept_when_duplicate_was_edited(api_client, test_client_id, upload_folder):
+    """
+    Test that a duplicate edited on disk to other bytes of the same length
+    is not reused, and its stale hash is corrected.
+    """
+    client_path, created = upload_folder
+    first = api_client.put(f"/files/upload/{test_client_id}?filename=q3.pdf", content=CONTENT).json()
+    created.append(first["file_id"])
+    edited = CONTENT.replace(b"statement", b"STATEMENT")
+    (client_path / "q3.pdf").write_bytes(edited)
+
+    second = api_client.put(f"/files/upload/{test_client_id}?filename=q3-again.pdf", content=CONTENT).json()
+    created.append(second["file_id"])
+    assert second["deduplicated"] is False
+    assert (client_path / "q3-again.pdf").read_bytes() == CONTENT
+    assert file_queries.get_file_by_id(first["file_id"])["sha256"] == hashlib.sha256(edited).hexdigest()
+
+def test_oversized_upload_is_rejected(api_client, test_client_id, upload_folder, monkeypatch):
+    """
+    Test that uploads over the limit are rejected and leave nothing behind.
+    """
+    client_path, _ = upload_folder
+    monkeypatch.setattr(file_service, "MAX_UPLOAD_BYTES", 100)
+    response = api_client.put(f"/files/upload/{test_client_id}?filename=big.pdf", content=CONTENT)
+    assert response.status_code == 413
+
+    async def chunks():
+        for _ in range(5):
+            yield b"x" * 40
+
+    with pytest.raises(file_service.UploadTooLargeError):
+        asyncio.run(file_service.save_file_stream(test_client_id, chunks(), "big.pdf", max_size=100))
+    assert list(client_path.iterdir()) == [], "Partial uploads should be removed"
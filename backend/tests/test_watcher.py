@@ -0,0 +1,90 @@
+"""
+Tests for keeping client_files in sync with the shared folder.
+"""
+import os
+import pytest
+from database.queries import files as file_queries
+from services import file_service, watcher_service
+
+@pytest.fixture
+def watched_folder(client_folder):
+    """
+    Fixture that puts one document in the test client's folder.
+    """
+    (client_folder / "2024").mkdir()
+    (client_folder / "q1.pdf").write_bytes(b"q1")
+    return client_folder
+
+def watched_files(client_id):
+    return {f['onedrive_path']: f for f in file_queries.get_client_files(client_id)
+            if f['onedrive_path'].startswith("Client Folder/")}
+
+def test_sync_registers_moves_and_flags_missing(test_client_id, watched_folder):
+    """
+    Test that a sync registers new files, keeps file_ids across moves and flags deletions.
+    """
+    assert watcher_service.sync_client(test_client_id)["registered"] == 1
+    file_id = watched_files(test_client_id)["Client Folder/q1.pdf"]['file_id']
+
+    os.rename(watched_folder / "q1.pdf", watched_folder / "2024" / "q1.pdf")
+    assert watcher_service.sync_client(test_client_id)["moved"] == 1
+    files = watched_files(test_client_id)
+    assert files["Client Folder/2024/q1.pdf"]['file_id'] == file_id, "Moves should keep the file_id"
+
+    os.remove(watched_folder / "2024" / "q1.pdf")
+    assert watcher_service.sync_client(test_client_id)["missing"] == 1
+    assert watched_files(test_client_id)["Client Folder/2024/q1.pdf"]['missing_since'] is not None
+
+    (watched_folder / "2024" / "q1.pdf").write_bytes(b"back")
+    assert watcher_service.sync_client(test_client_id)["restored"] == 1
+    assert watched_files(test_client_id)["Client Folder/2024/q1.pdf"]['missing_since'] is None
+
+def test_sync_after_another_scan_still_flags_missing(test_client_id, watched_folder):
+    """
+    Test that a scan outside the watcher advancing the manifest does not hide
+    a deletion or a move from the next sync.
+    """
+    (watched_folder / "q2.pdf").write_bytes(b"q2")
+    assert watcher_service.sync_client(test_client_id)["registered"] == 2
+    file_id = watched_files(test_client_id)["Client Folder/q2.pdf"]['file_id']
+
+    os.remove(watched_folder / "q1.pdf")
+    os.rename(watched_folder / "q2.pdf", watched_folder / "2024" / "q2.pdf")
+    file_service.scan_client_directory(test_client_id)
+
+    counts = watcher_service.sync_client(test_client_id)
+    assert (counts["missing"], counts["moved"], counts["registered"]) == (1, 1, 0)
+    files = watched_files(test_client_id)
+    assert files["Client Folder/q1.pdf"]['missing_since'] is not None
+    assert files["Client Folder/2024/q2.pdf"]['file_id'] == file_id
+
+def test_events_are_debounced_per_client(test_client_id, watched_folder):
+    """
+    Test that events inside a client folder mark it dirty and outside paths are ignored.
+    """
+    watcher = watcher_service.FolderWatcher(debounce=60, use_events=False)
+    watcher._load_client_folders()
+    watcher.notify(str(watched_folder / "2024" / "new.pdf"))
+    watcher.notify(str(watched_folder.parent / "elsewhere.pdf"))
+    assert watcher.status()["clients_pending"] == 1
+    assert watcher.sync_pending() == 0, "Clients should wait for the debounce period"
+
+    watcher.debounce = 0
+    assert watcher.sync_pending() == 1
+    assert watcher.stats["registered"] == 1
+
+def test_reload_picks_up_moved_client_folder(test_client_id, watched_folder, monkeypatch):
+    """
+    Test that reloading after a folder path update watches the new folder
+    and syncs it.
+    """
+    watcher = watcher_service.FolderWatcher(debounce=0, use_events=False)
+    watcher._load_client_folders()
+    renamed = watched_folder.parent / "Renamed"
+    assert watcher.client_for_path(str(renamed / "a.pdf")) is None
+
+    monkeypatch.setattr(file_service, "get_client_folder_path", lambda client_id: renamed)
+    renamed.mkdir()
+    watcher.reload_client_folders()
+    assert watcher.client_for_path(str(renamed / "a.pdf")) == test_client_id
+    assert watcher.status()["clients_pending"] == 1
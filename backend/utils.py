@@ -2,6 +2,7 @@
 # Shared utility functions
 
 from datetime import datetime, date
+from decimal import Decimal, ROUND_HALF_UP
 from typing import Optional, Dict, List, Any, Union
 import locale
 import os
@@ -35,6 +36,64 @@ def format_currency(amount: Optional[Union[float, int]]) -> str:
         # Fallback if locale formatting fails
         return f"${amount:,.2f}"
 
+def to_cents(amount: Optional[Union[Decimal, float, int, str]]) -> Optional[int]:
+    """
+    Convert a dollar amount to integer cents, rounding half up.
+    
+    Args:
+        amount: Dollar amount (Decimal, float, int or numeric string)
+        
+    Returns:
+        Amount in cents or None if amount is None
+    """
+    if amount is None:
+        return None
+    
+    if isinstance(amount, int):
+        return amount * 100
+    
+    # Go through repr for floats so 547.51 becomes Decimal('547.51'), not its binary expansion
+    if isinstance(amount, float):
+        amount = repr(amount)
+    
+    return int((Decimal(amount) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+def from_cents(cents: Optional[int]) -> Optional[Decimal]:
+    """
+    Convert integer cents to an exact Decimal dollar amount.
+    
+    Args:
+        cents: Amount in cents
+        
+    Returns:
+        Decimal dollar amount or None if cents is None
+    """
+    if cents is None:
+        return None
+    
+    return Decimal(int(cents)).scaleb(-2)
+
+def row_from_cents(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Replace every *_cents column of a database row with its dollar counterpart.
+    Dollars are plain floats (correctly rounded from the exact cents) so rows
+    returned as raw dicts still serialize as JSON numbers like 547.51.
+    
+    Args:
+        row: Row dictionary as returned by the query layer
+        
+    Returns:
+        The same dictionary with e.g. actual_fee_cents replaced by actual_fee
+    """
+    if row is None:
+        return None
+    
+    for key in [k for k in row if k.endswith('_cents')]:
+        cents = row.pop(key)
+        row[key[:-6]] = cents / 100 if cents is not None else None
+    
+    return row
+
 def format_percentage(value: Optional[float]) -> str:
     """
     Format value as percentage.